@@ -0,0 +1,100 @@
+import logging
+import zlib
+from collections.abc import Callable
+from typing import Any, Protocol
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class _Codec(Protocol):
+    name: str
+
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def decompress(self, data: bytes) -> bytes:
+        ...
+
+
+class _Zlib:
+    name = "zlib"
+
+    def __init__(self, level: int) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class _Zstd:
+    name = "zstd"
+
+    def __init__(self, level: int) -> None:
+        import zstandard
+
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+CODECS: dict[str, Callable[[int], _Codec]] = {"zlib": _Zlib, "zstd": _Zstd}
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Checkpoint serializer that compresses the output of another one.
+
+    Values are encoded by ``inner`` (msgpack with type tags for LangChain
+    messages by default, no pickle) and blobs of at least ``min_size`` bytes
+    are compressed. The codec is appended to the stored type tag
+    (``msgpack+zlib``), so blobs written before compression was enabled, or
+    with another codec, still load. ``codec="none"`` stores blobs as is.
+    """
+
+    def __init__(
+        self,
+        inner: SerializerProtocol | None = None,
+        codec: str = "zlib",
+        level: int = 3,
+        min_size: int = 512,
+    ) -> None:
+        self.inner = inner or JsonPlusSerializer(pickle_fallback=False)
+        self.min_size = min_size
+        if codec != "none" and codec not in CODECS:
+            raise ValueError(
+                f"Unknown checkpoint codec {codec!r}; use none, {', '.join(CODECS)}"
+            )
+        self._codecs: dict[str, _Codec] = {"zlib": _Zlib(level)}
+        if codec == "zstd":
+            try:
+                self._codecs["zstd"] = _Zstd(level)
+            except ImportError:
+                logger.warning("zstd compression needs 'zstandard'; using zlib")
+                codec = "zlib"
+        self.codec = self._codecs.get(codec)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if self.codec is None or data is None or len(data) < self.min_size:
+            return type_, data
+        return f"{type_}+{self.codec.name}", self.codec.compress(data)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        base, _, codec = type_.rpartition("+")
+        if base and codec in CODECS:
+            if codec not in self._codecs:
+                self._codecs[codec] = CODECS[codec](3)
+            payload = self._codecs[codec].decompress(payload)
+            type_ = base
+        return self.inner.loads_typed((type_, payload))
@@ -7,6 +7,7 @@ from agent.deepseek_models import (
     DeepSeekChatRequest,
     DeepSeekMessage,
 )
+from agent.usage_accounting import api_usage, record_usage
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -60,6 +61,9 @@ class DeepSeekWebService:
 
             data = response.json()
             logger.debug(f"DeepSeek API response data: {data}")
+            usage = api_usage(data)
+            if usage is not None:
+                record_usage(usage)
             return ChatCompletion(
                 content=data["choices"][0]["message"]["content"],
                 model=data["model"],
@@ -0,0 +1,172 @@
+import logging
+import uuid
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.runtime import Runtime
+
+from shared.metrics import HISTORY_COMPACTIONS, HISTORY_PROMPT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[Iterable[AnyMessage]], int]
+
+# Fixed id so the summary of a thread is replaced, never duplicated
+SUMMARY_MESSAGE_ID = "history-summary"
+SUMMARY_PREFIX = "Summary of the earlier conversation with this customer:\n"
+
+SUMMARY_PROMPT = (
+    "You are compacting the history of a WhatsApp conversation between a "
+    "supermarket salesman and a customer. Write a short summary, in the "
+    "language of the conversation and in at most {max_tokens} tokens, keeping "
+    "only what is needed to continue serving the customer: their name, "
+    "products and prices they asked about, items in the order with "
+    "quantities and totals, delivery address, payment method and any open "
+    "question. Do not list the catalog.\n\n"
+    "{previous}Conversation:\n{transcript}"
+)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    omitted = len(text) - max_chars
+    return f"{text[:max_chars]}\n[... {omitted} characters omitted]"
+
+
+class HistoryCompactionMiddleware(AgentMiddleware):
+    """Keep the checkpointed conversation inside a token budget.
+
+    Runs before the model at the start of each turn (the latest message is
+    from the customer). The last ``keep_turns`` turns stay verbatim except for
+    tool outputs of past turns longer than ``max_tool_output_tokens``, which
+    are cut. When the history is still above ``max_history_tokens``, older
+    turns (and any previous summary) are folded into a single summary message
+    generated by ``model``. The rewritten history is stored by the
+    checkpointer, so the cost is paid once rather than on every turn.
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        keep_turns: int = 6,
+        max_history_tokens: int = 4000,
+        max_tool_output_tokens: int = 300,
+        summary_max_tokens: int = 400,
+        token_counter: TokenCounter = count_tokens_approximately,
+        chars_per_token: float = 4.0,
+    ) -> None:
+        super().__init__()
+        self.model = model
+        self.keep_turns = max(keep_turns, 1)
+        self.max_history_tokens = max_history_tokens
+        self.max_tool_output_tokens = max_tool_output_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.token_counter = token_counter
+        self.chars_per_token = chars_per_token
+
+    async def abefore_model(
+        self, state: AgentState, runtime: Runtime
+    ) -> dict[str, Any] | None:
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None  # mid-turn model call after a tool result
+        for message in messages:
+            if message.id is None:
+                message.id = str(uuid.uuid4())
+
+        tokens_before = self.token_counter(messages)
+        HISTORY_PROMPT_TOKENS.labels(stage="before").observe(tokens_before)
+
+        summary, history = self._split_summary(messages)
+        starts = self._turn_starts(history)
+        current_turn = starts[-1] if starts else len(history)
+        # Bulky tool outputs (catalog dumps, search results) of past turns
+        trimmed = [
+            self._trim_tool_output(message) if i < current_turn else message
+            for i, message in enumerate(history)
+        ]
+        cutoff = starts[-self.keep_turns] if len(starts) > self.keep_turns else 0
+        older, recent = trimmed[:cutoff], trimmed[cutoff:]
+
+        result: list[AnyMessage] = [*([summary] if summary else []), *trimmed]
+        # RemoveMessage is not an AnyMessage
+        update: list[BaseMessage] = [
+            new for new, old in zip(trimmed, history, strict=True) if new is not old
+        ]
+        if older and self.token_counter(result) > self.max_history_tokens:
+            new_summary = await self._summarize(summary, older)
+            if new_summary is not None:
+                summary_message = HumanMessage(
+                    content=SUMMARY_PREFIX + new_summary, id=SUMMARY_MESSAGE_ID
+                )
+                result = [summary_message, *recent]
+                update = [RemoveMessage(id=REMOVE_ALL_MESSAGES), *result]
+                HISTORY_COMPACTIONS.labels(result="summarized").inc()
+        elif update:
+            HISTORY_COMPACTIONS.labels(result="trimmed").inc()
+
+        HISTORY_PROMPT_TOKENS.labels(stage="after").observe(self.token_counter(result))
+        return {"messages": update} if update else None
+
+    @staticmethod
+    def _split_summary(
+        messages: list[AnyMessage],
+    ) -> tuple[AnyMessage | None, list[AnyMessage]]:
+        if messages[0].id == SUMMARY_MESSAGE_ID:
+            return messages[0], messages[1:]
+        return None, messages
+
+    @staticmethod
+    def _turn_starts(messages: list[AnyMessage]) -> list[int]:
+        """Indexes where a customer turn starts (a run of human messages)"""
+        return [
+            i
+            for i, message in enumerate(messages)
+            if isinstance(message, HumanMessage)
+            and (i == 0 or not isinstance(messages[i - 1], HumanMessage))
+        ]
+
+    def _trim_tool_output(self, message: AnyMessage) -> AnyMessage:
+        if not isinstance(message, ToolMessage):
+            return message
+        max_chars = int(self.max_tool_output_tokens * self.chars_per_token)
+        text = message.text
+        if len(text) <= max_chars:
+            return message
+        return message.model_copy(update={"content": truncate_text(text, max_chars)})
+
+    @staticmethod
+    def _transcript(messages: list[AnyMessage]) -> str:
+        return "\n".join(f"{m.type}: {m.text}" for m in messages if m.text)
+
+    async def _summarize(
+        self, summary: AnyMessage | None, older: list[AnyMessage]
+    ) -> str | None:
+        previous = ""
+        if summary is not None:
+            previous = f"Previous summary:\n{summary.text[len(SUMMARY_PREFIX):]}\n\n"
+        prompt = SUMMARY_PROMPT.format(
+            max_tokens=self.summary_max_tokens,
+            previous=previous,
+            transcript=self._transcript(older),
+        )
+        try:
+            response = await self.model.ainvoke(prompt)
+        except Exception as e:
+            logger.error(f"History compaction failed, keeping full history: {e}")
+            HISTORY_COMPACTIONS.labels(result="error").inc()
+            return None
+        max_chars = int(self.summary_max_tokens * self.chars_per_token)
+        return truncate_text(response.text.strip(), max_chars)
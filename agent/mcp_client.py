@@ -1,9 +1,12 @@
 import logging
+from collections.abc import AsyncIterator
+from typing import Any
 
 from agent.deepseek_langchain_service import deepseek_lc_service
 from agent.deepseek_models import DeepSeekMessage
 from agent.mcp_models import CallToolResult, ContentType, TextContent
 from config import settings
+from messaging.reply_chunker import chunk_reply
 from models import MCPRequest, MCPResponse
 
 logger = logging.getLogger(__name__)
@@ -20,32 +23,59 @@ class MCPClient:
     async def send_message(self, request: MCPRequest) -> MCPResponse:
         """Send message to MCP server and get response"""
         try:
-            messages = []
-            for msg in request.messages:
-                messages.append(
-                    DeepSeekMessage(
-                        role="user",
-                        content=f"<saleto${request.session_id}>\n\n" + msg.content,
-                    )
-                )
+            messages = self._to_deepseek_messages(request)
 
             ds_service = deepseek_lc_service
+            turn: dict[str, Any] = {}
             result = await ds_service.chat_completion(
                 messages=messages,
                 session_id=request.session_id,
                 client_phone=request.session_id,
+                turn=turn,
             )
 
             CallToolResult(
                 content=[TextContent(type=ContentType.TEXT, text=result.content)]
             )
 
-            return MCPResponse(response=result.content)
+            return MCPResponse(response=result.content, context=turn)
 
         except Exception as e:
             # return MCPResponse(response=str(e))
             logger.error(f"MCP Client HTTP error: {str(e)}")
             raise Exception(f"MCP Client HTTP error: {str(e)}") from e
 
+    async def stream_message(
+        self, request: MCPRequest, turn: dict[str, Any] | None = None
+    ) -> AsyncIterator[str]:
+        """Stream the agent reply as sentence/paragraph sized chunks
+
+        ``turn`` receives what ``MCPResponse.context`` holds for
+        ``send_message`` (e.g. ``used_tools``) once the stream is exhausted.
+        """
+        try:
+            tokens = deepseek_lc_service.stream_completion(
+                messages=self._to_deepseek_messages(request),
+                session_id=request.session_id,
+                client_phone=request.session_id,
+                turn=turn,
+            )
+            async for chunk in chunk_reply(
+                tokens,
+                min_chars=settings.STREAM_MIN_CHUNK_CHARS,
+                max_chars=settings.STREAM_MAX_CHUNK_CHARS,
+            ):
+                yield chunk
+        except Exception as e:
+            logger.error(f"MCP Client stream error: {str(e)}")
+            raise Exception(f"MCP Client stream error: {str(e)}") from e
+
+    @staticmethod
+    def _to_deepseek_messages(request: MCPRequest) -> list[DeepSeekMessage]:
+        return [
+            DeepSeekMessage(role="user", content=msg.content)
+            for msg in request.messages
+        ]
+
 
 mcp_client = MCPClient()
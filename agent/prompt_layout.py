@@ -0,0 +1,78 @@
+"""Request layout that keeps the prompt prefix identical across customers.
+
+DeepSeek caches prompt prefixes: tokens up to the first byte that differs
+from an earlier request are billed and processed as cache hits. Every request
+therefore starts with the static system prompt and tool schemas, followed by
+a short per-customer context message, then the conversation. Customer data
+is never spliced into the shared prefix or repeated in each message.
+
+Token counts (including cached prompt tokens) are recorded by
+``agent/usage_accounting.py``; this module only observes the hit ratio of
+each call to judge the layout.
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from langchain.agents.middleware import (
+    AgentMiddleware,
+    ModelRequest,
+    ModelResponse,
+)
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+
+from agent.usage_accounting import prompt_cache_tokens
+from shared.metrics import LLM_PROMPT_CACHE_HIT_RATIO
+
+
+@dataclass(frozen=True)
+class CustomerContext:
+    """Per-invocation data passed to the agent as runtime context"""
+
+    client_phone: str
+
+
+def customer_context_message(context: CustomerContext) -> SystemMessage:
+    return SystemMessage(f"client_phone: {context.client_phone}")
+
+
+def record_prompt_cache_ratio(messages: list[BaseMessage]) -> None:
+    for message in messages:
+        if not isinstance(message, AIMessage):
+            continue
+        tokens = prompt_cache_tokens(message)
+        if tokens is None:
+            continue
+        cached, uncached = tokens
+        if cached + uncached:
+            LLM_PROMPT_CACHE_HIT_RATIO.observe(cached / (cached + uncached))
+
+
+class PromptLayoutMiddleware(AgentMiddleware):
+    """Insert the customer context after the static prefix; observe cache hits"""
+
+    def _with_context(self, request: ModelRequest) -> ModelRequest:
+        context = request.runtime.context
+        if not isinstance(context, CustomerContext):
+            return request
+        return request.override(
+            messages=[customer_context_message(context), *request.messages]
+        )
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        response = handler(self._with_context(request))
+        record_prompt_cache_ratio(response.result)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        response = await handler(self._with_context(request))
+        record_prompt_cache_ratio(response.result)
+        return response
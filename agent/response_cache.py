@@ -0,0 +1,272 @@
+import logging
+import re
+import time
+import uuid
+from dataclasses import dataclass
+
+from redis import asyncio as aioredis
+
+from config import settings
+from sales.product_catalog import product_catalog
+from sales.product_search import normalize
+from shared.metrics import (
+    RESPONSE_CACHE_LLM_SECONDS_AVOIDED,
+    RESPONSE_CACHE_REQUESTS,
+)
+from shared.redis_client import redis_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Greetings and politeness carry no meaning for matching
+_FILLER = re.compile(
+    r"\b(oi+|ola|opa|bom dia|boa tarde|boa noite|por favor|pf|obrigad[oa]|"
+    r"moco|moca|amigo|amiga)\b"
+)
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+")
+
+# The only questions whose answer does not depend on the conversation or the
+# customer: where the shop is, when it is open and which payment methods it
+# takes. Anything else (products, prices, orders) goes to the agent.
+_INTENTS = {
+    "address": re.compile(
+        r"\b(endereco|onde fica|onde voces ficam|localizacao|localizad[oa]s?)\b"
+    ),
+    "opening_hours": re.compile(
+        r"\b(horario|funcionamento|que horas (voces )?(abre|abrem|fecha|fecham)|"
+        r"(esta|estao) abert[oa]s?)\b"
+    ),
+    "payment_methods": re.compile(
+        r"\b((formas?|meios?|opcoes) de pagamento|quais cartoes|"
+        r"aceita[mn]? (pix|cartao|cartoes|credito|debito|dinheiro|vale|ticket))\b"
+    ),
+}
+# Words of an order in progress or of the customer's own data; a question
+# with any of them is never answered from, or stored in, the cache
+_TRANSACTIONAL = re.compile(
+    r"\b(quero|vou|meu|minha|meus|minhas|pedido|compra|comprar|carrinho|"
+    r"pagar|pago|paguei|chave|total|troco|finalizar|fechar|"
+    r"entrega|entregar|entregam|frete|cep|rua)\b"
+)
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, strip accents, punctuation and greetings"""
+    text = _NON_WORD.sub(" ", normalize(text))
+    text = _FILLER.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def ngrams(text: str, n: int = 3) -> frozenset[str]:
+    padded = f" {text} "
+    return frozenset(padded[i : i + n] for i in range(max(len(padded) - n + 1, 1)))
+
+
+def numbers(text: str) -> frozenset[str]:
+    return frozenset(_NUMBER.findall(text))
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Dice coefficient over character n-grams"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    answer: str
+    similarity: float
+
+
+class ResponseCache:
+    """Redis-backed cache of answers to stateless customer questions.
+
+    Only questions of an allowlisted intent (address, opening hours, payment
+    methods) without words of an order in progress are cached.
+
+    Questions are normalized and matched against cached ones by character
+    trigram similarity on a local copy of the question index, so a lookup
+    costs one Redis round-trip only when a candidate is found. An entry is
+    served only once it has been asked ``popular_threshold`` times and only
+    while the catalog version it was answered against is still active.
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted beyond ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        prefix: str,
+        ttl: int,
+        max_entries: int,
+        popular_threshold: int,
+        min_similarity: float = 0.8,
+        index_refresh: float = 5.0,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.popular_threshold = popular_threshold
+        self.min_similarity = min_similarity
+        self.index_refresh = index_refresh
+        # entry id -> (numbers, trigrams) of the normalized question
+        self._index: dict[str, tuple[frozenset[str], frozenset[str]]] = {}
+        self._index_loaded_at = 0.0
+
+    @staticmethod
+    def intent(question: str) -> str | None:
+        """Cacheable intent of ``question``, None if it must reach the agent"""
+        normalized = normalize_question(question)
+        if not 0 < len(normalized) <= 120:
+            return None
+        # Digits are quantities, order numbers, CEPs or phones
+        if _NUMBER.search(normalized) or _TRANSACTIONAL.search(normalized):
+            return None
+        for name, pattern in _INTENTS.items():
+            if pattern.search(normalized):
+                return name
+        return None
+
+    @classmethod
+    def is_cacheable(cls, question: str) -> bool:
+        return cls.intent(question) is not None
+
+    def _entry_key(self, entry_id: str) -> str:
+        return f"{self.prefix}:answer:{entry_id}"
+
+    @property
+    def _lru_key(self) -> str:
+        return f"{self.prefix}:answers_lru"
+
+    async def _refresh_index(self) -> None:
+        if time.monotonic() - self._index_loaded_at < self.index_refresh:
+            return
+        members = await self.redis.zrange(self._lru_key, 0, -1)
+        entry_ids = [entry_id.decode() for entry_id in members]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry_id in entry_ids:
+                pipe.hget(self._entry_key(entry_id), "question")
+            questions = await pipe.execute()
+        self._index = {
+            entry_id: self._signature(question.decode())
+            for entry_id, question in zip(entry_ids, questions, strict=True)
+            if question is not None
+        }
+        self._index_loaded_at = time.monotonic()
+
+    @staticmethod
+    def _signature(normalized: str) -> tuple[frozenset[str], frozenset[str]]:
+        return numbers(normalized), ngrams(normalized)
+
+    def _best_match(
+        self, signature: tuple[frozenset[str], frozenset[str]]
+    ) -> tuple[str | None, float]:
+        # Quantities must agree exactly: "arroz 1kg" is not "arroz 5kg"
+        digits, grams = signature
+        best_id, best_score = None, 0.0
+        for entry_id, (entry_digits, entry_grams) in self._index.items():
+            if entry_digits != digits:
+                continue
+            score = similarity(grams, entry_grams)
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        if best_score < self.min_similarity:
+            return None, best_score
+        return best_id, best_score
+
+    async def lookup(self, question: str) -> CachedAnswer | None:
+        """Return a cached answer for a popular, similar question"""
+        if not self.is_cacheable(question):
+            RESPONSE_CACHE_REQUESTS.labels(result="bypass").inc()
+            return None
+        try:
+            await self._refresh_index()
+            signature = self._signature(normalize_question(question))
+            entry_id, score = self._best_match(signature)
+            if entry_id is None:
+                RESPONSE_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+
+            key = self._entry_key(entry_id)
+            entry = await self.redis.hgetall(key)
+            if not entry:
+                self._index.pop(entry_id, None)
+                RESPONSE_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+
+            hits = await self.redis.hincrby(key, "hits", 1)
+            await self.redis.zadd(self._lru_key, {entry_id: time.time()})
+            version = int(entry.get(b"catalog_version", 0))
+            if (
+                hits < self.popular_threshold
+                or version != product_catalog.snapshot().version
+            ):
+                RESPONSE_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+
+            RESPONSE_CACHE_REQUESTS.labels(result="hit").inc()
+            RESPONSE_CACHE_LLM_SECONDS_AVOIDED.inc(float(entry.get(b"llm_seconds", 0)))
+            return CachedAnswer(answer=entry[b"answer"].decode(), similarity=score)
+        except Exception as e:
+            logger.error(f"Response cache lookup failed: {str(e)}")
+            RESPONSE_CACHE_REQUESTS.labels(result="error").inc()
+            return None
+
+    async def record(self, question: str, answer: str, llm_seconds: float) -> None:
+        """Store or refresh the agent answer for a stateless question
+
+        Callers must not record answers of turns in which the agent called a
+        tool: those may carry the customer's data.
+        """
+        if not answer or not self.is_cacheable(question):
+            return
+        try:
+            normalized = normalize_question(question)
+            signature = self._signature(normalized)
+            entry_id, _ = self._best_match(signature)
+            is_new = entry_id is None
+            if entry_id is None:
+                entry_id = uuid.uuid4().hex
+
+            key = self._entry_key(entry_id)
+            mapping: dict[str | bytes, bytes | float | int | str] = {
+                "answer": answer,
+                "llm_seconds": llm_seconds,
+                "catalog_version": product_catalog.snapshot().version,
+            }
+            if is_new:
+                mapping.update(question=normalized, hits=1)
+            # Asks of an existing entry are counted by lookup()
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                pipe.zadd(self._lru_key, {entry_id: time.time()})
+                await pipe.execute()
+            self._index[entry_id] = signature
+            await self._evict()
+        except Exception as e:
+            logger.error(f"Response cache store failed: {str(e)}")
+
+    async def _evict(self) -> None:
+        excess = await self.redis.zcard(self._lru_key) - self.max_entries
+        if excess <= 0:
+            return
+        evicted = await self.redis.zpopmin(self._lru_key, excess)
+        entry_ids = [entry_id.decode() for entry_id, _ in evicted]
+        await self.redis.delete(*(self._entry_key(e) for e in entry_ids))
+        for entry_id in entry_ids:
+            self._index.pop(entry_id, None)
+
+
+response_cache = ResponseCache(
+    redis_client,
+    prefix=settings.CACHE_PREFIX,
+    ttl=settings.CACHE_TTL,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    popular_threshold=settings.CACHE_POPULAR_THRESHOLD,
+    min_similarity=settings.CACHE_SIMILARITY_THRESHOLD,
+)
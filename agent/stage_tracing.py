@@ -0,0 +1,61 @@
+from collections.abc import Awaitable, Callable
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain.agents.middleware.types import ToolCallRequest
+from langchain_core.messages import ToolMessage
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.types import Command
+
+from shared.tracing import stage
+
+
+class StageTracingMiddleware(AgentMiddleware):
+    """Trace every LLM call and tool call of a turn as pipeline stages"""
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        with stage("llm_call"):
+            return handler(request)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        with stage("llm_call"):
+            return await handler(request)
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        with stage(f"tool:{request.tool_call['name']}"):
+            return handler(request)
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        with stage(f"tool:{request.tool_call['name']}"):
+            return await handler(request)
+
+
+class TracedPostgresSaver(AsyncPostgresSaver):
+    """AsyncPostgresSaver that traces checkpoint loads and saves"""
+
+    async def aget_tuple(self, config):
+        with stage("checkpoint_load"):
+            return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with stage("checkpoint_save"):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with stage("checkpoint_save"):
+            return await super().aput_writes(config, writes, task_id, task_path)
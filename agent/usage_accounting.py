@@ -0,0 +1,331 @@
+"""Token usage and cost accounting for LLM calls.
+
+Usage reported by the DeepSeek API (prompt, completion and cached prompt
+tokens) is counted per model and priced with the ``LLM_PRICE_*`` settings.
+Agent calls are also broken down by prompt component and by the tokens each
+tool output adds to the conversation, and rolled up per conversation thread
+in Redis so the threads that blow up context size can be listed from the
+admin API.
+"""
+
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain.agents.middleware.types import ToolCallRequest
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.config import get_config
+from langgraph.types import Command
+from redis import asyncio as aioredis
+
+from config import settings
+from shared.metrics import (
+    LLM_CALL_PROMPT_TOKENS,
+    LLM_COST,
+    LLM_PROMPT_COMPONENT_TOKENS,
+    LLM_TOKENS,
+    LLM_TOOL_OUTPUT_TOKENS,
+)
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int = 0
+
+    @property
+    def cost(self) -> float:
+        """Estimated price in USD"""
+        uncached = max(self.prompt_tokens - self.cached_tokens, 0)
+        return (
+            self.cached_tokens * settings.LLM_PRICE_INPUT_CACHE_HIT
+            + uncached * settings.LLM_PRICE_INPUT_CACHE_MISS
+            + self.completion_tokens * settings.LLM_PRICE_OUTPUT
+        ) / 1_000_000
+
+
+def prompt_cache_tokens(message: AIMessage) -> tuple[int, int] | None:
+    """(cached, uncached) prompt tokens reported for one model call"""
+    usage = message.usage_metadata
+    if not usage:
+        return None
+    raw = message.response_metadata.get("token_usage") or {}
+    cached = raw.get("prompt_cache_hit_tokens")
+    if cached is None:
+        cached = usage.get("input_token_details", {}).get("cache_read", 0)
+    return cached, max(usage["input_tokens"] - cached, 0)
+
+
+def message_usage(message: BaseMessage, default_model: str) -> TokenUsage | None:
+    """Usage reported for the model call that produced ``message``"""
+    if not isinstance(message, AIMessage):
+        return None
+    tokens = prompt_cache_tokens(message)
+    if tokens is None or message.usage_metadata is None:
+        return None
+    cached, uncached = tokens
+    return TokenUsage(
+        model=message.response_metadata.get("model_name") or default_model,
+        prompt_tokens=cached + uncached,
+        completion_tokens=message.usage_metadata["output_tokens"],
+        cached_tokens=cached,
+    )
+
+
+def api_usage(data: dict[str, Any]) -> TokenUsage | None:
+    """Usage from a raw chat completions response body"""
+    usage = data.get("usage")
+    if not usage:
+        return None
+    return TokenUsage(
+        model=data.get("model", settings.DEEPSEEK_MODEL),
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        cached_tokens=usage.get("prompt_cache_hit_tokens", 0),
+    )
+
+
+def record_usage(usage: TokenUsage) -> None:
+    LLM_TOKENS.labels(model=usage.model, type="prompt").inc(usage.prompt_tokens)
+    LLM_TOKENS.labels(model=usage.model, type="cached").inc(usage.cached_tokens)
+    LLM_TOKENS.labels(model=usage.model, type="completion").inc(
+        usage.completion_tokens
+    )
+    LLM_CALL_PROMPT_TOKENS.labels(model=usage.model).observe(usage.prompt_tokens)
+    LLM_COST.labels(model=usage.model).inc(usage.cost)
+
+
+_tool_schema_tokens: dict[str, int] = {}
+
+
+def _schema_tokens(tool: Any) -> int:
+    name = getattr(tool, "name", None) or str(tool)
+    if name not in _tool_schema_tokens:
+        schema = json.dumps(convert_to_openai_tool(tool))
+        _tool_schema_tokens[name] = round(len(schema) / 4)
+    return _tool_schema_tokens[name]
+
+
+def prompt_components(request: ModelRequest) -> dict[str, int]:
+    """Approximate prompt tokens of a model request by component"""
+    system: list[BaseMessage] = []
+    history: list[BaseMessage] = []
+    tool_outputs: list[BaseMessage] = []
+    if request.system_prompt:
+        system.append(SystemMessage(request.system_prompt))
+    for message in request.messages:
+        if isinstance(message, SystemMessage):
+            system.append(message)
+        elif isinstance(message, ToolMessage):
+            tool_outputs.append(message)
+        else:
+            history.append(message)
+    return {
+        "system": count_tokens_approximately(system),
+        "tools": sum(_schema_tokens(tool) for tool in request.tools),
+        "history": count_tokens_approximately(history),
+        "tool_outputs": count_tokens_approximately(tool_outputs),
+    }
+
+
+def current_thread_id() -> str | None:
+    try:
+        return get_config()["configurable"].get("thread_id")
+    except (RuntimeError, KeyError):
+        return None
+
+
+class UsageLedger:
+    """Per-thread usage rollup in Redis.
+
+    Each thread has a hash of counters; a sorted set ranks threads by total
+    tokens and keeps at most ``max_threads`` of them. Both expire ``ttl``
+    seconds after the thread's last LLM call.
+    """
+
+    def __init__(
+        self, redis: aioredis.Redis, prefix: str, ttl: int, max_threads: int
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_threads = max_threads
+
+    def _thread_key(self, thread_id: str) -> str:
+        return f"{self.prefix}:usage:thread:{thread_id}"
+
+    @property
+    def _ranking_key(self) -> str:
+        return f"{self.prefix}:usage:threads"
+
+    async def record(self, thread_id: str, usage: TokenUsage) -> None:
+        key = self._thread_key(thread_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, "calls", 1)
+                pipe.hincrby(key, "prompt_tokens", usage.prompt_tokens)
+                pipe.hincrby(key, "completion_tokens", usage.completion_tokens)
+                pipe.hincrby(key, "cached_tokens", usage.cached_tokens)
+                pipe.hincrbyfloat(key, "cost_usd", usage.cost)
+                pipe.hset(key, "model", usage.model)
+                pipe.expire(key, self.ttl)
+                total = usage.prompt_tokens + usage.completion_tokens
+                pipe.zincrby(self._ranking_key, total, thread_id)
+                pipe.expire(self._ranking_key, self.ttl)
+                pipe.zremrangebyrank(self._ranking_key, 0, -self.max_threads - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Usage ledger store failed: {str(e)}")
+
+    async def record_tool(self, thread_id: str, tool: str, tokens: int) -> None:
+        key = self._thread_key(thread_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, f"tool:{tool}:calls", 1)
+                pipe.hincrby(key, f"tool:{tool}:output_tokens", tokens)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Usage ledger store failed: {str(e)}")
+
+    async def get(self, thread_id: str) -> dict[str, Any] | None:
+        fields = await self.redis.hgetall(self._thread_key(thread_id))
+        if not fields:
+            return None
+        return self._summary(thread_id, fields)
+
+    async def top(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Threads with the most tokens, largest first"""
+        ranked = await self.redis.zrevrange(self._ranking_key, 0, limit - 1)
+        thread_ids = [thread_id.decode() for thread_id in ranked]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for thread_id in thread_ids:
+                pipe.hgetall(self._thread_key(thread_id))
+            rows = await pipe.execute()
+        return [
+            self._summary(thread_id, fields)
+            for thread_id, fields in zip(thread_ids, rows, strict=True)
+            if fields
+        ]
+
+    @staticmethod
+    def _summary(thread_id: str, fields: dict[bytes, bytes]) -> dict[str, Any]:
+        values = {k.decode(): v.decode() for k, v in fields.items()}
+        calls = int(values.pop("calls", 0))
+        prompt_tokens = int(values.pop("prompt_tokens", 0))
+        summary: dict[str, Any] = {
+            "thread_id": thread_id,
+            "model": values.pop("model", None),
+            "calls": calls,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": int(values.pop("completion_tokens", 0)),
+            "cached_tokens": int(values.pop("cached_tokens", 0)),
+            "avg_prompt_tokens": round(prompt_tokens / calls) if calls else 0,
+            "cost_usd": round(float(values.pop("cost_usd", 0)), 6),
+            "tools": {},
+        }
+        for field, value in values.items():
+            _, tool, counter = field.split(":", 2)
+            summary["tools"].setdefault(tool, {})[counter] = int(value)
+        return summary
+
+
+class UsageAccountingMiddleware(AgentMiddleware):
+    """Count tokens and cost of every model call and tool output of the agent"""
+
+    def __init__(self, ledger: UsageLedger | None = None) -> None:
+        super().__init__()
+        self.ledger = ledger
+
+    @staticmethod
+    def _model_name(request: ModelRequest) -> str:
+        model = request.model
+        return getattr(model, "model_name", None) or settings.DEEPSEEK_MODEL
+
+    def _usages(
+        self, request: ModelRequest, response: ModelResponse
+    ) -> list[TokenUsage]:
+        default_model = self._model_name(request)
+        usages = [message_usage(m, default_model) for m in response.result]
+        for usage in usages:
+            if usage is not None:
+                record_usage(usage)
+        return [usage for usage in usages if usage is not None]
+
+    @staticmethod
+    def _observe_components(request: ModelRequest) -> None:
+        for component, tokens in prompt_components(request).items():
+            LLM_PROMPT_COMPONENT_TOKENS.labels(component=component).observe(tokens)
+
+    @staticmethod
+    def _tool_output_tokens(
+        request: ToolCallRequest, result: ToolMessage | Command
+    ) -> int | None:
+        if not isinstance(result, ToolMessage):
+            return None
+        tokens = count_tokens_approximately([result])
+        LLM_TOOL_OUTPUT_TOKENS.labels(tool=request.tool_call["name"]).observe(tokens)
+        return tokens
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        self._observe_components(request)
+        response = handler(request)
+        self._usages(request, response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        self._observe_components(request)
+        response = await handler(request)
+        usages = self._usages(request, response)
+        thread_id = current_thread_id()
+        if self.ledger is not None and thread_id:
+            for usage in usages:
+                await self.ledger.record(thread_id, usage)
+        return response
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        result = handler(request)
+        self._tool_output_tokens(request, result)
+        return result
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        result = await handler(request)
+        tokens = self._tool_output_tokens(request, result)
+        thread_id = current_thread_id()
+        if self.ledger is not None and thread_id and tokens is not None:
+            await self.ledger.record_tool(thread_id, request.tool_call["name"], tokens)
+        return result
+
+
+usage_ledger = UsageLedger(
+    redis_client,
+    prefix=settings.CACHE_PREFIX,
+    ttl=settings.USAGE_TTL,
+    max_threads=settings.USAGE_MAX_THREADS,
+)
@@ -0,0 +1,111 @@
+"""Concurrency benchmark for the agent invocation path.
+
+Runs the real ``DeepSeekLCService`` agent graph against a stubbed chat model
+that waits ``--latency`` seconds per call (standing in for the DeepSeek round
+trip) and an in-memory checkpointer, then drives N concurrent sessions.
+
+``blocking`` reproduces the previous behaviour (sync ``invoke`` called from the
+event loop); ``async`` uses ``chat_completion`` (``ainvoke``). With a blocking
+call the loop serializes every turn, so throughput stays flat as sessions
+grow; with the async path it scales with concurrency.
+
+Usage:
+    python -m benchmarks.bench_agent_concurrency [--latency 0.2] [--sessions 1 10 50 100]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from langchain_core.callbacks import (  # noqa: E402
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+from agent.deepseek_langchain_service import DeepSeekLCService  # noqa: E402
+from agent.deepseek_models import DeepSeekMessage  # noqa: E402
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that answers after a fixed delay without calling tools."""
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        return self
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("ok"))])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+async def blocking_turn(service: DeepSeekLCService, phone: str) -> None:
+    service.llm.invoke(
+        {"messages": [{"role": "user", "content": f"<{phone}>oi"}]},
+        {"configurable": {"thread_id": phone}},
+    )
+
+
+async def async_turn(service: DeepSeekLCService, phone: str) -> None:
+    await service.chat_completion(
+        [DeepSeekMessage(role="user", content="oi")], phone, phone
+    )
+
+
+async def run(mode: str, service: DeepSeekLCService, sessions: int) -> float:
+    turn = blocking_turn if mode == "blocking" else async_turn
+    start = time.perf_counter()
+    await asyncio.gather(*(turn(service, f"55119{i:08d}") for i in range(sessions)))
+    return sessions / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+
+    service = DeepSeekLCService(
+        chat_model=StubChatModel(latency=args.latency), saver=InMemorySaver()
+    )
+    print(f"stub model latency: {args.latency * 1e3:.0f} ms")
+    print(f"{'sessions':>10}{'blocking turns/s':>20}{'async turns/s':>18}")
+    for sessions in args.sessions:
+        blocking = await run("blocking", service, sessions)
+        concurrent = await run("async", service, sessions)
+        print(f"{sessions:>10}{blocking:>20.1f}{concurrent:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""Bytes per checkpoint and (de)serialization time of checkpoint serializers.
+
+Builds realistic conversation threads (customer messages, tool calls with
+search_products/load_products outputs from the real catalog, salesman
+replies) and serializes the ``messages`` channel, which is the blob the
+Postgres checkpointer writes on every step, with:
+
+* pickle (what the old comment in deepseek_langchain_service.py warned of);
+* msgpack (LangGraph JsonPlusSerializer, uncompressed);
+* CompressedSerializer with zlib (and zstd when zstandard is installed).
+
+Usage:
+    python -m benchmarks.bench_checkpoint_serde [--turns 5 20 50] [--runs 50]
+"""
+
+import argparse
+import json
+import pickle
+import statistics
+import time
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agent.checkpoint_serializer import CompressedSerializer
+from sales.product_catalog import ProductCatalog
+
+QUESTIONS = ["arroz", "feijão", "leite", "café", "açúcar", "óleo", "sabão"]
+
+
+class PickleSerializer:
+    def dumps_typed(self, obj):
+        return "pickle", pickle.dumps(obj)
+
+    def loads_typed(self, data):
+        return pickle.loads(data[1])
+
+
+def conversation(turns: int, catalog_path: str) -> list[BaseMessage]:
+    snapshot = ProductCatalog(catalog_path).snapshot()
+    messages: list[BaseMessage] = []
+    for turn in range(turns):
+        query = QUESTIONS[turn % len(QUESTIONS)]
+        messages.append(HumanMessage(f"<5511999999999>vocês têm {query}?"))
+        call_id = f"call_{turn}"
+        if turn % 5 == 0:
+            name, output = "load_products", str(snapshot.products)
+        else:
+            index = snapshot.index
+            name = "search_products"
+            records = index.records(index.search(query, limit=10))
+            output = json.dumps(records, ensure_ascii=False)
+        messages.append(
+            AIMessage(
+                "",
+                tool_calls=[{"name": name, "args": {"query": query}, "id": call_id}],
+            )
+        )
+        messages.append(ToolMessage(output, tool_call_id=call_id, name=name))
+        messages.append(
+            AIMessage(
+                f"Temos sim! Seguem as opções de {query} com preços e unidades. "
+                "Posso separar algum item para o seu pedido? Lembrando que "
+                "entregamos em toda a região e aceitamos pix e cartão."
+            )
+        )
+    return messages
+
+
+def measure(serde, value, runs: int) -> tuple[int, float, float]:
+    dumps, loads = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        typed = serde.dumps_typed(value)
+        dumps.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        serde.loads_typed(typed)
+        loads.append(time.perf_counter() - start)
+    return len(typed[1]), statistics.median(dumps), statistics.median(loads)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--catalog", default="produtos.xlsx")
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    serializers = {
+        "pickle": PickleSerializer(),
+        "msgpack": JsonPlusSerializer(pickle_fallback=False),
+        "msgpack+zlib-1": CompressedSerializer(codec="zlib", level=1),
+        "msgpack+zlib-3": CompressedSerializer(codec="zlib", level=3),
+        "msgpack+zlib-6": CompressedSerializer(codec="zlib", level=6),
+    }
+    try:
+        import zstandard  # noqa: F401
+
+        serializers["msgpack+zstd-3"] = CompressedSerializer(codec="zstd", level=3)
+    except ImportError:
+        print("zstandard not installed; skipping zstd")
+
+    print(
+        f"{'turns':>6} {'serializer':<16}{'bytes':>10}"
+        f"{'dumps ms':>10}{'loads ms':>10}"
+    )
+    for turns in args.turns:
+        messages = conversation(turns, args.catalog)
+        for name, serde in serializers.items():
+            size, dumps, loads = measure(serde, messages, args.runs)
+            print(
+                f"{turns:>6} {name:<16}{size:>10}"
+                f"{dumps * 1e3:>10.3f}{loads * 1e3:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
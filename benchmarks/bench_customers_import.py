@@ -0,0 +1,87 @@
+"""Throughput of the bulk customer import against row-by-row inserts.
+
+Generates a CSV customer list and loads it into a throwaway SQLite database:
+
+* row-by-row: one ``create_customer`` (INSERT + commit) per customer, the
+  path ``set_customer_contact`` used before upserts;
+* bulk import: ``sales.customer_import`` with batched executemany upserts,
+  first into the empty table and then again over the same phones (every
+  row hits ON CONFLICT DO UPDATE).
+
+Usage:
+    python -m benchmarks.bench_customers_import [--rows 20000] [--batch-size 1000]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_import.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from sqlalchemy import delete  # noqa: E402
+
+from infrastructure.database.database import SessionLocal, engine  # noqa: E402
+from sales.customer_import import import_customers  # noqa: E402
+from sales.customer_model import Base, Customer  # noqa: E402
+from sales.customer_schema import CustomerCreate  # noqa: E402
+from sales.customers_service import CustomerService  # noqa: E402
+
+
+def make_csv(rows: int) -> bytes:
+    lines = ["nome;telefone;email;endereco"]
+    lines += [
+        f"Cliente {i};(11) 9{i:08d};cliente{i}@example.com;Rua {i}, São Paulo"
+        for i in range(rows)
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def row_by_row(rows: int) -> float:
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        service = CustomerService(db)
+        for i in range(rows):
+            service.create_customer(
+                CustomerCreate(
+                    name=f"Cliente {i}",
+                    cellphone=f"119{i:08d}",
+                    email=f"cliente{i}@example.com",
+                    address=f"Rua {i}, São Paulo",
+                )
+            )
+    return time.perf_counter() - start
+
+
+def truncate() -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(Customer))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    data = make_csv(args.rows)
+
+    results = [("row-by-row insert + commit", row_by_row(args.rows))]
+    truncate()
+    first = import_customers(io.BytesIO(data), "csv", args.batch_size)
+    results.append(("bulk import (new rows)", first.seconds))
+    again = import_customers(io.BytesIO(data), "csv", args.batch_size)
+    results.append(("bulk import (all conflicts)", again.seconds))
+
+    print(f"{args.rows} customers, batch size {args.batch_size}")
+    print(f"{'path':<30}{'seconds':>10}{'rows/s':>12}")
+    for name, seconds in results:
+        print(f"{name:<30}{seconds:>10.2f}{args.rows / seconds:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Concurrent load on /customers and the customer agent tools.
+
+Seeds a throwaway SQLite database, then compares:
+
+* ``/customers``: the legacy handler (one shared ``Session`` queried on the
+  event loop) against the current endpoint (async pooled session per
+  request), both driven through the ASGI app with ``--concurrency`` clients.
+* agent tools: customer lookups run from worker threads, as LangGraph runs
+  sync tools, against one shared session (legacy) and session-per-operation
+  (current). The customer cache is bypassed so every call hits the database.
+
+aiosqlite funnels every connection through its own thread, so SQLite numbers
+understate the async path; set ``BENCH_DATABASE_URL`` to an empty Postgres
+database to measure the deployment setup.
+
+Usage:
+    python -m benchmarks.bench_customers_load [--rows 10000] [--requests 500]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_customers.db")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite:///{DB_PATH}"
+)
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from infrastructure.database.async_database import async_engine  # noqa: E402
+from infrastructure.database.database import SessionLocal, engine  # noqa: E402
+from main import app  # noqa: E402
+from sales.customer_management import CustomerManager  # noqa: E402
+from sales.customer_model import Customer  # noqa: E402
+from sales.customers_service import CustomerService  # noqa: E402
+
+
+def seed(rows: int) -> None:
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Customer),
+            [
+                {
+                    "name": f"Cliente {i}",
+                    "cellphone": f"55119{i:08d}",
+                    "create_at": today,
+                    "update_at": today,
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+def legacy_app() -> FastAPI:
+    legacy = FastAPI()
+    shared = SessionLocal()
+
+    @legacy.get("/customers")
+    async def read_customers(skip: int = 0, limit: int = 100):
+        rows = shared.query(Customer).offset(skip).limit(limit).all()
+        return [{"id": c.id, "name": c.name, "cellphone": c.cellphone} for c in rows]
+
+    return legacy
+
+
+async def drive(asgi: FastAPI, requests: int, concurrency: int, rows: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=asgi)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await c.get(f"/customers?skip={(i * 100) % rows}&limit=100")
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+async def tool_lookups(lookup, requests: int, concurrency: int, rows: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(lookup, f"55119{(i * 7919) % rows:08d}")
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(ordered) * 1e3,
+        "p95": ordered[int(len(ordered) * 0.95) - 1] * 1e3,
+        "errors": errors,
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(
+        f"{name:<36}{result['rps']:>9.1f}{result['p50']:>10.1f}"
+        f"{result['p95']:>10.1f}{result['errors']:>8}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.rows} customers, {args.requests} requests, x{args.concurrency}")
+    print(f"{'path':<36}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    report(
+        "/customers legacy shared session",
+        await drive(legacy_app(), args.requests, args.concurrency, args.rows),
+    )
+    report(
+        "/customers async pooled session",
+        await drive(app, args.requests, args.concurrency, args.rows),
+    )
+
+    shared = SessionLocal()
+    report(
+        "tool lookup legacy shared session",
+        await tool_lookups(
+            CustomerService(shared).get_customer,
+            args.requests,
+            args.concurrency,
+            args.rows,
+        ),
+    )
+    report(
+        "tool lookup session per operation",
+        await tool_lookups(
+            CustomerManager().get_customer, args.requests, args.concurrency, args.rows
+        ),
+    )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""OFFSET vs keyset pages and full vs streamed export of the customers table.
+
+For each table size a throwaway SQLite database is seeded, then:
+
+* page: the legacy ``OFFSET/LIMIT`` query materialized as ORM objects and
+  ``Customer`` response models, against a keyset page on ``id`` returning
+  plain rows, both fetching the last page of the table;
+* export: loading every customer into response models and serializing them
+  (the only option before), against the NDJSON stream from a server-side
+  cursor. Peak Python memory is measured with tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_customers_pagination [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from sales.customer_model import Base, Customer  # noqa: E402
+from sales.customer_schema import Customer as CustomerSchema  # noqa: E402
+from sales.customers_service import (  # noqa: E402
+    AsyncCustomerService,
+    CustomerService,
+)
+
+PAGE = 100
+
+
+def seed(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO customers (name, cellphone, email, create_at)"
+            " VALUES (?, ?, ?, '2024-01-01')",
+            (
+                (f"Cliente {i}", f"55119{i:08d}", f"cliente{i}@example.com")
+                for i in range(rows)
+            ),
+        )
+
+
+def timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def offset_page(db: Session, skip: int) -> list[dict]:
+    rows = db.query(Customer).offset(skip).limit(PAGE).all()
+    return [CustomerSchema.model_validate(c).model_dump(mode="json") for c in rows]
+
+
+def full_export(db: Session) -> int:
+    size = 0
+    for c in db.query(Customer).all():
+        size += len(CustomerSchema.model_validate(c).model_dump_json()) + 1
+    return size
+
+
+async def streamed_export(url: str) -> int:
+    engine = create_async_engine(url)
+    size = 0
+    async with AsyncSession(engine) as db:
+        async for chunk in AsyncCustomerService(db).export_customers():
+            size += len(chunk)
+    await engine.dispose()
+    return size
+
+
+def measure(fn) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def bench_size(rows: int, runs: int, materialize_max: int) -> tuple[float, ...]:
+    """offset ms, keyset ms, full s, full MiB, stream s, stream MiB"""
+    path = os.path.join(tempfile.mkdtemp(), "customers.db")
+    seed(path, rows)
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as db:
+        service = CustomerService(db)
+        offset_ms = timed(lambda: offset_page(db, rows - PAGE), runs)
+        keyset_ms = timed(
+            lambda: service.get_customers(limit=PAGE, after_id=rows - PAGE),
+            runs,
+        )
+        if rows <= materialize_max:
+            full_s, full_mib = measure(lambda: full_export(db))
+        else:
+            full_s = full_mib = float("nan")
+    engine.dispose()
+
+    stream_s, stream_mib = measure(
+        lambda: asyncio.run(streamed_export(f"sqlite+aiosqlite:///{path}"))
+    )
+    os.remove(path)
+    return offset_ms, keyset_ms, full_s, full_mib, stream_s, stream_mib
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--materialize-max",
+        type=int,
+        default=1_000_000,
+        help="skip the full-materialization export above this many rows",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>9}{'offset ms':>11}{'keyset ms':>11}"
+        f"{'full s':>9}{'full MiB':>10}{'stream s':>10}{'stream MiB':>12}"
+    )
+    for rows in args.sizes:
+        offset_ms, keyset_ms, full_s, full_mib, stream_s, stream_mib = bench_size(
+            rows, args.runs, args.materialize_max
+        )
+        print(
+            f"{rows:>9}{offset_ms:>11.2f}{keyset_ms:>11.2f}"
+            f"{full_s:>9.2f}{full_mib:>10.1f}{stream_s:>10.2f}{stream_mib:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Per-call overhead of the ``instrument`` metrics decorator.
+
+Times a trivial sync and async function called bare, wrapped by the previous
+decorator (``.labels(function=...)`` resolved on every call) and by the
+current one (label children bound once at decoration time). Run with
+``--multiprocess`` to measure the memory-mapped multiprocess storage used
+when ``PROMETHEUS_MULTIPROC_DIR`` is set.
+
+Usage:
+    python -m benchmarks.bench_instrument_overhead [--calls 200000] [--multiprocess]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from functools import wraps
+
+
+def per_call_labels(func, calls_counter, duration_histogram):
+    """The decorator as it was before label children were pre-bound"""
+    if asyncio.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            calls_counter.labels(function=func.__name__).inc()
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                duration_histogram.labels(function=func.__name__).observe(elapsed)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        calls_counter.labels(function=func.__name__).inc()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            duration_histogram.labels(function=func.__name__).observe(elapsed)
+
+    return wrapper
+
+
+def time_sync(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(1)
+    return (time.perf_counter() - start) / calls
+
+
+def time_async(func, calls: int) -> float:
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await func(1)
+        return (time.perf_counter() - start) / calls
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--multiprocess", action="store_true")
+    args = parser.parse_args()
+
+    if args.multiprocess:
+        # Must be set before prometheus_client is first imported
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prom-")
+    from shared.metrics import CALL_COUNTER, DURATION_HISTOGRAM, instrument
+
+    def sync_target(x):
+        return x + 1
+
+    async def async_target(x):
+        return x + 1
+
+    variants = {
+        "bare": (sync_target, async_target),
+        "labels per call": (
+            per_call_labels(sync_target, CALL_COUNTER, DURATION_HISTOGRAM),
+            per_call_labels(async_target, CALL_COUNTER, DURATION_HISTOGRAM),
+        ),
+        "pre-bound": (instrument(sync_target), instrument(async_target)),
+    }
+
+    mode = "multiprocess" if args.multiprocess else "single process"
+    print(f"{args.calls} calls x {args.runs} runs, {mode} storage")
+    print(f"{'decorator':<18}{'sync ns/call':>14}{'async ns/call':>15}")
+    for name, (sync_func, async_func) in variants.items():
+        sync_ns = statistics.median(
+            time_sync(sync_func, args.calls) for _ in range(args.runs)
+        )
+        async_ns = statistics.median(
+            time_async(async_func, args.calls) for _ in range(args.runs)
+        )
+        print(f"{name:<18}{sync_ns * 1e9:>14.0f}{async_ns * 1e9:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
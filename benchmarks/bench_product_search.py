@@ -0,0 +1,111 @@
+"""Compare the load_products and search_products tool paths.
+
+Reports the tool payload that ends up in the LLM context (characters and
+tokens) and the per-turn tool latency, plus a modeled turn latency that adds
+prompt prefill time at ``--prefill-tps`` tokens/second.
+
+Usage:
+    python -m benchmarks.bench_product_search [--runs 50] [--prefill-tps 2000]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any, TypeVar
+
+import pandas as pd
+
+from sales.product_catalog import ProductCatalog
+
+QUERIES = [
+    "arroz",
+    "feijão preto",
+    "quero abacaxi",
+    "leite condensado",
+    "fejao carioca",
+    "cafe 500g",
+    "sabão em pó",
+    "limões",
+]
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+T = TypeVar("T")
+
+
+def timed(fn: Callable[[], T], runs: int) -> tuple[float, T]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--catalog", default="produtos.xlsx")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--prefill-tps", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    # Baseline: the original tool re-parsed the spreadsheet on every call and
+    # the DataFrame was stringified into the tool message.
+    load_s, df = timed(lambda: pd.read_excel(args.catalog), max(1, args.runs // 10))
+    # LangChain falls back to str() for a DataFrame tool result, which pandas
+    # truncates to head/tail rows; the full listing is what the model would
+    # need to actually answer from the whole catalog.
+    load_payload = str(df)
+    load_tokens = count_tokens(load_payload)
+    full_payload = df.to_string(index=False)
+    full_tokens = count_tokens(full_payload)
+
+    catalog = ProductCatalog(args.catalog)
+    index = catalog.snapshot().index
+
+    def search(query: str) -> list[dict[str, Any]]:
+        return index.records(index.search(query, limit=args.limit))
+
+    rows = []
+    for query in QUERIES:
+        search_s, records = timed(partial(search, query), args.runs)
+        payload = json.dumps(records, ensure_ascii=False)
+        rows.append((query, search_s, len(payload), count_tokens(payload)))
+
+    print(f"catalog rows: {len(df)}")
+    print(
+        f"{'path':<28}{'tool ms':>10}{'chars':>10}{'tokens':>10}{'turn ms*':>12}"
+    )
+    load_turn = load_s + load_tokens / args.prefill_tps
+    print(
+        f"{'load_products (read_excel)':<28}{load_s * 1e3:>10.2f}"
+        f"{len(load_payload):>10}{load_tokens:>10}{load_turn * 1e3:>12.1f}"
+    )
+    full_turn = load_s + full_tokens / args.prefill_tps
+    print(
+        f"{'full catalog (to_string)':<28}{load_s * 1e3:>10.2f}"
+        f"{len(full_payload):>10}{full_tokens:>10}{full_turn * 1e3:>12.1f}"
+    )
+    for query, search_s, chars, tokens in rows:
+        turn = search_s + tokens / args.prefill_tps
+        print(
+            f"{'search: ' + query:<28}{search_s * 1e3:>10.3f}"
+            f"{chars:>10}{tokens:>10}{turn * 1e3:>12.1f}"
+        )
+    print(f"* tool time + prompt prefill at {args.prefill_tps:.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Per-webhook ingress cost: Pydantic path vs the orjson fast path.
+
+For a realistic Evolution API ``messages.upsert`` text event and for events
+without text (delivery receipt, media message), times:
+
+* ``pydantic``: ``json.loads`` (what FastAPI does for a model body), a
+  ``WebhookPayload`` and ``MessageService.extract_message_data``, the
+  previous ``/webhook`` path;
+* ``fast``: ``messaging/webhook_ingress.py`` (byte screen, orjson, compact
+  record).
+
+It also times encoding and decoding a turn-queue job with json vs orjson.
+
+Usage:
+    python -m benchmarks.bench_webhook_ingress [--runs 20000]
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import orjson
+
+from messaging.message_service import MessageService
+from messaging.webhook_ingress import (
+    extract_text_messages,
+    may_contain_text,
+    parse_webhook,
+)
+from models import WebhookPayload
+
+
+def evolution_event(event: str, data: dict) -> bytes:
+    return json.dumps(
+        {
+            "event": event,
+            "instance": "mcp",
+            "data": data,
+            "destination": "http://localhost:8000/webhook",
+            "date_time": "2025-11-21T10:15:02.123Z",
+            "sender": "5511988887777@s.whatsapp.net",
+            "server_url": "http://localhost:8080",
+            "apikey": "B6D711FCDE4D4FD5936544120E713976",
+        }
+    ).encode()
+
+
+KEY = {
+    "remoteJid": "5511999999999@s.whatsapp.net",
+    "fromMe": False,
+    "id": "3EB0C767D26A1D8E4E2F",
+}
+PAYLOADS = {
+    "text": evolution_event(
+        "messages.upsert",
+        {
+            "key": KEY,
+            "pushName": "Maria",
+            "status": "DELIVERY_ACK",
+            "message": {
+                "conversation": "Bom dia! Vocês têm arroz tipo 1 de 5kg?",
+                "messageContextInfo": {
+                    "deviceListMetadata": {
+                        "senderKeyHash": "k1VZ2Ql3Xh0pdg==",
+                        "senderTimestamp": "1732180000",
+                        "recipientKeyHash": "Xr0rq0nDSN1RNQ==",
+                        "recipientTimestamp": "1732170000",
+                    },
+                    "deviceListMetadataVersion": 2,
+                },
+            },
+            "messageType": "conversation",
+            "messageTimestamp": 1732184102,
+            "instanceId": "0b1c7a4e-6f0e-4f62-9d6a-3c1b2a1e9f00",
+            "source": "android",
+        },
+    ),
+    "receipt": evolution_event(
+        "messages.update",
+        {
+            "keyId": "3EB0C767D26A1D8E4E2F",
+            "remoteJid": "5511999999999@s.whatsapp.net",
+            "fromMe": True,
+            "participant": None,
+            "status": "READ",
+            "instanceId": "0b1c7a4e-6f0e-4f62-9d6a-3c1b2a1e9f00",
+        },
+    ),
+    "media": evolution_event(
+        "messages.upsert",
+        {
+            "key": KEY,
+            "pushName": "Maria",
+            "message": {
+                "imageMessage": {
+                    "url": "https://mmg.whatsapp.net/o1/v/t62.7118-24/f1/m232/x",
+                    "mimetype": "image/jpeg",
+                    "fileLength": "123456",
+                    "height": 1280,
+                    "width": 960,
+                    "jpegThumbnail": "A" * 4000,
+                }
+            },
+            "messageType": "imageMessage",
+            "messageTimestamp": 1732184102,
+        },
+    ),
+}
+
+
+def pydantic_path(body: bytes) -> list[dict]:
+    payload = WebhookPayload(**json.loads(body))
+    data = MessageService.extract_message_data(payload.data)
+    return [data] if data.get("text") else []
+
+
+def fast_path(body: bytes) -> list[dict]:
+    if not may_contain_text(body):
+        return []
+    return extract_text_messages(parse_webhook(body)["data"])
+
+
+def per_call_us(func, arg, runs: int) -> float:
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(runs):
+            func(arg)
+        samples.append((time.perf_counter() - start) / runs)
+    return statistics.median(samples) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, body in PAYLOADS.items():
+        assert pydantic_path(body) == fast_path(body), name
+
+    print(f"{'event':<10}{'bytes':>7}{'pydantic us':>13}{'fast us':>10}{'speedup':>9}")
+    for name, body in PAYLOADS.items():
+        slow = per_call_us(pydantic_path, body, args.runs)
+        fast = per_call_us(fast_path, body, args.runs)
+        print(f"{name:<10}{len(body):>7}{slow:>13.2f}{fast:>10.2f}{slow / fast:>8.1f}x")
+
+    job = {
+        "phone_number": "5511999999999",
+        "texts": ["Bom dia! Vocês têm arroz tipo 1 de 5kg?"],
+        "enqueued_at": time.time(),
+        "trace": {
+            "trace_id": "9f86d081884c7d659a2feaa0c55ad015",
+            "message_ids": ["3EB0C767D26A1D8E4E2F"],
+            "received_at": time.time(),
+        },
+    }
+    encoded = json.dumps(job)
+    print(f"\n{'turn job':<10}{'':>7}{'json us':>13}{'orjson us':>10}{'speedup':>9}")
+    for label, slow_func, fast_func, arg in (
+        ("encode", json.dumps, orjson.dumps, job),
+        ("decode", json.loads, orjson.loads, encoded),
+    ):
+        slow = per_call_us(slow_func, arg, args.runs)
+        fast = per_call_us(fast_func, arg, args.runs)
+        print(f"{label:<10}{'':>7}{slow:>13.2f}{fast:>10.2f}{slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Load test of the whole webhook-to-reply pipeline.
+
+Starts the stand-in chat completions and Evolution API servers from
+``benchmarks/fake_servers.py``, runs ``main.app`` and the async turn worker
+in-process against them, then posts Evolution-style webhooks to ``/webhook``
+at a fixed rate (open loop: the next message is sent on schedule whether or
+not earlier ones were answered). A reply is the first outbound message the
+fake Evolution API receives for the phone; its latency is measured from the
+webhook post.
+
+Redis must be reachable at ``REDIS_URL`` (deduplication and the turn queue).
+The agent uses an in-memory checkpointer unless ``--checkpointer postgres``.
+Other settings come from the environment as usual, e.g.
+``OUTBOUND_RATE_PER_SECOND``, ``BURST_WINDOW_SECONDS``, ``STREAM_REPLIES`` or
+``WORKER_CONCURRENCY``. The response cache is off unless ``CACHE_ENABLED`` is
+set. With ``--target`` an already running app is driven instead; start it
+with ``DEEPSEEK_BASE_URL`` and ``EVOLUTION_API_BASE_URL`` pointing at the
+fake servers (printed on start-up).
+
+Usage:
+    python -m benchmarks.bench_webhook_load [--rate 20] [--duration 30]
+        [--llm-latency 0.5] [--tokens-per-second 50] [--tool-call search_products]
+    python -m benchmarks.bench_webhook_load --target http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import httpx
+
+from benchmarks.fake_servers import (
+    ChatScript,
+    SendRecorder,
+    SentMessage,
+    fake_chat_app,
+    fake_evolution_app,
+    serve,
+)
+
+# Sent by tasks/conversation.py when a turn fails
+ERROR_REPLY_PREFIX = "erro ao acessar o"
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class ReplyTracker:
+    """Match outbound messages to the webhooks they answer, per phone"""
+
+    def __init__(self) -> None:
+        self.pending: dict[str, deque[float]] = {}
+        self.latencies: list[float] = []
+        self.error_replies = 0
+        self.extra_messages = 0
+        self.first_post: float | None = None
+        self.last_reply: float | None = None
+
+    def posted(self, phone: str, at: float) -> None:
+        self.pending.setdefault(phone, deque()).append(at)
+        if self.first_post is None:
+            self.first_post = at
+
+    def failed(self, phone: str) -> None:
+        self.pending[phone].pop()
+
+    def on_send(self, message: SentMessage) -> None:
+        queue = self.pending.get(message.number)
+        if not queue:
+            self.extra_messages += 1  # later chunks of a streamed reply
+            return
+        self.latencies.append(message.at - queue.popleft())
+        self.last_reply = message.at
+        if message.text.startswith(ERROR_REPLY_PREFIX):
+            self.error_replies += 1
+
+    @property
+    def outstanding(self) -> int:
+        return sum(len(queue) for queue in self.pending.values())
+
+
+def webhook_payload(phone: str, text: str, instance: str) -> dict:
+    return {
+        "event": "messages.upsert",
+        "instance": instance,
+        "data": {
+            "key": {
+                "remoteJid": f"{phone}@s.whatsapp.net",
+                "fromMe": False,
+                "id": uuid.uuid4().hex.upper(),
+            },
+            "message": {"conversation": text},
+            "messageTimestamp": int(time.time()),
+        },
+    }
+
+
+async def post_webhook(
+    client: httpx.AsyncClient, tracker: ReplyTracker, phone: str, text: str
+) -> tuple[float, bool]:
+    start = time.perf_counter()
+    tracker.posted(phone, start)
+    try:
+        response = await client.post(
+            "/webhook", json=webhook_payload(phone, text, "mcp")
+        )
+        ok = response.status_code == 200 and (
+            response.json().get("status") == "received"
+        )
+    except httpx.HTTPError:
+        ok = False
+    if not ok:
+        tracker.failed(phone)
+    return time.perf_counter() - start, ok
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    tracker: ReplyTracker,
+    rate: float,
+    total: int,
+    phones: int,
+) -> list[tuple[float, bool]]:
+    start = time.perf_counter()
+    tasks = []
+    for i in range(total):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        phone = f"55119{i % phones:08d}"
+        text = f"vocês têm arroz? ({i})"
+        tasks.append(asyncio.create_task(post_webhook(client, tracker, phone, text)))
+    return await asyncio.gather(*tasks)
+
+
+@asynccontextmanager
+async def app_under_test(port: int, checkpointer: str):
+    """Serve main.app and run the async turn worker on this loop"""
+    import main
+    from agent import deepseek_langchain_service
+    from config import settings
+    from shared.redis_client import redis_client
+    from tasks.async_worker import AsyncTurnWorker, turn_queue
+    from tasks.conversation import process_conversation_turn
+
+    try:
+        await redis_client.ping()
+    except Exception as e:
+        sys.exit(f"Redis is required at {settings.REDIS_URL}: {e}")
+
+    if checkpointer == "memory":
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        saver = InMemorySaver()
+        # open() keeps an agent that is already built, so Postgres is skipped
+        for service in (
+            deepseek_langchain_service.deepseek_lc_service,
+            main.deepseek_lc_service,
+        ):
+            service.checkpointer = saver
+            service.llm = service._build_agent(saver)
+
+    worker = AsyncTurnWorker(
+        turn_queue, process_conversation_turn, settings.WORKER_CONCURRENCY
+    )
+    async with serve(main.app, port):
+        worker_task = asyncio.create_task(worker.run())
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            worker.stop()
+            await worker_task
+
+
+def report(
+    args: argparse.Namespace,
+    acks: list[tuple[float, bool]],
+    tracker: ReplyTracker,
+    recorder: SendRecorder,
+    llm_calls: int,
+) -> None:
+    posted = len(acks)
+    failed = sum(1 for _, ok in acks if not ok)
+    accepted = posted - failed
+    replies = len(tracker.latencies)
+    ack_ms = [latency * 1e3 for latency, _ in acks]
+    elapsed = (tracker.last_reply or time.perf_counter()) - (
+        tracker.first_post or time.perf_counter()
+    )
+    phones = args.phones or posted
+    print(f"posted {posted} webhooks at {args.rate:g}/s to {phones} phones")
+    print(
+        f"webhook errors  {failed} ({failed / max(posted, 1):.1%})   "
+        f"ack p50 {percentile(ack_ms, 50):.1f} ms  p99 {percentile(ack_ms, 99):.1f} ms"
+    )
+    print(
+        f"replies         {replies}/{accepted}   missing {tracker.outstanding}   "
+        f"error replies {tracker.error_replies} "
+        f"({tracker.error_replies / max(replies, 1):.1%})"
+    )
+    print(
+        "reply latency   "
+        + "  ".join(
+            f"p{p} {percentile(tracker.latencies, p):.2f}s" for p in (50, 95, 99)
+        )
+        + f"  max {max(tracker.latencies, default=math.nan):.2f}s"
+    )
+    print(
+        f"throughput      {replies / elapsed if elapsed > 0 else 0:.1f} replies/s   "
+        f"{len(recorder.sent)} outbound messages   {llm_calls} LLM calls"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    tracker = ReplyTracker()
+    recorder = SendRecorder(on_send=tracker.on_send)
+    chat = fake_chat_app(
+        ChatScript(
+            latency=args.llm_latency,
+            tokens_per_second=args.tokens_per_second,
+            reply_tokens=args.reply_tokens,
+            cache_hit_ratio=args.cache_hit_ratio,
+            tool_calls=args.tool_call,
+        )
+    )
+    async with AsyncExitStack() as stack:
+        await stack.enter_async_context(serve(chat, args.chat_port))
+        await stack.enter_async_context(
+            serve(
+                fake_evolution_app(recorder, args.evolution_latency),
+                args.evolution_port,
+            )
+        )
+        target = args.target or await stack.enter_async_context(
+            app_under_test(args.app_port, args.checkpointer)
+        )
+        total = int(args.rate * args.duration)
+        async with httpx.AsyncClient(
+            base_url=target,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=args.connections),
+        ) as client:
+            acks = await drive(
+                client, tracker, args.rate, total, args.phones or total
+            )
+            deadline = time.perf_counter() + args.drain
+            while tracker.outstanding and time.perf_counter() < deadline:
+                await asyncio.sleep(0.1)
+        report(args, acks, tracker, recorder, chat.state.calls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rate", type=float, default=20.0, help="webhooks/s")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument(
+        "--phones", type=int, default=0, help="distinct phones (0: one per message)"
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.8)
+    parser.add_argument(
+        "--tool-call",
+        action="append",
+        default=[],
+        help='tool called per turn before replying, e.g. search_products or '
+        'search_products={"query": "arroz"} (repeatable)',
+    )
+    parser.add_argument("--evolution-latency", type=float, default=0.05)
+    parser.add_argument("--drain", type=float, default=60.0)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--target", help="drive an already running app")
+    parser.add_argument("--app-port", type=int, default=18000)
+    parser.add_argument("--chat-port", type=int, default=18001)
+    parser.add_argument("--evolution-port", type=int, default=18002)
+    parser.add_argument(
+        "--checkpointer", choices=["memory", "postgres"], default="memory"
+    )
+    args = parser.parse_args()
+
+    # Settings are read at import time, so point them at the fakes first
+    os.environ["DEEPSEEK_BASE_URL"] = f"http://127.0.0.1:{args.chat_port}/v1"
+    os.environ["EVOLUTION_API_BASE_URL"] = f"http://127.0.0.1:{args.evolution_port}"
+    os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+    os.environ.setdefault("CACHE_ENABLED", "false")
+    os.environ["TASK_QUEUE_BACKEND"] = "async"
+    if args.target:
+        print(
+            f"Start the app with DEEPSEEK_BASE_URL={os.environ['DEEPSEEK_BASE_URL']} "
+            f"EVOLUTION_API_BASE_URL={os.environ['EVOLUTION_API_BASE_URL']}"
+        )
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
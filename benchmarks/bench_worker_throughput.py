@@ -0,0 +1,96 @@
+"""Throughput of the async turn worker versus the RQ job path.
+
+Both paths run a stubbed turn (``--llm-latency`` for the agent call and
+``--send-latency`` for the Evolution API send) so only the worker mechanics
+differ:
+
+* ``rq``: what ``tasks.rq_tasks.process_webhook_task`` used to do per job -
+  build a fresh ``MCPClient`` and call ``asyncio.run`` twice - executed
+  serially, as one RQ worker does. RQ's per-job fork is not included, so the
+  real RQ numbers are lower still.
+* ``async``: ``AsyncTurnWorker`` consuming a (fake) Redis queue with
+  ``--concurrency`` coroutines and per-session ordering.
+
+Usage:
+    python -m benchmarks.bench_worker_throughput [--jobs 200] [--phones 50]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+import fakeredis  # noqa: E402
+
+from agent.mcp_client import MCPClient  # noqa: E402
+from tasks.async_worker import AsyncTurnWorker, TurnQueue  # noqa: E402
+
+
+def run_rq(jobs: list[tuple[str, list[str]]], llm: float, send: float) -> float:
+    start = time.perf_counter()
+    for _phone, _texts in jobs:
+        MCPClient()
+        asyncio.run(asyncio.sleep(llm))
+        asyncio.run(asyncio.sleep(send))
+    return len(jobs) / (time.perf_counter() - start)
+
+
+async def run_async(
+    jobs: list[tuple[str, list[str]]], llm: float, send: float, concurrency: int
+) -> tuple[float, bool]:
+    queue = TurnQueue(fakeredis.FakeAsyncRedis(), key="bench:turns")
+    for phone, texts in jobs:
+        await queue.put(phone, texts)
+
+    done = 0
+    seen: dict[str, list[str]] = {}
+
+    async def handler(phone: str, texts: list[str], trace=None) -> None:
+        nonlocal done
+        await asyncio.sleep(llm)
+        await asyncio.sleep(send)
+        seen.setdefault(phone, []).extend(texts)
+        done += 1
+        if done == len(jobs):
+            worker.stop()
+
+    worker = AsyncTurnWorker(queue, handler, concurrency=concurrency)
+    start = time.perf_counter()
+    await worker.run()
+    elapsed = time.perf_counter() - start
+
+    expected: dict[str, list[str]] = {}
+    for phone, texts in jobs:
+        expected.setdefault(phone, []).extend(texts)
+    return len(jobs) / elapsed, seen == expected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--phones", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--send-latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    jobs = [(f"55119{i % args.phones:08d}", [f"msg {i}"]) for i in range(args.jobs)]
+    rq_jobs = jobs[: max(1, min(len(jobs), 20))]
+    rq_rate = run_rq(rq_jobs, args.llm_latency, args.send_latency)
+    print(
+        f"turn: llm {args.llm_latency * 1e3:.0f} ms + send "
+        f"{args.send_latency * 1e3:.0f} ms, {args.phones} phones"
+    )
+    print(f"{'path':<22}{'turns/s':>10}{'ordered':>10}")
+    print(f"{'rq (1 worker)':<22}{rq_rate:>10.1f}{'-':>10}")
+    for concurrency in args.concurrency:
+        rate, ordered = asyncio.run(
+            run_async(jobs, args.llm_latency, args.send_latency, concurrency)
+        )
+        print(f"{'async x' + str(concurrency):<22}{rate:>10.1f}{str(ordered):>10}")
+
+
+if __name__ == "__main__":
+    main()
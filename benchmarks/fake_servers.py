@@ -0,0 +1,259 @@
+"""Local stand-ins for the external services of the webhook pipeline.
+
+* ``fake_chat_app``: an OpenAI/DeepSeek-compatible ``/v1/chat/completions``
+  endpoint (plain and SSE streaming) with configurable time to first token,
+  token rate, prompt cache hit ratio and a scripted sequence of tool calls
+  per customer turn. Usage is reported like DeepSeek does
+  (``prompt_cache_hit_tokens``).
+* ``fake_evolution_app``: the Evolution API send endpoints; every outbound
+  message is handed to a ``SendRecorder`` with its arrival time.
+
+Both are plain FastAPI apps served in-process by ``serve``.
+
+Usage (standalone, e.g. against an app started separately):
+    python -m benchmarks.fake_servers [--chat-port 18001] [--evolution-port 18002]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class ChatScript:
+    """How the fake chat endpoint answers.
+
+    ``tool_calls`` are issued one per model call at the start of every
+    customer turn (``name`` or ``name={"json": "args"}``; without args the
+    customer text is sent as ``query``), then the reply of ``reply_tokens``
+    words is generated.
+    """
+
+    latency: float = 0.5
+    tokens_per_second: float = 50.0
+    reply_tokens: int = 40
+    cache_hit_ratio: float = 0.8
+    tool_calls: list[str] = field(default_factory=list)
+
+    def tool_call(self, step: int, text: str) -> dict[str, Any]:
+        name, _, raw_args = self.tool_calls[step].partition("=")
+        args = json.loads(raw_args) if raw_args else {"query": text}
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)},
+        }
+
+
+def _turn_state(messages: list[dict[str, Any]]) -> tuple[int, str]:
+    """Tool results since the last customer message, and that message"""
+    step, text = 0, ""
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            step += 1
+        elif message.get("role") == "user":
+            text = message.get("content") or ""
+            break
+    return step, text
+
+
+def _usage(script: ChatScript, messages: list[Any], completion: int) -> dict:
+    prompt = max(len(json.dumps(messages)) // 4, 1)
+    cached = int(prompt * script.cache_hit_ratio)
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "total_tokens": prompt + completion,
+        "prompt_cache_hit_tokens": cached,
+        "prompt_cache_miss_tokens": prompt - cached,
+    }
+
+
+def fake_chat_app(script: ChatScript) -> FastAPI:
+    app = FastAPI(title="Fake chat completions")
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        app.state.calls += 1
+        messages = body.get("messages", [])
+        step, text = _turn_state(messages)
+        tool_call = None
+        if step < len(script.tool_calls):
+            tool_call = script.tool_call(step, text)
+        words = [f"palavra{i}" for i in range(script.reply_tokens)]
+        completion = 1 if tool_call else len(words)
+        usage = _usage(script, messages, completion)
+        response_id = f"chatcmpl-{uuid.uuid4().hex}"
+        base = {
+            "id": response_id,
+            "created": int(time.time()),
+            "model": body.get("model", "deepseek-chat"),
+        }
+
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream(script, base, words, tool_call, usage),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(script.latency + completion / script.tokens_per_second)
+        message: dict[str, Any] = {"role": "assistant", "content": " ".join(words)}
+        if tool_call:
+            message = {"role": "assistant", "content": "", "tool_calls": [tool_call]}
+        return JSONResponse(
+            {
+                **base,
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if tool_call else "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    return app
+
+
+async def _stream(
+    script: ChatScript,
+    base: dict[str, Any],
+    words: list[str],
+    tool_call: dict[str, Any] | None,
+    usage: dict[str, Any],
+) -> AsyncIterator[bytes]:
+    def chunk(delta: dict[str, Any], finish: str | None = None) -> bytes:
+        choice = {"index": 0, "delta": delta, "finish_reason": finish}
+        payload = {**base, "object": "chat.completion.chunk", "choices": [choice]}
+        return f"data: {json.dumps(payload)}\n\n".encode()
+
+    await asyncio.sleep(script.latency)
+    if tool_call:
+        yield chunk({"role": "assistant", "tool_calls": [{"index": 0, **tool_call}]})
+        yield chunk({}, "tool_calls")
+    else:
+        for i, word in enumerate(words):
+            yield chunk({"role": "assistant", "content": f" {word}" if i else word})
+            if i % 10 == 9:
+                # Sentence breaks let the reply chunker flush mid-stream
+                yield chunk({"content": ".\n\n"})
+            await asyncio.sleep(1 / script.tokens_per_second)
+        yield chunk({}, "stop")
+    payload = {**base, "object": "chat.completion.chunk", "choices": []}
+    yield f"data: {json.dumps({**payload, 'usage': usage})}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+@dataclass
+class SentMessage:
+    at: float
+    instance: str
+    number: str
+    text: str
+
+
+class SendRecorder:
+    """Outbound messages received by the fake Evolution API"""
+
+    def __init__(self, on_send: Callable[[SentMessage], None] | None = None):
+        self.sent: list[SentMessage] = []
+        self.on_send = on_send
+
+    def record(self, instance: str, number: str, text: str) -> None:
+        message = SentMessage(time.perf_counter(), instance, number, text)
+        self.sent.append(message)
+        if self.on_send is not None:
+            self.on_send(message)
+
+
+def fake_evolution_app(recorder: SendRecorder, latency: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Evolution API")
+
+    def accepted() -> dict[str, Any]:
+        return {"key": {"id": uuid.uuid4().hex.upper()}, "status": "PENDING"}
+
+    @app.post("/message/sendtext/{instance}")
+    async def send_text(instance: str, request: Request) -> dict[str, Any]:
+        body = await request.json()
+        await asyncio.sleep(latency)
+        recorder.record(instance, body.get("number", ""), body.get("text", ""))
+        return accepted()
+
+    @app.post("/message/sendMedia/{number}")
+    async def send_media(number: str, request: Request) -> dict[str, Any]:
+        body = await request.json()
+        await asyncio.sleep(latency)
+        recorder.record("", number, body.get("caption") or "")
+        return accepted()
+
+    return app
+
+
+@asynccontextmanager
+async def serve(app: FastAPI, port: int, host: str = "127.0.0.1"):
+    """Run ``app`` with uvicorn on the current loop for the block's duration"""
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # re-raises e.g. "address already in use"
+        await asyncio.sleep(0.01)
+    try:
+        yield server
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    script = ChatScript(
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        tool_calls=args.tool_call,
+    )
+    recorder = SendRecorder(
+        on_send=lambda m: print(f"-> {m.number}: {m.text[:60]!r}", flush=True)
+    )
+    async with (
+        serve(fake_chat_app(script), args.chat_port),
+        serve(fake_evolution_app(recorder), args.evolution_port),
+    ):
+        print(
+            f"DEEPSEEK_BASE_URL=http://127.0.0.1:{args.chat_port}/v1\n"
+            f"EVOLUTION_API_BASE_URL=http://127.0.0.1:{args.evolution_port}"
+        )
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chat-port", type=int, default=18001)
+    parser.add_argument("--evolution-port", type=int, default=18002)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--tool-call", action="append", default=[])
+    asyncio.run(_serve_forever(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Replay captured webhook traffic against a running instance.
+
+Reads a capture written with ``WEBHOOK_CAPTURE_PATH`` (see
+``messaging/webhook_capture.py``) and posts every payload to ``/webhook`` of
+``--target``, keeping the original gaps between arrivals divided by
+``--speed`` (``1``, ``10``, ... or ``max`` to send as fast as possible).
+Messages of the same phone are sent one at a time in capture order, so a
+slow response for one customer delays only that customer; different phones
+are replayed concurrently, as are webhooks without a sender phone.
+
+Message ids are replaced by fresh ones unless ``--keep-ids`` is given, since
+the app drops ids it has already seen as Evolution API retries.
+
+Usage:
+    python -m benchmarks.replay_webhooks captures/webhooks.jsonl \\
+        [--target http://localhost:8000] [--speed 1|10|max]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from benchmarks.bench_webhook_load import percentile
+from messaging.message_service import message_service
+
+
+@dataclass
+class CapturedWebhook:
+    offset: float  # seconds since the first captured webhook
+    phone: str
+    payload: dict[str, Any]
+
+
+def refresh_ids(data: dict[str, Any]) -> None:
+    """Give every message in a webhook's ``data`` a new id, in place"""
+    key = data.get("key")
+    if isinstance(key, dict) and "id" in key:
+        key["id"] = uuid.uuid4().hex.upper()
+    messages = data.get("messages")
+    if isinstance(messages, list):
+        for message in messages:
+            if isinstance(message, dict) and "id" in message:
+                message["id"] = uuid.uuid4().hex.upper()
+
+
+def load_capture(path: str, keep_ids: bool = False) -> list[CapturedWebhook]:
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda record: record["received_at"])
+    first = records[0]["received_at"] if records else 0.0
+    webhooks = []
+    for record in records:
+        payload = record["payload"]
+        if not keep_ids:
+            payload = copy.deepcopy(payload)
+            refresh_ids(payload.get("data", {}))
+        message = message_service.extract_message_data(payload.get("data", {}))
+        webhooks.append(
+            CapturedWebhook(
+                offset=record["received_at"] - first,
+                phone=message.get("from") or "",
+                payload=payload,
+            )
+        )
+    return webhooks
+
+
+@dataclass
+class ReplayResult:
+    sent: int = 0
+    errors: int = 0
+
+
+async def replay_phone(
+    client: httpx.AsyncClient,
+    webhooks: list[CapturedWebhook],
+    start: float,
+    speed: float | None,
+    lags: list[float],
+    result: ReplayResult,
+) -> None:
+    """Send one phone's webhooks in order, each no earlier than scheduled"""
+    for webhook in webhooks:
+        if speed is not None:
+            scheduled = start + webhook.offset / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lags.append(time.perf_counter() - scheduled)
+        try:
+            response = await client.post("/webhook", json=webhook.payload)
+            ok = response.status_code == 200 and (
+                response.json().get("status") != "error"
+            )
+        except httpx.HTTPError:
+            ok = False
+        result.sent += 1
+        result.errors += not ok
+
+
+async def replay(
+    webhooks: list[CapturedWebhook],
+    target: str,
+    speed: float | None,
+    connections: int = 100,
+) -> None:
+    by_phone: dict[str, list[CapturedWebhook]] = defaultdict(list)
+    unordered: list[list[CapturedWebhook]] = []
+    for webhook in webhooks:
+        if webhook.phone:
+            by_phone[webhook.phone].append(webhook)
+        else:
+            # Nothing to keep in order with, so not queued behind each other
+            unordered.append([webhook])
+
+    lags: list[float] = []
+    result = ReplayResult()
+    async with httpx.AsyncClient(
+        base_url=target,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=connections),
+    ) as client:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                replay_phone(client, phone_webhooks, start, speed, lags, result)
+                for phone_webhooks in [*by_phone.values(), *unordered]
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    captured = webhooks[-1].offset if webhooks else 0.0
+    print(
+        f"replayed {result.sent} webhooks from {len(by_phone)} phones "
+        f"in {elapsed:.1f}s (captured over {captured:.1f}s, "
+        f"{result.sent / elapsed if elapsed > 0 else 0:.1f}/s)"
+    )
+    print(f"errors {result.errors} ({result.errors / max(result.sent, 1):.1%})")
+    if lags:
+        print(
+            f"schedule lag p50 {percentile(lags, 50) * 1e3:.0f} ms  "
+            f"p99 {percentile(lags, 99) * 1e3:.0f} ms"
+        )
+
+
+def parse_speed(value: str) -> float | None:
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("capture", help="JSONL file written by the capture mode")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=parse_speed, default=1.0)
+    parser.add_argument("--keep-ids", action="store_true")
+    parser.add_argument("--connections", type=int, default=100)
+    args = parser.parse_args()
+
+    webhooks = load_capture(args.capture, keep_ids=args.keep_ids)
+    asyncio.run(replay(webhooks, args.target, args.speed, args.connections))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,57 @@
+import asyncio
+import io
 import logging
+import time
+from dataclasses import asdict
 from typing import Any
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from redis import Redis
 from rq import Queue
 
 from agent.deepseek_langchain_service import DeepSeekLCService
 from agent.deepseek_models import DeepSeekMessage
 from agent.mcp_client import mcp_client
+from agent.usage_accounting import usage_ledger
 from config import settings
+from infrastructure.database.async_database import async_engine
+from messaging.burst_coalescer import BurstCoalescer
+from messaging.deduplicator import message_deduplicator
 from messaging.evolution_client import evolution_client
 from messaging.message_service import MessageService
+from messaging.outbound_dispatcher import Priority, outbound_dispatcher
+from messaging.session_store import session_store
+from messaging.webhook_capture import webhook_capture
+from messaging.webhook_ingress import (
+    InvalidWebhook,
+    extract_text_messages,
+    group_by_chat,
+    may_contain_text,
+    parse_webhook,
+)
 from models import (
-    MCPMessage,
     MCPRequest,
     SendMediaRequest,
     SendMessageRequest,
     WebhookPayload,
 )
+from sales.customer_import import import_customers
 from sales.customer_management import CustomerManager
 from sales.customer_schema import Customer
-from shared.metrics import instrument, metrics_endpoint
+from sales.product_catalog import product_catalog
+from shared.metrics import (
+    WEBHOOK_BATCH_MESSAGES,
+    instrument,
+    mark_process_dead,
+    metrics_endpoint,
+)
+from shared.redis_client import redis_client
+from shared.tracing import TraceContext, record_stage, use_trace
+from tasks.async_worker import turn_queue
+from tasks.conversation import process_conversation_turn
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,8 +62,20 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Code to run on startup
     print("Application startup!")
+    product_catalog.start()
+    await evolution_client.open()
+    outbound_dispatcher.start()
+    await deepseek_lc_service.open()
+    burst_coalescer.start()
     yield
     # Code to run on shutdown
+    await burst_coalescer.stop()
+    await outbound_dispatcher.stop()
+    await deepseek_lc_service.close()
+    await evolution_client.close()
+    await async_engine.dispose()
+    product_catalog.stop()
+    mark_process_dead()
     print("Application shutdown!")
 
 
@@ -60,8 +101,6 @@ app.add_middleware(
 mcp_client = mcp_client
 message_service = MessageService()
 deepseek_lc_service = DeepSeekLCService()
-# Store conversation sessions
-conversation_sessions: dict[str, list[MCPMessage]] = {}
 customer_manager = CustomerManager()
 # Create a Redis connection
 redis_conn = Redis(host="localhost", port=6379)
@@ -104,7 +143,7 @@ async def health_check() -> dict[str, Any]:
 async def send_message(request: SendMessageRequest):
     """Send message via Evolution API"""
     try:
-        result = await evolution_client.send_message(request)
+        result = await outbound_dispatcher.send(request, Priority.BULK)
         return {"status": "success", "data": result}
     except Exception as e:
         logger.error(f"Error sending message: {str(e)}")
@@ -129,7 +168,9 @@ async def langchain(
     try:
         logger.info(f"data: {messages}")
 
-        response = deepseek_lc_service.chat_completion(messages, 1, "5562993434010")
+        response = await deepseek_lc_service.chat_completion(
+            messages, 1, "5562993434010"
+        )
 
         return {"status": "success", "message": str(response)}
     except Exception as e:
@@ -138,25 +179,112 @@ async def langchain(
 
 
 @app.get("/customers", response_model=list[Customer])
-async def read_customers(skip: int = 0, limit: int = 100) -> dict[str, str]:
-    customers = await customer_manager.get_customers(skip=skip, limit=limit)
-    print(customers)
-    return customers
-
-
-@app.post("/webhook")
-async def webhook_handler(
-    payload: WebhookPayload, background_tasks: BackgroundTasks
-) -> dict[str, str]:
-    """Handle incoming webhook messages from Evolution API"""
+async def read_customers(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=settings.CUSTOMERS_PAGE_MAX_LIMIT),
+    after_id: int | None = None,
+) -> Any:
+    """Page of customers ordered by id.
+
+    Pass the ``X-Next-Cursor`` header of one page as ``after_id`` to get the
+    next one; ``skip`` still works but gets slower the deeper it goes.
+    """
+    customers = await customer_manager.get_customers(
+        skip=skip, limit=limit, after_id=after_id
+    )
+    headers = {}
+    if len(customers) == limit:
+        headers["X-Next-Cursor"] = str(customers[-1]["id"])
+    # Rows are already JSON-ready; skip the response_model re-validation
+    return JSONResponse(customers, headers=headers)
+
+
+@app.get("/customers/export")
+async def export_customers() -> StreamingResponse:
+    """Stream every customer as NDJSON (one JSON object per line)"""
+    return StreamingResponse(
+        customer_manager.export_customers(settings.CUSTOMERS_EXPORT_BATCH_SIZE),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/customers/import")
+async def import_customers_file(
+    request: Request, format: str = Query("csv", pattern="^(csv|xlsx)$")
+) -> dict[str, Any]:
+    """Upsert customers from a CSV/XLSX file sent as the raw request body"""
+    body = await request.body()
     try:
-        # logger.info(f"Received webhook from instance: {payload.instance}")
-        # logger.info(f"Webhook data: {payload.data}")
-
-        # Process webhook in background
-        # background_tasks.add_task(process_webhook_message, payload)
-        # job_instance =>
-        task_queue.enqueue(process_webhook_message, payload)
+        result = await asyncio.to_thread(import_customers, io.BytesIO(body), format)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"status": "success", "data": asdict(result)}
+
+
+@app.post(
+    "/webhook",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": WebhookPayload.model_json_schema()}
+            },
+        }
+    },
+)
+async def webhook_handler(request: Request) -> dict[str, str]:
+    """Handle incoming webhook messages from Evolution API
+
+    The body is parsed by hand (see messaging/webhook_ingress.py) so events
+    without text are acknowledged before any parsing or validation.
+    """
+    received_at = time.time()
+    body = await request.body()
+    if webhook_capture is None and not may_contain_text(body):
+        return {"status": "received"}
+    try:
+        payload = parse_webhook(body)
+    except InvalidWebhook as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if webhook_capture is not None:
+        webhook_capture.record(payload, received_at)
+    try:
+        messages = extract_text_messages(payload["data"])
+        if not messages:
+            logger.info("No text message found in webhook")
+            return {"status": "received"}
+        WEBHOOK_BATCH_MESSAGES.observe(len(messages))
+        chats = group_by_chat(messages)
+        if not chats:
+            logger.warning("No phone number found in message")
+            return {"status": "received"}
+
+        batch = [message for chat in chats.values() for message in chat]
+        dedupe_start = time.time()
+        message_ids = [message["id"] for message in batch if message.get("id")]
+        seen = iter(await message_deduplicator.are_duplicates(message_ids))
+        dedupe_end = time.time()
+
+        turns: dict[str, list[dict[str, Any]]] = {}
+        for message in batch:
+            message_id = message.get("id")
+            trace = TraceContext.for_message(message_id)
+            trace.received_at = received_at
+            with use_trace(trace):
+                record_stage("webhook_extract", received_at, dedupe_start)
+                record_stage("webhook_dedupe", dedupe_start, dedupe_end)
+            if message_id and next(seen):
+                logger.info(f"Dropping duplicate webhook for message {message_id}")
+                continue
+            item = {"text": message["text"], "trace": trace.to_dict()}
+            turns.setdefault(message["from"], []).append(item)
+        if not turns:
+            return {"status": "duplicate"}
+
+        # Rapid-fire messages from the same phone, and each chat's share of a
+        # batched payload, are merged into a single agent turn by the coalescer
+        for phone_number, items in turns.items():
+            await burst_coalescer.add_many(phone_number, items)
         return {"status": "received"}
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}")
@@ -165,51 +293,46 @@ async def webhook_handler(
 
 async def process_webhook_message(payload: WebhookPayload) -> None:
     """Process incoming webhook message and forward to MCP"""
-    try:
-        # Extract message data from webhook payload
-        message_data = message_service.extract_message_data(payload.data)
-
-        if not message_data or not message_data.get("text"):
-            logger.info("No text message found in webhook")
-            return
-
-        # Get phone number as session identifier
-        phone_number = message_data.get("from")
-        if not phone_number:
-            logger.warning("No phone number found in message")
-            return
-
-        # Get or create conversation session
-        session_id = f"whatsapp_{phone_number}"
-
-        mcp_request = MCPRequest(
-            messages=[MCPMessage(content=message_data["text"], role="user")],
-            session_id=session_id,
-            context={"platform": "whatsapp", "phone_number": phone_number},
+    messages = [
+        message
+        for message in message_service.extract_messages(payload.data)
+        if message.get("text")
+    ]
+    if not messages:
+        logger.info("No text message found in webhook")
+        return
+
+    # Phone number is the session identifier; one turn per chat
+    for phone_number, chat in group_by_chat(messages).items():
+        await process_conversation_turn(
+            phone_number, [message["text"] for message in chat]
         )
 
-        # Get response from MCP server
-        mcp_response = await mcp_client.send_message(mcp_request)
 
-        # Send response back via Evolution API
-        send_request = SendMessageRequest(
-            number=phone_number, text=mcp_response.response
+async def enqueue_conversation_turn(
+    phone_number: str, items: list[dict[str, Any]]
+) -> None:
+    """Hand a coalesced burst of messages to the task queue as one job"""
+    texts = [item["text"] for item in items]
+    trace = TraceContext.merge([TraceContext(**item["trace"]) for item in items])
+    with use_trace(trace):
+        record_stage("burst_wait", trace.received_at, messages=len(items))
+    if settings.TASK_QUEUE_BACKEND == "rq":
+        task_queue.enqueue(
+            process_conversation_turn, phone_number, texts, trace.to_dict()
         )
+        return
+    await turn_queue.put(phone_number, texts, trace.to_dict())
 
-        await evolution_client.send_message(send_request)
-        # logger.info(f"Response sent to {phone_number}")
 
-    except Exception as e:
-        logger.error(f"Error processing webhook message: {str(e)}")
-        phone_number = message_data.get("from") if message_data is not None else None
-        logger.info(f"phone_number: {phone_number}")
-        if phone_number:
-            send_request = SendMessageRequest(
-                number=str(phone_number), text=f"erro ao acessar o  agente => {str(e)}"
-            )
-            response = await evolution_client.send_message(send_request)
-            logger.error(f"message{response} sent to {phone_number}")
-        return HTTPException(status_code=500, detail=str(e))
+burst_coalescer = BurstCoalescer(
+    redis_client,
+    prefix=settings.CACHE_PREFIX,
+    window=settings.BURST_WINDOW_SECONDS,
+    max_wait=settings.BURST_MAX_WAIT_SECONDS,
+    on_flush=enqueue_conversation_turn,
+    poll_interval=settings.BURST_POLL_SECONDS,
+)
 
 
 @app.post("/chat-with-mcp")
@@ -224,26 +347,51 @@ async def chat_with_mcp(request: MCPRequest) -> dict[str, str]:
 
 
 @app.get("/sessions")
-async def get_sessions() -> Any:
-    """Get all active conversation sessions"""
-    return {
-        "sessions": {
-            session_id: [msg.dict() for msg in messages]
-            for session_id, messages in conversation_sessions.items()
-        }
-    }
+async def get_sessions(
+    cursor: int = Query(0, ge=0), count: int = Query(50, ge=1, le=500)
+) -> dict[str, Any]:
+    """One page of conversation session summaries
+
+    Pass ``next_cursor`` back as ``cursor`` to get the next page; it is 0
+    once every session has been listed.
+    """
+    next_cursor, sessions = await session_store.page(cursor, count)
+    return {"sessions": sessions, "next_cursor": next_cursor}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str) -> dict[str, Any]:
+    """Summary and latest messages of one conversation session"""
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
 
 
 @app.delete("/sessions/{session_id}")
 async def clear_session(session_id: str):
     """Clear a specific conversation session"""
-    if session_id in conversation_sessions:
-        del conversation_sessions[session_id]
+    if await session_store.delete(session_id):
         return {"status": "success", "message": f"Session {session_id} cleared"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
 
+@app.get("/usage/threads")
+async def get_usage_threads(limit: int = Query(20, ge=1, le=500)) -> dict[str, Any]:
+    """Conversation threads with the most LLM tokens, largest first"""
+    return {"threads": await usage_ledger.top(limit)}
+
+
+@app.get("/usage/threads/{thread_id}")
+async def get_usage_thread(thread_id: str) -> dict[str, Any]:
+    """LLM token usage, cost and tool output tokens of one thread"""
+    usage = await usage_ledger.get(thread_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="No usage for this thread")
+    return usage
+
+
 @app.post("/setup-webhook/{instance}")
 async def setup_webhook(instance: str):
     """Setup webhook for a specific Evolution API instance"""
@@ -0,0 +1,147 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import orjson
+from redis import asyncio as aioredis
+
+from shared.metrics import BURST_LLM_CALLS_SAVED, BURST_MESSAGES, BURST_SIZE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[str, list[Any]], Awaitable[None] | None]
+
+# Bursts no process flushes (e.g. no web process running) are dropped after
+# this long
+_BUFFER_TTL = 24 * 3600
+
+
+class BurstCoalescer:
+    """Per-key debounce that merges rapid-fire messages into one batch.
+
+    Each new item for a key restarts that key's ``window`` timer; the batch
+    is flushed when the key has been quiet for ``window`` seconds or when
+    ``max_wait`` seconds have passed since its first item, whichever is first.
+
+    Pending items live in Redis (a list per key and a sorted set of flush
+    deadlines), not in process memory: a burst survives a restart of the
+    process that received it, and one phone's messages are merged even when
+    they reach different web workers. Every running coalescer polls for due
+    keys every ``poll_interval`` seconds and claims each one in a single
+    transaction, so a burst is flushed exactly once. Items must be
+    JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        prefix: str,
+        window: float,
+        max_wait: float,
+        on_flush: FlushCallback,
+        poll_interval: float = 0.1,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.on_flush = on_flush
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    def _items_key(self, key: str) -> str:
+        return f"{self.prefix}:burst:{key}"
+
+    @property
+    def _started_key(self) -> str:
+        return f"{self.prefix}:burst_started"
+
+    @property
+    def _due_key(self) -> str:
+        return f"{self.prefix}:burst_due"
+
+    async def add(self, key: str, item: Any) -> None:
+        """Queue ``item`` for ``key``; flushes immediately when disabled"""
+        await self.add_many(key, [item])
+
+    async def add_many(self, key: str, items: list[Any]) -> None:
+        """Queue several items for ``key`` at once (one batch, one deadline)"""
+        BURST_MESSAGES.inc(len(items))
+        if self.window <= 0:
+            await self._flush(key, list(items))
+            return
+
+        now = time.time()
+        items_key = self._items_key(key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(items_key, *(orjson.dumps(item) for item in items))
+            pipe.expire(items_key, _BUFFER_TTL)
+            pipe.hsetnx(self._started_key, key, str(now))
+            pipe.hget(self._started_key, key)
+            *_, started = await pipe.execute()
+        deadline = min(now + self.window, float(started) + self.max_wait)
+        await self.redis.zadd(self._due_key, {key: deadline})
+
+    def start(self) -> None:
+        """Start polling for due bursts on the running loop"""
+        if self.window <= 0 or self._task is not None:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling; bursts not due yet stay in Redis for another process"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.flush_due()
+            except Exception as e:
+                logger.error(f"Error flushing bursts: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush_due(self) -> int:
+        """Claim and flush every burst whose deadline has passed"""
+        due = await self.redis.zrangebyscore(self._due_key, "-inf", time.time())
+        flushed = 0
+        for member in due:
+            key = member.decode()
+            items = await self._claim(key)
+            # Empty when another process claimed the burst first
+            if items:
+                await self._flush(key, items)
+                flushed += 1
+        return flushed
+
+    async def _claim(self, key: str) -> list[Any]:
+        items_key = self._items_key(key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._due_key, key)
+            pipe.lrange(items_key, 0, -1)
+            pipe.delete(items_key)
+            pipe.hdel(self._started_key, key)
+            _, items, _, _ = await pipe.execute()
+        return [orjson.loads(item) for item in items]
+
+    async def _flush(self, key: str, items: list[Any]) -> None:
+        BURST_SIZE.observe(len(items))
+        BURST_LLM_CALLS_SAVED.inc(len(items) - 1)
+        try:
+            result = self.on_flush(key, items)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Error flushing burst for {key}: {str(e)}")
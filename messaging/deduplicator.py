@@ -0,0 +1,78 @@
+import logging
+from collections import OrderedDict
+
+from redis import asyncio as aioredis
+
+from config import settings
+from shared.metrics import WEBHOOK_DUPLICATES
+from shared.redis_client import redis_client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MessageDeduplicator:
+    """Drop webhook retries by WhatsApp message id.
+
+    A bounded in-process LRU answers repeats without a network round-trip;
+    first sightings are claimed in Redis with ``SET NX EX`` so retries that
+    land on another worker are caught too. If Redis is unavailable the
+    message is let through rather than dropped.
+    """
+
+    def __init__(
+        self, redis: aioredis.Redis, prefix: str, ttl: int, local_size: int
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local_size = local_size
+        self._recent: OrderedDict[str, None] = OrderedDict()
+
+    async def is_duplicate(self, message_id: str) -> bool:
+        """Return True if ``message_id`` was already seen, else record it"""
+        return (await self.are_duplicates([message_id]))[0]
+
+    async def are_duplicates(self, message_ids: list[str]) -> list[bool]:
+        """Flag each id already seen, claiming new ids in one round-trip"""
+        result = [False] * len(message_ids)
+        fresh: dict[str, int] = {}
+        for i, message_id in enumerate(message_ids):
+            if message_id in self._recent:
+                self._recent.move_to_end(message_id)
+            elif message_id not in fresh:
+                fresh[message_id] = i
+                continue
+            result[i] = True
+            WEBHOOK_DUPLICATES.labels(source="local").inc()
+        if not fresh:
+            return result
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for message_id in fresh:
+                    pipe.set(f"{self.prefix}:{message_id}", 1, nx=True, ex=self.ttl)
+                claimed = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error checking {len(fresh)} message ids: {str(e)}")
+            return result
+
+        for (message_id, i), was_claimed in zip(fresh.items(), claimed, strict=True):
+            self._remember(message_id)
+            if not was_claimed:
+                WEBHOOK_DUPLICATES.labels(source="redis").inc()
+                result[i] = True
+        return result
+
+    def _remember(self, message_id: str) -> None:
+        self._recent[message_id] = None
+        if len(self._recent) > self.local_size:
+            self._recent.popitem(last=False)
+
+
+message_deduplicator = MessageDeduplicator(
+    redis_client,
+    prefix=f"{settings.CACHE_PREFIX}:seen",
+    ttl=settings.DEDUP_TTL_SECONDS,
+    local_size=settings.DEDUP_LOCAL_SIZE,
+)
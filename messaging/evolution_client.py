@@ -1,24 +1,169 @@
+import asyncio
 import logging
+import random
+import time
 from typing import Any
 
 import httpx
 
 from config import settings
 from models import SendMediaRequest, SendMessageRequest
-from shared.metrics import instrument
+from shared.metrics import (
+    EVOLUTION_INFLIGHT_REQUESTS,
+    EVOLUTION_POOL_CONNECTIONS,
+    EVOLUTION_REQUEST_DURATION,
+    EVOLUTION_REQUESTS,
+    EVOLUTION_RETRIES,
+    instrument,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Responses that mean the request was not processed and is worth repeating
+RETRY_STATUSES = frozenset({429, 503})
+# Gateway errors: the upstream may have processed the request, so only calls
+# that are safe to repeat (reads, setting the webhook) retry them
+IDEMPOTENT_RETRY_STATUSES = RETRY_STATUSES | {502, 504}
+# Failures before the request reached the server, so a retry cannot send twice
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
 
 class EvolutionClient:
-    def __init__(self) -> None:
+    """Evolution API client over one pooled, keep-alive ``httpx.AsyncClient``.
+
+    ``open``/``close`` are called from the FastAPI lifespan (and the worker);
+    the client is also created lazily on first use so RQ jobs keep working.
+    Requests that fail before reaching the server, or come back 429/503, are
+    retried with exponential backoff; idempotent calls also retry 502/504,
+    which sends do not (the message may already have been delivered). A server ``Retry-After`` is
+    honoured up to ``EVOLUTION_MAX_BACKOFF``, and no retry is started that
+    would end after ``EVOLUTION_RETRY_DEADLINE`` seconds from the first try.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
         self.base_url = settings.EVOLUTION_API_BASE_URL
         self.headers = {
             "apikey": settings.EVOLUTION_API_KEY,
             "Content-Type": "application/json",
         }
-        self.client = httpx.AsyncClient()
+        self.max_retries = settings.EVOLUTION_MAX_RETRIES
+        self.retry_backoff = settings.EVOLUTION_RETRY_BACKOFF
+        self.max_backoff = settings.EVOLUTION_MAX_BACKOFF
+        self.retry_deadline = settings.EVOLUTION_RETRY_DEADLINE
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.EVOLUTION_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("EVOLUTION_HTTP2 needs the 'h2' package; using HTTP/1.1")
+                http2 = False
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            http2=http2,
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=settings.EVOLUTION_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.EVOLUTION_MAX_KEEPALIVE,
+                keepalive_expiry=settings.EVOLUTION_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                settings.EVOLUTION_TIMEOUT, connect=settings.EVOLUTION_CONNECT_TIMEOUT
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def open(self) -> None:
+        """Create the pooled client on the running loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._record_pool_stats()
+
+    def pool_stats(self) -> dict[str, int]:
+        """Active and idle connections of the underlying httpcore pool"""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"active": len(connections) - idle, "idle": idle}
+
+    def _record_pool_stats(self) -> None:
+        # Set explicitly, not via set_function: callback gauges are not
+        # exported in multiprocess mode (see shared/metrics.py)
+        for state, count in self.pool_stats().items():
+            EVOLUTION_POOL_CONNECTIONS.labels(state=state).set(count)
+
+    async def _request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request, retrying transient failures; raises on HTTP errors"""
+        retry_statuses = IDEMPOTENT_RETRY_STATUSES if idempotent else RETRY_STATUSES
+        EVOLUTION_INFLIGHT_REQUESTS.inc()
+        try:
+            with EVOLUTION_REQUEST_DURATION.labels(endpoint=endpoint).time():
+                deadline = time.monotonic() + self.retry_deadline
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        response = await self.client.request(method, url, **kwargs)
+                        if response.status_code not in retry_statuses:
+                            break
+                        delay = self._backoff(
+                            attempt, response.headers.get("Retry-After")
+                        )
+                        if not self._can_retry(attempt, delay, deadline):
+                            break
+                        reason = f"HTTP {response.status_code}"
+                    except RETRY_ERRORS as e:
+                        delay = self._backoff(attempt, None)
+                        if not self._can_retry(attempt, delay, deadline):
+                            raise
+                        reason = type(e).__name__
+
+                    EVOLUTION_RETRIES.labels(endpoint=endpoint).inc()
+                    logger.warning(
+                        f"Evolution API {endpoint} failed ({reason}), "
+                        f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+
+            response.raise_for_status()
+            EVOLUTION_REQUESTS.labels(endpoint=endpoint, result="success").inc()
+            return response
+        except Exception:
+            EVOLUTION_REQUESTS.labels(endpoint=endpoint, result="error").inc()
+            raise
+        finally:
+            EVOLUTION_INFLIGHT_REQUESTS.dec()
+            self._record_pool_stats()
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        delay = self.retry_backoff * 2**attempt
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def _can_retry(self, attempt: int, delay: float, deadline: float) -> bool:
+        return attempt < self.max_retries and time.monotonic() + delay < deadline
 
     @instrument
     async def send_message(self, request: SendMessageRequest) -> None:
@@ -31,10 +176,9 @@ class EvolutionClient:
             }
 
             logger.debug(f"Evolution API request payload: {payload}")
-            await self.client.post(
-                f"{self.base_url}/message/sendtext/mcp",
-                json=payload,
-                headers=self.headers,
+            instance = request.instance or settings.EVOLUTION_INSTANCE
+            await self._request(
+                "send_message", "POST", f"/message/sendtext/{instance}", json=payload
             )
 
             return
@@ -45,50 +189,44 @@ class EvolutionClient:
     @instrument
     async def send_media(self, request: SendMediaRequest) -> Any:
         """Send media message via Evolution API"""
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "number": request.number,
-                "media": request.media,
-                "fileName": request.fileName,
-                "caption": request.caption,
-                **({"options": request.options} if request.options else {}),
-            }
+        payload = {
+            "number": request.number,
+            "media": request.media,
+            "fileName": request.fileName,
+            "caption": request.caption,
+            **({"options": request.options} if request.options else {}),
+        }
 
-            response = await client.post(
-                f"{self.base_url}/message/sendMedia/{request.number}",
-                json=payload,
-                headers=self.headers,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "send_media", "POST", f"/message/sendMedia/{request.number}", json=payload
+        )
+        return response.json()
 
     @instrument
     async def get_instance_info(self, instance: str) -> Any:
         """Get information about a specific instance"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/instance/info/{instance}", headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "get_instance_info", "GET", f"/instance/info/{instance}", idempotent=True
+        )
+        return response.json()
 
     @instrument
     async def set_webhook(self, instance: str) -> Any:
         """Set webhook for receiving messages"""
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "webhook": settings.WEBHOOK_URL,
-                "enabled": True,
-                "webhook_by_events": False,
-            }
+        payload = {
+            "webhook": settings.WEBHOOK_URL,
+            "enabled": True,
+            "webhook_by_events": False,
+        }
 
-            response = await client.post(
-                f"{self.base_url}/instance/setWebhook/{instance}",
-                json=payload,
-                headers=self.headers,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "set_webhook",
+            "POST",
+            f"/instance/setWebhook/{instance}",
+            idempotent=True,
+            json=payload,
+        )
+        return response.json()
 
 
 evolution_client = EvolutionClient()
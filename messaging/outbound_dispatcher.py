@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from config import settings
+from messaging.evolution_client import evolution_client
+from models import SendMessageRequest
+from shared.metrics import (
+    OUTBOUND_MESSAGES,
+    OUTBOUND_QUEUE_DEPTH,
+    OUTBOUND_QUEUE_WAIT,
+)
+from shared.tracing import stage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SendCallback = Callable[[SendMessageRequest], Awaitable[Any]]
+
+
+class Priority(IntEnum):
+    REPLY = 0  # conversational replies: someone is waiting on the other end
+    BULK = 1  # API/background sends: may wait, dropped when the lane is full
+
+
+class OutboundQueueFull(Exception):
+    """Raised when a bulk send finds its instance lane at capacity"""
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class _Outbound:
+    request: SendMessageRequest
+    priority: Priority
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class _InstanceLane:
+    """Rate limit and priority queues for one Evolution instance"""
+
+    def __init__(self, rate: float, burst: int, max_queue: int) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.queues: dict[Priority, deque[_Outbound]] = {
+            priority: deque() for priority in Priority
+        }
+        self.reply_slots = asyncio.Semaphore(max_queue)
+        self.max_queue = max_queue
+        self.ready = asyncio.Semaphore(0)
+        self.consumer: asyncio.Task | None = None
+
+    def pop(self) -> _Outbound:
+        """Oldest reply if any, else the oldest bulk message"""
+        queue = next(q for q in self.queues.values() if q)
+        return queue.popleft()
+
+
+class OutboundDispatcher:
+    """Flow control for messages sent through the Evolution API.
+
+    Every Evolution instance gets a token bucket (``rate`` sends per second,
+    bursts of ``burst``) and two queues bounded at ``max_queue``: replies are
+    always sent before bulk messages, a full reply queue makes callers wait
+    (back-pressure on the turn worker) and a full bulk queue rejects the send
+    with ``OutboundQueueFull``. Up to ``max_inflight`` sends per instance are
+    in flight at once.
+
+    Until ``start`` is called (e.g. inside one-off RQ jobs) messages are sent
+    directly, without queueing.
+    """
+
+    # Seconds ``stop`` waits for queued and in-flight sends
+    drain_timeout = 30.0
+
+    def __init__(
+        self,
+        send: SendCallback,
+        rate: float,
+        burst: int,
+        max_queue: int,
+        max_inflight: int = 10,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"Outbound rate must be positive, got {rate}")
+        self._send = send
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_inflight = max_inflight
+        self._lanes: dict[str, _InstanceLane] = {}
+        self._inflight: set[asyncio.Task] = set()
+        self._running = False
+
+    def start(self) -> None:
+        self._running = True
+
+    async def stop(self) -> None:
+        """Stop accepting queued sends after delivering what is queued.
+
+        Waits up to ``drain_timeout`` seconds; sends still queued then are
+        failed with ``OutboundQueueFull`` so their callers do not hang.
+        """
+        self._running = False
+        deadline = time.monotonic() + self.drain_timeout
+        for lane in self._lanes.values():
+            while (
+                any(lane.queues.values())
+                and lane.consumer is not None
+                and not lane.consumer.done()
+                and time.monotonic() < deadline
+            ):
+                await asyncio.sleep(0.05)
+            if lane.consumer is not None:
+                lane.consumer.cancel()
+            self._drop_queued(lane)
+        if self._inflight:
+            _, pending = await asyncio.wait(
+                self._inflight, timeout=max(deadline - time.monotonic(), 0)
+            )
+            if pending:
+                logger.warning(f"{len(pending)} outbound sends still in flight")
+        self._lanes.clear()
+
+    def _drop_queued(self, lane: _InstanceLane) -> None:
+        for priority, queue in lane.queues.items():
+            label = priority.name.lower()
+            while queue:
+                item = queue.popleft()
+                OUTBOUND_QUEUE_DEPTH.labels(priority=label).dec()
+                OUTBOUND_MESSAGES.labels(priority=label, result="dropped").inc()
+                if not item.future.done():
+                    item.future.set_exception(
+                        OutboundQueueFull("Outbound dispatcher stopped before sending")
+                    )
+
+    async def send(
+        self, request: SendMessageRequest, priority: Priority = Priority.REPLY
+    ) -> Any:
+        """Queue ``request`` for its instance and wait until it is delivered"""
+        with stage("outbound_send", priority=priority.name.lower()):
+            return await self._submit(request, priority)
+
+    async def _submit(self, request: SendMessageRequest, priority: Priority) -> Any:
+        if not self._running:
+            return await self._send(request)
+
+        instance = request.instance or settings.EVOLUTION_INSTANCE
+        lane = self._lane(instance)
+        if priority == Priority.REPLY:
+            await lane.reply_slots.acquire()
+        elif len(lane.queues[priority]) >= lane.max_queue:
+            OUTBOUND_MESSAGES.labels(
+                priority=priority.name.lower(), result="dropped"
+            ).inc()
+            raise OutboundQueueFull(f"Outbound bulk queue full for {instance}")
+
+        item = _Outbound(
+            request=request,
+            priority=priority,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        lane.queues[priority].append(item)
+        OUTBOUND_QUEUE_DEPTH.labels(priority=priority.name.lower()).inc()
+        lane.ready.release()
+        return await item.future
+
+    def _lane(self, instance: str) -> _InstanceLane:
+        lane = self._lanes.get(instance)
+        if lane is None:
+            lane = self._lanes[instance] = _InstanceLane(
+                self.rate, self.burst, self.max_queue
+            )
+            lane.consumer = asyncio.create_task(self._consume(instance, lane))
+        return lane
+
+    async def _consume(self, instance: str, lane: _InstanceLane) -> None:
+        slots = asyncio.Semaphore(self.max_inflight)
+        while True:
+            await lane.ready.acquire()
+            await lane.bucket.acquire()
+            await slots.acquire()
+            item = lane.pop()
+            if item.priority == Priority.REPLY:
+                lane.reply_slots.release()
+            label = item.priority.name.lower()
+            OUTBOUND_QUEUE_DEPTH.labels(priority=label).dec()
+            OUTBOUND_QUEUE_WAIT.labels(priority=label).observe(
+                time.monotonic() - item.enqueued_at
+            )
+            task = asyncio.create_task(self._deliver(item, slots))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, item: _Outbound, slots: asyncio.Semaphore) -> None:
+        label = item.priority.name.lower()
+        try:
+            result = await self._send(item.request)
+            OUTBOUND_MESSAGES.labels(priority=label, result="sent").inc()
+            if not item.future.done():
+                item.future.set_result(result)
+        except Exception as e:
+            OUTBOUND_MESSAGES.labels(priority=label, result="error").inc()
+            logger.error(f"Outbound send to {item.request.number} failed: {str(e)}")
+            if not item.future.done():
+                item.future.set_exception(e)
+        finally:
+            slots.release()
+
+
+outbound_dispatcher = OutboundDispatcher(
+    evolution_client.send_message,
+    rate=settings.OUTBOUND_RATE_PER_SECOND,
+    burst=settings.OUTBOUND_BURST,
+    max_queue=settings.OUTBOUND_MAX_QUEUE,
+    max_inflight=settings.OUTBOUND_MAX_INFLIGHT,
+)
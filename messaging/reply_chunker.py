@@ -0,0 +1,74 @@
+import re
+from collections.abc import AsyncIterator
+
+# Sentence end: terminal punctuation, optionally closed by a quote or bracket,
+# followed by whitespace. Prices such as "R$ 24.86" never match because the
+# punctuation is not followed by whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+_PARAGRAPH_END = re.compile(r"\n\s*\n")
+
+
+class ReplyChunker:
+    """Cut an incrementally streamed reply into WhatsApp-sized messages.
+
+    Paragraph breaks always flush. Sentence ends flush once the pending text
+    reaches ``min_chars`` so short sentences are grouped instead of sent one
+    by one. Text longer than ``max_chars`` without a boundary is flushed at
+    the last line break or space.
+    """
+
+    def __init__(self, min_chars: int = 60, max_chars: int = 1000) -> None:
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text and return any chunks that are ready to send"""
+        self._buffer += text
+        chunks: list[str] = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            if chunk:
+                chunks.append(chunk)
+        return chunks
+
+    def flush(self) -> list[str]:
+        """Return whatever text is left once the stream has ended"""
+        chunk, self._buffer = self._buffer.strip(), ""
+        return [chunk] if chunk else []
+
+    def _find_cut(self) -> int | None:
+        # A break at the very start (left over from the previous cut) is not
+        # a paragraph end; look at the next one
+        for paragraph in _PARAGRAPH_END.finditer(self._buffer):
+            if paragraph.start() > 0:
+                return paragraph.end()
+
+        cut = None
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if match.end() >= self.min_chars:
+                cut = match.end()
+                break
+        if cut is not None:
+            return cut
+
+        if len(self._buffer) > self.max_chars:
+            window = self._buffer[: self.max_chars]
+            split = max(window.rfind("\n"), window.rfind(" "))
+            return split + 1 if split > 0 else self.max_chars
+        return None
+
+
+async def chunk_reply(
+    tokens: AsyncIterator[str], min_chars: int = 60, max_chars: int = 1000
+) -> AsyncIterator[str]:
+    """Re-chunk an async stream of tokens at sentence/paragraph boundaries"""
+    chunker = ReplyChunker(min_chars=min_chars, max_chars=max_chars)
+    async for token in tokens:
+        for chunk in chunker.feed(token):
+            yield chunk
+    for chunk in chunker.flush():
+        yield chunk
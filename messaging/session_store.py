@@ -0,0 +1,188 @@
+"""Conversation sessions shared by every web and worker process.
+
+Each session is a small summary hash plus a capped list of its latest
+messages, both expiring ``ttl`` seconds after the last message. A sorted
+set indexes sessions by last activity: it caps the number of sessions kept
+(least recently active ones are evicted first) and is walked with ``ZSCAN``
+to list sessions page by page without reading their messages.
+"""
+
+import logging
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+import orjson
+from redis import asyncio as aioredis
+
+from config import settings
+from models import MCPMessage
+from shared.metrics import SESSION_EVICTIONS
+from shared.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Characters of the last message kept in the session summary
+_PREVIEW_CHARS = 120
+
+
+class SessionStore:
+    """Redis-backed conversation sessions, bounded in count and length"""
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        prefix: str,
+        ttl: int,
+        max_sessions: int,
+        max_messages: int,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session_messages:{session_id}"
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self.prefix}:sessions"
+
+    async def append(
+        self,
+        session_id: str,
+        messages: list[MCPMessage],
+        context: dict[str, Any] | None = None,
+    ) -> None:
+        """Add messages to a session, creating it if needed"""
+        if not messages:
+            return
+        now = time.time()
+        stamped = datetime.fromtimestamp(now, UTC)
+        encoded = []
+        for message in messages:
+            if message.timestamp is None:
+                message = message.model_copy(update={"timestamp": stamped})
+            encoded.append(orjson.dumps(message.model_dump(mode="json")))
+        last = messages[-1]
+        summary_key = self._summary_key(session_id)
+        messages_key = self._messages_key(session_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(messages_key, *encoded)
+                pipe.ltrim(messages_key, -self.max_messages, -1)
+                pipe.expire(messages_key, self.ttl)
+                pipe.hsetnx(summary_key, "created_at", str(now))
+                pipe.hincrby(summary_key, "message_count", len(messages))
+                pipe.hset(
+                    summary_key,
+                    mapping={
+                        "updated_at": now,
+                        "last_role": last.role,
+                        "last_message": last.content[:_PREVIEW_CHARS],
+                        **{k: str(v) for k, v in (context or {}).items()},
+                    },
+                )
+                pipe.expire(summary_key, self.ttl)
+                pipe.zadd(self._index_key, {session_id: now})
+                pipe.expire(self._index_key, self.ttl)
+                pipe.zcard(self._index_key)
+                *_, sessions = await pipe.execute()
+            if sessions > self.max_sessions:
+                await self._evict(sessions - self.max_sessions)
+        except Exception as e:
+            logger.error(f"Session store append failed: {str(e)}")
+
+    async def _evict(self, count: int) -> None:
+        """Drop the ``count`` least recently active sessions"""
+        evicted = await self.redis.zpopmin(self._index_key, count)
+        if not evicted:
+            return
+        keys = []
+        for session_id, _score in evicted:
+            keys += [
+                self._summary_key(session_id.decode()),
+                self._messages_key(session_id.decode()),
+            ]
+        await self.redis.delete(*keys)
+        SESSION_EVICTIONS.inc(len(evicted))
+
+    async def get(self, session_id: str) -> dict[str, Any] | None:
+        """Summary and stored messages of one session"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._summary_key(session_id))
+            pipe.lrange(self._messages_key(session_id), 0, -1)
+            fields, messages = await pipe.execute()
+        if not fields:
+            return None
+        return {
+            **self._summary(session_id, fields),
+            "messages": [orjson.loads(message) for message in messages],
+        }
+
+    async def page(
+        self, cursor: int = 0, count: int = 50
+    ) -> tuple[int, list[dict[str, Any]]]:
+        """One page of session summaries and the cursor of the next (0: done)
+
+        ``count`` is a hint passed to ``ZSCAN``: a page may hold a few more
+        or fewer sessions, and its order is not meaningful.
+        """
+        next_cursor, entries = await self.redis.zscan(
+            self._index_key, cursor, count=count
+        )
+        session_ids = [session_id.decode() for session_id, _score in entries]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hgetall(self._summary_key(session_id))
+            rows = await pipe.execute()
+
+        sessions = []
+        expired = []
+        for session_id, fields in zip(session_ids, rows, strict=True):
+            if fields:
+                sessions.append(self._summary(session_id, fields))
+            else:
+                expired.append(session_id)
+        if expired:
+            # Summary expired by TTL but still indexed; clean up lazily
+            await self.redis.zrem(self._index_key, *expired)
+        return next_cursor, sessions
+
+    async def delete(self, session_id: str) -> bool:
+        """Remove a session; False if it did not exist"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._summary_key(session_id))
+            pipe.delete(self._messages_key(session_id))
+            pipe.zrem(self._index_key, session_id)
+            deleted, _, indexed = await pipe.execute()
+        return bool(deleted or indexed)
+
+    @staticmethod
+    def _summary(session_id: str, fields: dict[bytes, bytes]) -> dict[str, Any]:
+        values = {k.decode(): v.decode() for k, v in fields.items()}
+        return {
+            "session_id": session_id,
+            "message_count": int(values.pop("message_count", 0)),
+            "created_at": float(values.pop("created_at", 0)),
+            "updated_at": float(values.pop("updated_at", 0)),
+            "last_message": {
+                "role": values.pop("last_role", None),
+                "content": values.pop("last_message", ""),
+            },
+            "context": values,
+        }
+
+
+session_store = SessionStore(
+    redis_client,
+    prefix=settings.CACHE_PREFIX,
+    ttl=settings.SESSION_TTL,
+    max_sessions=settings.SESSION_MAX_SESSIONS,
+    max_messages=settings.SESSION_MAX_MESSAGES,
+)
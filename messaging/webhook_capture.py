@@ -0,0 +1,96 @@
+"""Opt-in capture of inbound webhooks for local replay.
+
+With ``WEBHOOK_CAPTURE_PATH`` set, every payload received on ``/webhook`` is
+appended to that file as one JSON line with its arrival time. WhatsApp ids
+(``5511...@s.whatsapp.net``) and bare phone numbers are replaced by stable
+pseudonyms (HMAC of the number with ``WEBHOOK_CAPTURE_SALT``), and contact
+names are dropped, so captures keep their per-phone shape without carrying
+customer identities. Message texts are kept as they are.
+
+Replay a capture with ``python -m benchmarks.replay_webhooks``.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from typing import IO, Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_JID = re.compile(r"\b(\d{8,15})(@s\.whatsapp\.net|@c\.us)\b")
+_PHONE = re.compile(r"^\+?\d{10,15}$")
+# Fields holding contact names rather than ids
+_NAME_FIELDS = frozenset({"pushName", "verifiedBizName", "notifyName"})
+
+
+def pseudonymize_phone(phone: str, salt: bytes) -> str:
+    """Map a phone number to a stable fake one of the same length"""
+    digest = hmac.new(salt, phone.encode(), hashlib.sha256).hexdigest()
+    digits = str(int(digest, 16))
+    # Keep the country code so the number still looks Brazilian to the app
+    return phone[:2] + digits[: max(len(phone) - 2, 0)]
+
+
+def pseudonymize_payload(value: Any, salt: bytes) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: "" if key in _NAME_FIELDS else pseudonymize_payload(item, salt)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [pseudonymize_payload(item, salt) for item in value]
+    if isinstance(value, str):
+        if _PHONE.match(value):
+            return pseudonymize_phone(value.lstrip("+"), salt)
+        return _JID.sub(
+            lambda m: pseudonymize_phone(m.group(1), salt) + m.group(2), value
+        )
+    return value
+
+
+class WebhookCapture:
+    """Append pseudonymized webhook payloads as JSON lines to a local file"""
+
+    def __init__(self, path: str, salt: str = "") -> None:
+        self.path = path
+        if not salt:
+            logger.warning(
+                "WEBHOOK_CAPTURE_SALT is not set; pseudonyms change on restart"
+            )
+        self.salt = salt.encode() if salt else secrets.token_bytes(16)
+        self._lock = threading.Lock()
+        self._file: IO[str] | None = None
+
+    def record(self, payload: dict[str, Any], received_at: float | None = None) -> None:
+        line = json.dumps(
+            {
+                "received_at": time.time() if received_at is None else received_at,
+                "payload": pseudonymize_payload(payload, self.salt),
+            },
+            ensure_ascii=False,
+        )
+        with self._lock:
+            try:
+                file = self._file
+                if file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    file = self._file = open(self.path, "a", encoding="utf-8")
+                file.write(line + "\n")
+                file.flush()
+            except OSError as e:
+                logger.error(f"Error capturing webhook: {str(e)}")
+
+
+webhook_capture = (
+    WebhookCapture(settings.WEBHOOK_CAPTURE_PATH, settings.WEBHOOK_CAPTURE_SALT)
+    if settings.WEBHOOK_CAPTURE_PATH
+    else None
+)
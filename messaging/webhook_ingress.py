@@ -0,0 +1,78 @@
+"""Fast path for inbound Evolution API webhooks.
+
+``/webhook`` receives every event of the instance (receipts, presence,
+media, status updates), but only text messages reach the agent. The raw
+body is screened for text markers before it is parsed at all; text events
+are parsed with orjson, checked for the two fields the pipeline relies on
+(``instance`` and ``data``) instead of building a ``WebhookPayload``, and
+reduced to compact records of the fields the pipeline needs. A payload may
+carry a batch of messages (Evolution API flushes a backlog that way after a
+reconnect); every message is extracted and grouped by chat so that each
+chat's batch becomes a single agent turn.
+"""
+
+from typing import Any
+
+import orjson
+
+from messaging.message_service import MessageService
+
+# Keys that hold message text in the payload shapes MessageService handles
+_TEXT_MARKERS = (b'"conversation"', b'"body"')
+
+
+class InvalidWebhook(ValueError):
+    """The body is not a JSON object with ``instance`` and ``data``"""
+
+
+def may_contain_text(body: bytes) -> bool:
+    """False for events that cannot carry a text message (byte scan only)"""
+    return any(marker in body for marker in _TEXT_MARKERS)
+
+
+def parse_webhook(body: bytes) -> dict[str, Any]:
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise InvalidWebhook(f"Invalid JSON: {e}") from e
+    if not (
+        isinstance(payload, dict)
+        and isinstance(payload.get("instance"), str)
+        and isinstance(payload.get("data"), dict)
+    ):
+        raise InvalidWebhook("Expected an object with 'instance' and 'data'")
+    return payload
+
+
+def extract_text_messages(data: dict[str, Any]) -> list[dict[str, Any]]:
+    """``{"from", "text", "timestamp", "id"}`` of every text message in ``data``"""
+    key = data.get("key")
+    message = data.get("message")
+    if isinstance(key, dict) and isinstance(message, dict):
+        # messages.upsert, by far the most common shape
+        jid = key.get("remoteJid")
+        text = message.get("conversation")
+        if not isinstance(jid, str) or not text:
+            return []
+        return [
+            {
+                "from": jid.replace("@s.whatsapp.net", ""),
+                "text": text,
+                "timestamp": data.get("messageTimestamp"),
+                "id": key.get("id"),
+            }
+        ]
+    return [
+        extracted
+        for extracted in MessageService.extract_messages(data)
+        if extracted.get("text")
+    ]
+
+
+def group_by_chat(messages: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    """Messages per sender phone, in payload order; senderless ones dropped"""
+    chats: dict[str, list[dict[str, Any]]] = {}
+    for message in messages:
+        if message.get("from"):
+            chats.setdefault(message["from"], []).append(message)
+    return chats
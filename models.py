@@ -16,6 +16,7 @@ class SendMessageRequest(BaseModel):
     number: str
     text: str
     options: dict[str, Any] | None = None
+    instance: str | None = None  # Evolution instance; settings default if unset
 
 
 class SendMediaRequest(BaseModel):
@@ -0,0 +1,142 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from redis import Redis
+
+from config import settings
+from shared.metrics import CUSTOMER_CACHE_REQUESTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_NON_DIGIT = re.compile(r"\D+")
+_MISSING = object()
+
+
+def normalize_phone(cellphone: str) -> str:
+    """Digits only, so '+55 (11) 9999-9999' and '551199999999' share a key"""
+    return _NON_DIGIT.sub("", str(cellphone))
+
+
+class CustomerCache:
+    """Bounded TTL + LRU cache of customer records keyed by phone number.
+
+    Values are plain dicts (or None for "no such customer"), so they are
+    safe to share across threads and to store in Redis. "No such customer"
+    is only kept for ``negative_ttl`` seconds (not at all when 0), so a
+    customer created by another process is found soon. The in-process tier
+    is always on; the Redis tier is optional and lets workers share lookups
+    and invalidations. Local entries in other processes still live until
+    their TTL, so keep ``ttl`` short when running several workers.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        redis: Redis | None = None,
+        prefix: str = "customer",
+        negative_ttl: float = 5.0,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self.prefix = prefix
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get_or_load(
+        self, cellphone: str, loader: Callable[[str], dict[str, Any] | None]
+    ) -> dict[str, Any] | None:
+        """Return the cached customer for ``cellphone`` or load and cache it
+
+        ``loader`` gets the normalized phone, the same value used as the key.
+        """
+        key = normalize_phone(cellphone)
+        value = self._get_local(key)
+        if value is not _MISSING:
+            CUSTOMER_CACHE_REQUESTS.labels(result="local_hit").inc()
+            return value
+
+        value = self._get_redis(key)
+        if value is not _MISSING:
+            CUSTOMER_CACHE_REQUESTS.labels(result="redis_hit").inc()
+            ttl = self.ttl if value is not None else self.negative_ttl
+            self._set_local(key, value, ttl)
+            return value
+
+        CUSTOMER_CACHE_REQUESTS.labels(result="miss").inc()
+        value = loader(key)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl > 0:
+            self._set_local(key, value, ttl)
+            self._set_redis(key, value, ttl)
+        return value
+
+    def invalidate(self, *cellphones: str | None) -> None:
+        """Drop cached entries after a customer is created, updated or deleted"""
+        keys = {normalize_phone(c) for c in cellphones if c}
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.redis is not None and keys:
+            try:
+                self.redis.delete(*(self._redis_key(key) for key in keys))
+            except Exception as e:
+                logger.error(f"Error invalidating customer cache: {str(e)}")
+
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: dict[str, Any] | None, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_redis(self, key: str) -> Any:
+        if self.redis is None:
+            return _MISSING
+        try:
+            raw = self.redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.error(f"Error reading customer cache: {str(e)}")
+            return _MISSING
+        return _MISSING if raw is None else json.loads(raw)
+
+    def _set_redis(self, key: str, value: dict[str, Any] | None, ttl: float) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(self._redis_key(key), json.dumps(value), ex=max(int(ttl), 1))
+        except Exception as e:
+            logger.error(f"Error writing customer cache: {str(e)}")
+
+
+customer_cache = CustomerCache(
+    ttl=settings.CUSTOMER_CACHE_TTL,
+    max_entries=settings.CUSTOMER_CACHE_MAX_ENTRIES,
+    redis=Redis.from_url(settings.REDIS_URL) if settings.CUSTOMER_CACHE_REDIS else None,
+    prefix=f"{settings.CACHE_PREFIX}:customer",
+    negative_ttl=settings.CUSTOMER_CACHE_NEGATIVE_TTL,
+)
@@ -0,0 +1,143 @@
+"""Bulk import of customer lists (CSV or XLSX) into the customers table.
+
+Rows are upserted on the phone number in batched transactions, one
+executemany per batch, instead of one INSERT and commit per customer.
+
+Usage:
+    python -m sales.customer_import clientes.xlsx [--batch-size 1000]
+"""
+
+import argparse
+import logging
+import time
+import unicodedata
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import IO, Any
+
+import pandas as pd
+
+from config import settings
+from infrastructure.database.database import SessionLocal, engine
+from sales.customer_cache import normalize_phone
+from sales.customer_migration import DuplicateCustomers, migrate_unique_cellphone
+from sales.customer_model import Base
+from sales.customers_service import CustomerService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Accepted header names (accents and case ignored) for each customer field
+COLUMN_ALIASES = {
+    "name": ("name", "nome", "cliente"),
+    "cellphone": ("cellphone", "phone", "telefone", "celular", "whatsapp", "fone"),
+    "email": ("email", "e-mail"),
+    "address": ("address", "endereco"),
+    "notes": ("notes", "observacoes", "observacao", "obs"),
+}
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    upserted: int
+    skipped: int
+    batches: int
+    seconds: float
+
+
+def _header_key(header: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(header)).encode("ascii", "ignore")
+    return text.decode().strip().lower()
+
+
+def read_customers_file(
+    source: str | IO[bytes], fmt: str | None = None
+) -> pd.DataFrame:
+    """Load a CSV/XLSX customer list with its columns renamed to model fields"""
+    if fmt is None:
+        fmt = "xlsx" if str(source).lower().endswith((".xlsx", ".xls")) else "csv"
+    if fmt == "xlsx":
+        frame = pd.read_excel(source, dtype=str)
+    else:
+        frame = pd.read_csv(source, dtype=str, sep=None, engine="python")
+
+    renames = {}
+    for column in frame.columns:
+        key = _header_key(column)
+        for field, aliases in COLUMN_ALIASES.items():
+            if key in aliases:
+                renames[column] = field
+    frame = frame.rename(columns=renames)
+    missing = {"name", "cellphone"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"Missing customer columns: {', '.join(sorted(missing))}")
+    return frame[[f for f in COLUMN_ALIASES if f in frame.columns]]
+
+
+def iter_customer_rows(frame: pd.DataFrame) -> Iterator[dict[str, Any] | None]:
+    """Clean rows for the upsert; ``None`` for rows without a name or phone"""
+    frame = frame.astype(object).where(frame.notna(), None)
+    for record in frame.to_dict("records"):
+        row = {k: v.strip() if isinstance(v, str) else v for k, v in record.items()}
+        row = {k: v or None for k, v in row.items()}
+        phone = normalize_phone(row["cellphone"] or "")
+        if not row["name"] or not phone:
+            yield None
+            continue
+        row["cellphone"] = phone
+        yield row
+
+
+def import_customers(
+    source: str | IO[bytes],
+    fmt: str | None = None,
+    batch_size: int = settings.CUSTOMERS_IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    """Upsert every customer of a CSV/XLSX file, ``batch_size`` rows per commit"""
+    start = time.perf_counter()
+    frame = read_customers_file(source, fmt)
+    upserted = skipped = batches = 0
+    batch: list[dict[str, Any]] = []
+    with SessionLocal() as db:
+        service = CustomerService(db)
+        for row in iter_customer_rows(frame):
+            if row is None:
+                skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                upserted += service.bulk_upsert_customers(batch)
+                batches += 1
+                batch = []
+        if batch:
+            upserted += service.bulk_upsert_customers(batch)
+            batches += 1
+
+    result = ImportResult(upserted, skipped, batches, time.perf_counter() - start)
+    logger.info(f"Imported customers: {result}")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="CSV or XLSX file with customers")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default=None)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.CUSTOMERS_IMPORT_BATCH_SIZE
+    )
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=engine)
+    try:
+        # The upsert needs the unique phone index
+        migrate_unique_cellphone(engine)
+    except DuplicateCustomers as e:
+        raise SystemExit(str(e)) from e
+    result = import_customers(args.path, args.format, args.batch_size)
+    print(
+        f"{result.upserted} customers upserted in {result.batches} batches, "
+        f"{result.skipped} rows skipped, {result.seconds:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
-from fastapi import Depends
-from sqlalchemy.orm import Session
-
-from infrastructure.database.database import engine, get_db
+from infrastructure.database.async_database import AsyncSessionLocal
+from infrastructure.database.database import SessionLocal, engine
+from sales.customer_cache import customer_cache
 from sales.customer_model import Base
 from sales.customer_schema import Customer, CustomerCreate
-from sales.customers_service import CustomerService
+from sales.customers_service import AsyncCustomerService, CustomerService
 from shared.metrics import instrument
 
 Base.metadata.create_all(bind=engine)
@@ -17,35 +17,83 @@ logger = logging.getLogger(__name__)
 
 
 class CustomerManager:
-    def __init__(self):
-        db_gen = get_db()
-        self.db: Session = next(db_gen)
+    """Customer operations for the API and the agent tools.
+
+    Every operation checks a session out of the pool and returns it when
+    done, so concurrent requests and tool threads never share a session.
+    The sync methods serve the agent tools (run in worker threads); the
+    ``a``-prefixed methods serve async endpoints.
+    """
 
     @instrument
-    def create_customer(self, customer: CustomerCreate, db: Session = Depends(get_db)):
+    def create_customer(self, customer: CustomerCreate):
         try:
-            service = CustomerService(self.db)
-            return service.create_customer(customer)
+            with SessionLocal() as db:
+                return CustomerService(db).create_customer(customer)
         except Exception as e:
             logger.error(f"Error creating customer: {e}")
             raise
 
     @instrument
-    def get_customer(self, cellphone: str, db: Session = Depends(get_db)):
+    def get_customer(self, cellphone: str):
         try:
             logger.info(f"Getting customer with cellphone: {cellphone}")
-            service = CustomerService(self.db)
-            customer = service.get_customer(cellphone)
-            logger.info(f"Retrieved customer: {customer}")
-            return customer
-
+            with SessionLocal() as db:
+                customer = CustomerService(db).get_customer(cellphone)
             if customer is None:
                 logger.info("Customer not found")
+            else:
+                logger.info(f"Retrieved customer: {customer}")
             return customer
         except Exception as e:
             logger.error(f"Error retrieving customer: {e}")
             raise
 
     @instrument
-    async def get_customers(self, skip: int = 0, limit: int = 100) -> Any:
-        return self.db.query(Customer).offset(skip).limit(limit).all()
+    def upsert_customer(self, customer: CustomerCreate):
+        try:
+            with SessionLocal() as db:
+                return CustomerService(db).upsert_customer(customer)
+        except Exception as e:
+            logger.error(f"Error upserting customer: {e}")
+            raise
+
+    @instrument
+    def lookup_customer(self, cellphone: str) -> dict[str, Any] | None:
+        """Read-through cached customer record for the agent tools"""
+
+        # Called with the normalized phone, so the query matches the key
+        def load(phone: str) -> dict[str, Any] | None:
+            customer = self.get_customer(phone)
+            if customer is None:
+                return None
+            return Customer.model_validate(customer, from_attributes=True).model_dump(
+                mode="json"
+            )
+
+        return customer_cache.get_or_load(cellphone, load)
+
+    @instrument
+    async def acreate_customer(self, customer: CustomerCreate) -> Any:
+        async with AsyncSessionLocal() as db:
+            return await AsyncCustomerService(db).create_customer(customer)
+
+    @instrument
+    async def aget_customer(self, cellphone: str) -> Any:
+        async with AsyncSessionLocal() as db:
+            return await AsyncCustomerService(db).get_customer(cellphone)
+
+    @instrument
+    async def get_customers(
+        self, skip: int = 0, limit: int = 100, after_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            return await AsyncCustomerService(db).get_customers(
+                skip=skip, limit=limit, after_id=after_id
+            )
+
+    async def export_customers(self, batch_size: int = 1000) -> AsyncIterator[bytes]:
+        """NDJSON export; the session lives as long as the response stream"""
+        async with AsyncSessionLocal() as db:
+            async for chunk in AsyncCustomerService(db).export_customers(batch_size):
+                yield chunk
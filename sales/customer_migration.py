@@ -0,0 +1,111 @@
+"""One row per customer phone: normalize phones and add the unique index.
+
+``create_all`` does not alter existing tables, so databases created before
+the unique phone index may hold several rows per phone, and phones written
+before they were normalized (``+55 (11) ...``) do not match lookups by
+digits. This migration rewrites every phone to digits only and creates the
+unique index. If that would leave two rows with one phone it refuses to run
+and logs them, unless ``merge`` is set: the rows of each phone are then
+merged into the newest one (fields it lacks are taken from the older ones,
+the earliest ``create_at`` is kept) and the older rows are deleted.
+
+Run it once, explicitly, before starting an upgraded app:
+
+Usage:
+    python -m sales.customer_migration [--merge]
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from infrastructure.database.database import engine
+from sales.customer_cache import normalize_phone
+from sales.customer_model import Base, Customer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MERGED_FIELDS = ("name", "email", "address", "notes", "update_at")
+
+
+class DuplicateCustomers(RuntimeError):
+    """Several rows share a phone and merging was not allowed"""
+
+
+def migrate_unique_cellphone(engine: Engine, merge: bool = False) -> bool:
+    """Normalize phones and create the unique index; False if already done.
+
+    Runs in one transaction: nothing changes when it refuses or fails.
+    """
+    table = Customer.__table__
+    with engine.begin() as conn:
+        existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+        if all(index.name in existing for index in table.indexes):
+            return False
+
+        rows = conn.execute(select(table).order_by(table.c.id)).mappings().all()
+        by_phone: dict[str, list[Any]] = defaultdict(list)
+        for row in rows:
+            by_phone[normalize_phone(row["cellphone"])].append(row)
+        duplicates = {p: group for p, group in by_phone.items() if len(group) > 1}
+        if duplicates and not merge:
+            for phone, group in duplicates.items():
+                ids = ", ".join(str(row["id"]) for row in group)
+                logger.error(f"Customer phone {phone} has rows {ids}")
+            raise DuplicateCustomers(
+                f"{len(duplicates)} phones have several customer rows; "
+                "rerun with --merge to merge them into the newest row"
+            )
+
+        for phone, group in by_phone.items():
+            _merge_rows(conn, phone, group)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    logger.info(f"Migrated {len(rows)} customer rows to {len(by_phone)} unique phones")
+    return True
+
+
+def _merge_rows(conn: Connection, phone: str, group: list[Any]) -> None:
+    table = Customer.__table__
+    newest, older = group[-1], group[:-1]
+    values: dict[str, Any] = {"cellphone": phone}
+    for field in _MERGED_FIELDS:
+        if newest[field] is None:
+            values[field] = next(
+                (row[field] for row in reversed(older) if row[field] is not None),
+                None,
+            )
+    if older:
+        values["create_at"] = min(row["create_at"] for row in group)
+        conn.execute(table.delete().where(table.c.id.in_([row["id"] for row in older])))
+        logger.info(
+            f"Merged customer rows {[row['id'] for row in older]} into "
+            f"{newest['id']} (phone {phone})"
+        )
+    if any(newest[field] != value for field, value in values.items()):
+        conn.execute(table.update().where(table.c.id == newest["id"]).values(values))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="merge rows sharing a phone instead of refusing to run",
+    )
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=engine)
+    try:
+        migrated = migrate_unique_cellphone(engine, merge=args.merge)
+    except DuplicateCustomers as e:
+        raise SystemExit(str(e)) from e
+    print("customers migrated" if migrated else "customers already migrated")
+
+
+if __name__ == "__main__":
+    main()
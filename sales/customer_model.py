@@ -9,7 +9,7 @@ class Customer(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    cellphone = Column(String(20), nullable=False)
+    cellphone = Column(String(20), nullable=False, unique=True, index=True)
     email = Column(String(100), nullable=True)
     address = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
@@ -22,9 +22,14 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=list[Customer])
 @instrument
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_customers(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int | None = None,
+    db: Session = Depends(get_db),
+):
     service = CustomerService(db)
-    return service.get_customers(skip=skip, limit=limit)
+    return service.get_customers(skip=skip, limit=limit, after_id=after_id)
 
 
 @router.get("/{customer_id}", response_model=Customer)
@@ -31,4 +31,4 @@ class Customer(CustomerBase):
     id: int
 
     class Config:
-        orm_mode = True
+        from_attributes = True
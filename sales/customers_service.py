@@ -1,9 +1,15 @@
+import json
 import logging
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import date, datetime
 from typing import Any
 
+from sqlalchemy import Insert, Select, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from sales.customer_cache import customer_cache, normalize_phone
 from sales.customer_model import Customer
 from sales.customer_schema import CustomerCreate, CustomerUpdate
 from shared.metrics import instrument
@@ -12,12 +18,82 @@ from shared.metrics import instrument
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Plain columns instead of ORM entities for listings: no identity map, no
+# per-row object construction and no Pydantic round-trip on the way out
+CUSTOMER_COLUMNS = tuple(Customer.__table__.columns)
+
+
+def customers_page_query(
+    skip: int = 0, limit: int = 100, after_id: int | None = None
+) -> Select:
+    """Page of customer rows ordered by id.
+
+    With ``after_id`` the page is a keyset seek on the primary key, which costs
+    the same at any depth; ``skip`` (OFFSET) is kept for existing callers.
+    """
+    query = select(*CUSTOMER_COLUMNS).order_by(Customer.id).limit(limit)
+    if after_id is not None:
+        return query.where(Customer.id > after_id)
+    return query.offset(skip)
+
+
+def upsert_statement(dialect: str) -> Insert:
+    """``INSERT ... ON CONFLICT (cellphone) DO UPDATE`` for Postgres and SQLite.
+
+    The name always follows the latest value; optional fields are only
+    overwritten when the new row has them, and ``create_at`` is kept.
+    """
+    stmt: postgresql.Insert | sqlite.Insert
+    if dialect == "postgresql":
+        stmt = postgresql.insert(Customer)
+    else:
+        stmt = sqlite.insert(Customer)
+    new = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[Customer.cellphone],
+        set_={
+            "name": new.name,
+            "email": func.coalesce(new.email, Customer.email),
+            "address": func.coalesce(new.address, Customer.address),
+            "notes": func.coalesce(new.notes, Customer.notes),
+            "update_at": new.update_at,
+        },
+    )
+
+
+def customer_row(customer: CustomerCreate | dict[str, Any]) -> dict[str, Any]:
+    """Insert parameters for ``upsert_statement``, stamped with today's date
+
+    The phone is normalized to digits, as lookups and the cache expect.
+    """
+    if isinstance(customer, CustomerCreate):
+        customer = customer.model_dump(exclude={"create_at", "update_at"})
+    today = date.today()
+    return {
+        "name": customer["name"],
+        "cellphone": normalize_phone(customer["cellphone"]),
+        "email": customer.get("email"),
+        "address": customer.get("address"),
+        "notes": customer.get("notes"),
+        "create_at": today,
+        "update_at": today,
+    }
+
+
+def customer_record(row: Any) -> dict[str, Any]:
+    """JSON-ready dict for a row selected with ``CUSTOMER_COLUMNS``"""
+    return {
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in row._mapping.items()
+    }
+
 
 class CustomerService:
     def __init__(self, db: Session):
         self.db = db
 
     def get_customer(self, cellphone: str) -> Any:
+        cellphone = normalize_phone(cellphone)
         return self.db.query(Customer).filter(Customer.cellphone == cellphone).first()
 
     @instrument
@@ -25,13 +101,17 @@ class CustomerService:
         return self.db.query(Customer).filter(Customer.id == id).first()
 
     @instrument
-    def get_customers(self, skip: int = 0, limit: int = 100) -> Any:
-        return self.db.query(Customer).offset(skip).limit(limit).all()
+    def get_customers(
+        self, skip: int = 0, limit: int = 100, after_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        rows = self.db.execute(customers_page_query(skip, limit, after_id))
+        return [customer_record(row) for row in rows]
 
     def create_customer(self, customer: CustomerCreate) -> Customer:
+        cellphone = normalize_phone(customer.cellphone)
         db_customer = Customer(
             name=customer.name,
-            cellphone=customer.cellphone,
+            cellphone=cellphone,
             email=customer.email,
             address=customer.address,
             notes=customer.notes,
@@ -42,19 +122,57 @@ class CustomerService:
         self.db.add(db_customer)
         self.db.commit()
         self.db.refresh(db_customer)
+        customer_cache.invalidate(cellphone)
         return db_customer
 
+    @instrument
+    def upsert_customer(self, customer: CustomerCreate) -> Any:
+        """Create the customer or update the existing row with the same phone"""
+        row = customer_row(customer)
+        stmt = upsert_statement(self.db.get_bind().dialect.name)
+        self.db.execute(stmt, row)
+        self.db.commit()
+        customer_cache.invalidate(row["cellphone"])
+        return self.get_customer(row["cellphone"])
+
+    @instrument
+    def bulk_upsert_customers(self, customers: list[dict[str, Any]]) -> int:
+        """Upsert a batch of customers in one executemany and one commit.
+
+        Rows repeating a phone within the batch are merged first (later
+        values win): Postgres rejects a statement that touches the same
+        conflict key twice.
+        """
+        rows: dict[str, dict[str, Any]] = {}
+        for customer in customers:
+            row = customer_row(customer)
+            previous = rows.get(row["cellphone"])
+            if previous is not None:
+                row = {k: v if v is not None else previous[k] for k, v in row.items()}
+            rows[row["cellphone"]] = row
+        if not rows:
+            return 0
+        stmt = upsert_statement(self.db.get_bind().dialect.name)
+        self.db.execute(stmt, list(rows.values()))
+        self.db.commit()
+        customer_cache.invalidate(*rows)
+        return len(rows)
+
     @instrument
     def update_customer(
         self, customer_id: str, customer: CustomerUpdate
     ) -> Customer | None:
         db_customer = self.get_customer(customer_id)
         if db_customer:
+            previous_cellphone = db_customer.cellphone
             update_data = customer.dict(exclude_unset=True)
+            if update_data.get("cellphone"):
+                update_data["cellphone"] = normalize_phone(update_data["cellphone"])
             for field, value in update_data.items():
                 setattr(db_customer, field, value)
             self.db.commit()
             self.db.refresh(db_customer)
+            customer_cache.invalidate(previous_cellphone, db_customer.cellphone)
         return db_customer
 
     @instrument
@@ -63,5 +181,93 @@ class CustomerService:
         if db_customer:
             self.db.delete(db_customer)
             self.db.commit()
+            customer_cache.invalidate(db_customer.cellphone)
+            return True
+        return False
+
+
+class AsyncCustomerService:
+    """Asyncio counterpart of ``CustomerService`` over an ``AsyncSession``."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_customer(self, cellphone: str) -> Any:
+        result = await self.db.execute(
+            select(Customer)
+            .where(Customer.cellphone == normalize_phone(cellphone))
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    @instrument
+    async def get_customer_by_id(self, id: int) -> Any:
+        return await self.db.get(Customer, id)
+
+    @instrument
+    async def get_customers(
+        self, skip: int = 0, limit: int = 100, after_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        result = await self.db.execute(customers_page_query(skip, limit, after_id))
+        return [customer_record(row) for row in result]
+
+    async def export_customers(self, batch_size: int = 1000) -> AsyncIterator[bytes]:
+        """Every customer as NDJSON, one chunk of ``batch_size`` lines at a time.
+
+        Rows come from a server-side cursor, so memory stays constant however
+        large the table is.
+        """
+        result = await self.db.stream(
+            select(*CUSTOMER_COLUMNS)
+            .order_by(Customer.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(customer_record(row), ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+
+    async def create_customer(self, customer: CustomerCreate) -> Customer:
+        cellphone = normalize_phone(customer.cellphone)
+        db_customer = Customer(
+            name=customer.name,
+            cellphone=cellphone,
+            email=customer.email,
+            address=customer.address,
+            notes=customer.notes,
+            create_at=datetime.now(),
+            update_at=datetime.now(),
+        )
+        self.db.add(db_customer)
+        await self.db.commit()
+        await self.db.refresh(db_customer)
+        customer_cache.invalidate(cellphone)
+        return db_customer
+
+    @instrument
+    async def update_customer(
+        self, customer_id: int, customer: CustomerUpdate
+    ) -> Customer | None:
+        db_customer = await self.get_customer_by_id(customer_id)
+        if db_customer:
+            previous_cellphone = db_customer.cellphone
+            update_data = customer.model_dump(exclude_unset=True)
+            if update_data.get("cellphone"):
+                update_data["cellphone"] = normalize_phone(update_data["cellphone"])
+            for field, value in update_data.items():
+                setattr(db_customer, field, value)
+            await self.db.commit()
+            await self.db.refresh(db_customer)
+            customer_cache.invalidate(previous_cellphone, db_customer.cellphone)
+        return db_customer
+
+    @instrument
+    async def delete_customer(self, customer_id: int) -> bool:
+        db_customer = await self.get_customer_by_id(customer_id)
+        if db_customer:
+            await self.db.delete(db_customer)
+            await self.db.commit()
+            customer_cache.invalidate(db_customer.cellphone)
             return True
         return False
@@ -0,0 +1,147 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from config import settings
+from sales.product_search import ProductIndex
+from shared.metrics import (
+    CATALOG_LOAD_DURATION,
+    CATALOG_RELOADS,
+    CATALOG_SNAPSHOT_AGE,
+    CATALOG_VERSION,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable, versioned view of the product catalog.
+
+    Consumers must treat ``products`` as read-only: the same frame and its
+    search index are shared by every turn that grabbed this snapshot.
+    """
+
+    version: int
+    products: pd.DataFrame
+    index: ProductIndex
+    digest: str
+    mtime: float
+    loaded_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.loaded_at
+
+
+class ProductCatalog:
+    """In-process product catalog loaded once and hot-reloaded on change.
+
+    The file is polled by a background thread; it is only re-parsed when its
+    mtime moves *and* its content hash differs, and the new snapshot replaces
+    the old one with a single reference swap so in-flight turns keep a
+    consistent view.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 30.0) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self._snapshot: CatalogSnapshot | None = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._last_mtime: float | None = None
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Return the active snapshot, loading the catalog on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.reload()
+        return snapshot
+
+    def reload(self, force: bool = False) -> CatalogSnapshot:
+        """Re-read the catalog file if it changed and swap the snapshot"""
+        with self._load_lock:
+            current = self._snapshot
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if not force and current is not None and mtime == self._last_mtime:
+                    return current
+
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                self._last_mtime = mtime
+                if not force and current is not None and digest == current.digest:
+                    CATALOG_RELOADS.labels(result="unchanged").inc()
+                    return current
+
+                start = time.perf_counter()
+                products = pd.read_excel(io.BytesIO(raw))
+                index = ProductIndex(products)
+                CATALOG_LOAD_DURATION.observe(time.perf_counter() - start)
+            except Exception as e:
+                CATALOG_RELOADS.labels(result="error").inc()
+                if current is None:
+                    raise
+                logger.error(f"Error reloading catalog {self.path}: {e}")
+                return current
+
+            snapshot = CatalogSnapshot(
+                version=(current.version + 1) if current else 1,
+                products=products,
+                index=index,
+                digest=digest,
+                mtime=mtime,
+                loaded_at=time.time(),
+            )
+            self._snapshot = snapshot
+            CATALOG_RELOADS.labels(result="loaded").inc()
+            CATALOG_VERSION.set(snapshot.version)
+            logger.info(
+                f"Loaded catalog {self.path} v{snapshot.version} "
+                f"({len(products)} products)"
+            )
+            return snapshot
+
+    def start(self) -> None:
+        """Load the catalog and start the background reload watcher"""
+        self.snapshot()
+        CATALOG_SNAPSHOT_AGE.set(self._snapshot_age())
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="product-catalog-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the background reload watcher"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.reload_interval)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.reload_interval):
+            self.reload()
+            # Refreshed on each check rather than with set_function, which
+            # multiprocess metrics do not export
+            CATALOG_SNAPSHOT_AGE.set(self._snapshot_age())
+
+    def _snapshot_age(self) -> float:
+        snapshot = self._snapshot
+        return snapshot.age if snapshot is not None else 0.0
+
+
+product_catalog = ProductCatalog(
+    settings.CATALOG_PATH, reload_interval=settings.CATALOG_RELOAD_INTERVAL
+)
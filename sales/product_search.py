@@ -0,0 +1,211 @@
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+NAME_COLUMN = "Produto"
+UNIT_COLUMN = "Unidade"
+PRICE_COLUMN = "Valor"
+CATEGORY_COLUMN = "Categoria"
+
+# Portuguese function words that carry no signal in product names or queries
+STOPWORDS = frozenset(
+    {"a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "com"}
+    | {"para", "pra", "um", "uma", "uns", "umas", "no", "na", "nos", "nas"}
+    | {"tem", "quero", "queria", "voces", "vcs", "preco", "quanto", "custa"}
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents (``Feijão`` -> ``feijao``)"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def stem(token: str) -> str:
+    """Very light Portuguese plural folding (``limoes`` -> ``limao``)"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("oes") or token.endswith("aes"):
+        return token[:-3] + "ao"
+    if token.endswith("ns"):
+        return token[:-2] + "m"
+    if token.endswith("is") and len(token) > 4:
+        return token[:-2] + "l"
+    if token.endswith("es") and token[-3] in "rsz":
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into accent-insensitive, plural-folded search terms"""
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall(normalize(text))
+        if token not in STOPWORDS
+    ]
+
+
+def _deletes(term: str) -> set[str]:
+    return {term[:i] + term[i + 1 :] for i in range(len(term))}
+
+
+@dataclass(frozen=True)
+class ProductMatch:
+    row: int
+    score: float
+
+
+class ProductIndex:
+    """Inverted index over the product catalog.
+
+    Built once per catalog snapshot. Lookups combine exact term hits, prefix
+    hits over the sorted vocabulary and single-edit typo hits via a
+    deletion-neighbourhood map, weighted by term rarity. Rows matching the
+    leading word of the query, which usually names the product family
+    (``arroz`` in "arroz tipo 1"), rank above rows matching only qualifiers.
+    """
+
+    def __init__(self, products: pd.DataFrame) -> None:
+        self.products = products
+        self._records: list[dict[str, Any]] = []
+        self._categories: list[str] = []
+        self._postings: dict[str, set[int]] = defaultdict(set)
+
+        has_category = CATEGORY_COLUMN in products.columns
+        for row, item in enumerate(products.to_dict("records")):
+            name = str(item.get(NAME_COLUMN, ""))
+            terms = tokenize(name)
+            if has_category and pd.notna(item.get(CATEGORY_COLUMN)):
+                category_terms = tokenize(item[CATEGORY_COLUMN])
+                category = " ".join(category_terms)
+                terms += category_terms
+            else:
+                # Without an explicit category the product family is the
+                # leading word of the name (ARROZ, FEIJAO, ABACAXI, ...)
+                category = terms[0] if terms else ""
+            for term in terms:
+                self._postings[term].add(row)
+            self._categories.append(category)
+            self._records.append(self._compact(item))
+
+        self._vocabulary = sorted(self._postings)
+        self._idf = {
+            term: math.log(1 + len(self._records) / len(rows))
+            for term, rows in self._postings.items()
+        }
+        self._typo_map: dict[str, set[str]] = defaultdict(set)
+        for term in self._vocabulary:
+            if len(term) >= 4:
+                for variant in _deletes(term):
+                    self._typo_map[variant].add(term)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _compact(item: dict[str, Any]) -> dict[str, Any]:
+        record = {
+            "produto": item.get(NAME_COLUMN),
+            "unidade": item.get(UNIT_COLUMN),
+        }
+        price = item.get(PRICE_COLUMN)
+        if price is None or pd.isna(price):
+            record["valor"] = None
+        else:
+            record["valor"] = round(float(price), 2)
+        return record
+
+    def _expand(self, token: str) -> dict[str, float]:
+        """Map a query token to the vocabulary terms it matches and weights"""
+        matches: dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = EXACT_WEIGHT
+
+        if len(token) >= 3:
+            start = bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_WEIGHT)
+
+        if not matches and len(token) >= 4:
+            candidates: set[str] = set(self._typo_map.get(token, ()))
+            for variant in _deletes(token):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates |= self._typo_map.get(variant, set())
+            for term in candidates:
+                matches.setdefault(term, FUZZY_WEIGHT)
+        return matches
+
+    def search(
+        self, query: str, limit: int = 10, category: str | None = None
+    ) -> list[ProductMatch]:
+        """Return the best matching rows for ``query``, best first"""
+        tokens = tokenize(query)
+        category_terms = tokenize(category) if category else []
+        if not tokens and not category_terms:
+            return []
+
+        # Sizes and quantities ("2kg de feijao") are not the product family
+        head = next((token for token in tokens if token.isalpha()), None)
+        scores: dict[int, float] = defaultdict(float)
+        hits: dict[int, int] = defaultdict(int)
+        head_rows: set[int] = set()
+        for token in tokens:
+            seen: set[int] = set()
+            for term, weight in self._expand(token).items():
+                idf = self._idf[term]
+                for row in self._postings[term]:
+                    scores[row] += weight * idf
+                    if row not in seen:
+                        hits[row] += 1
+                        seen.add(row)
+            if token == head:
+                head_rows |= seen
+
+        if category_terms:
+            allowed = self._category_rows(category_terms)
+            if tokens:
+                scores = {row: s for row, s in scores.items() if row in allowed}
+            else:
+                scores = dict.fromkeys(allowed, 0.0)
+
+        # Rows matching more query tokens win, then rows matching the head
+        # token; shorter names break ties
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (
+                -hits[item[0]],
+                item[0] not in head_rows,
+                -item[1],
+                len(str(self._records[item[0]]["produto"])),
+            ),
+        )
+        return [ProductMatch(row=row, score=score) for row, score in ranked[:limit]]
+
+    def _category_rows(self, category_terms: list[str]) -> set[int]:
+        wanted = " ".join(category_terms)
+        return {
+            row
+            for row, category in enumerate(self._categories)
+            if category.startswith(wanted)
+        }
+
+    def records(self, matches: list[ProductMatch]) -> list[dict[str, Any]]:
+        """Compact row payloads (name, unit, price) for the given matches"""
+        return [self._records[match.row] for match in matches]
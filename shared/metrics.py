@@ -1,9 +1,33 @@
+"""Prometheus metrics shared by the web app and the workers.
+
+With several processes (uvicorn workers, the async worker, RQ work-horses)
+set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory shared by all of them
+*in the process environment* before start-up (prometheus_client picks its
+storage when it is first imported). Every process then writes its samples
+to memory-mapped files there and ``/metrics`` aggregates all of them; gauges
+declare how they are combined across processes. Clear the directory before
+starting the processes, and call ``mark_process_dead`` when one exits.
+"""
+
 import asyncio
+import os
 import time
 from functools import wraps
 
 from fastapi import Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+    "prometheus_multiproc_dir"
+)
 
 # Metrics
 CALL_COUNTER = Counter("function_calls_total", "Total function calls", ["function"])
@@ -11,43 +35,291 @@ DURATION_HISTOGRAM = Histogram(
     "function_duration_seconds", "Function duration seconds", ["function"]
 )
 
+# Reply latency metrics
+REPLY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+REPLY_TIME_TO_FIRST_MESSAGE = Histogram(
+    "reply_time_to_first_message_seconds",
+    "Time from agent turn start to the first outbound message",
+    ["mode"],
+    buckets=REPLY_BUCKETS,
+)
+REPLY_TURN_DURATION = Histogram(
+    "reply_turn_duration_seconds",
+    "Time from agent turn start to the last outbound message",
+    ["mode"],
+    buckets=REPLY_BUCKETS,
+)
+REPLY_MESSAGES_SENT = Counter(
+    "reply_messages_sent_total", "Outbound messages sent per agent reply", ["mode"]
+)
+
+# Response cache metrics
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Response cache lookups by result (hit, miss, bypass, error)",
+    ["result"],
+)
+RESPONSE_CACHE_LLM_SECONDS_AVOIDED = Counter(
+    "response_cache_llm_seconds_avoided_total",
+    "Agent latency avoided by serving answers from the response cache",
+)
+
+# Webhook deduplication metrics
+WEBHOOK_DUPLICATES = Counter(
+    "webhook_duplicates_dropped_total",
+    "Webhook retries dropped by message id",
+    ["source"],
+)
+WEBHOOK_BATCH_MESSAGES = Histogram(
+    "webhook_batch_messages",
+    "Text messages carried by a single webhook payload",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+# Burst coalescing metrics
+BURST_MESSAGES = Counter(
+    "burst_messages_total", "Inbound messages passed through the burst coalescer"
+)
+BURST_LLM_CALLS_SAVED = Counter(
+    "burst_llm_calls_saved_total",
+    "Agent turns avoided by merging rapid-fire messages into one turn",
+)
+BURST_SIZE = Histogram(
+    "burst_size_messages",
+    "Messages merged into a single agent turn",
+    buckets=(1, 2, 3, 4, 5, 8, 13, 20),
+)
+
+# Async worker metrics
+WORKER_JOBS = Counter(
+    "worker_jobs_total", "Conversation turns processed by the async worker", ["result"]
+)
+WORKER_ACTIVE_SESSIONS = Gauge(
+    "worker_active_sessions",
+    "Sessions with queued or running turns in the worker",
+    multiprocess_mode="livesum",
+)
+
+# Conversation session store metrics
+SESSION_EVICTIONS = Counter(
+    "session_store_evictions_total",
+    "Least recently active sessions dropped to stay under SESSION_MAX_SESSIONS",
+)
+
+# Customer cache metrics
+CUSTOMER_CACHE_REQUESTS = Counter(
+    "customer_cache_requests_total",
+    "Customer lookups by phone (local_hit, redis_hit, miss)",
+    ["result"],
+)
+
+# Product catalog metrics
+CATALOG_RELOADS = Counter(
+    "catalog_reloads_total", "Product catalog reload attempts", ["result"]
+)
+CATALOG_LOAD_DURATION = Histogram(
+    "catalog_load_duration_seconds", "Time spent parsing and indexing the catalog"
+)
+# Each process holds its own snapshot; report the stalest one
+CATALOG_SNAPSHOT_AGE = Gauge(
+    "catalog_snapshot_age_seconds",
+    "Seconds since the active catalog was loaded",
+    multiprocess_mode="livemax",
+)
+CATALOG_VERSION = Gauge(
+    "catalog_version",
+    "Version of the active catalog snapshot",
+    multiprocess_mode="livemin",
+)
+
+# Evolution API client metrics
+EVOLUTION_REQUEST_DURATION = Histogram(
+    "evolution_request_duration_seconds",
+    "Evolution API request latency per endpoint, retries included",
+    ["endpoint"],
+)
+EVOLUTION_REQUESTS = Counter(
+    "evolution_requests_total",
+    "Evolution API requests per endpoint and outcome",
+    ["endpoint", "result"],
+)
+EVOLUTION_RETRIES = Counter(
+    "evolution_retries_total", "Evolution API request retries", ["endpoint"]
+)
+EVOLUTION_INFLIGHT_REQUESTS = Gauge(
+    "evolution_inflight_requests",
+    "Evolution API requests currently in flight",
+    multiprocess_mode="livesum",
+)
+EVOLUTION_POOL_CONNECTIONS = Gauge(
+    "evolution_pool_connections",
+    "Connections in the Evolution API client pool by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+# Outbound send scheduling metrics
+OUTBOUND_QUEUE_WAIT = Histogram(
+    "outbound_queue_wait_seconds",
+    "Time an outbound message waited for its instance rate limit",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+OUTBOUND_QUEUE_DEPTH = Gauge(
+    "outbound_queue_depth",
+    "Outbound messages waiting to be sent",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+OUTBOUND_MESSAGES = Counter(
+    "outbound_messages_total",
+    "Outbound messages by priority and result",
+    ["priority", "result"],
+)
+
+# Conversation history compaction metrics
+HISTORY_PROMPT_TOKENS = Histogram(
+    "history_prompt_tokens",
+    "Approximate conversation history tokens at the start of a turn",
+    ["stage"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+HISTORY_COMPACTIONS = Counter(
+    "history_compactions_total", "History compaction passes by result", ["result"]
+)
+
+# LLM prompt cache metrics (as reported by the DeepSeek API)
+LLM_PROMPT_CACHE_HIT_RATIO = Histogram(
+    "llm_prompt_cache_hit_ratio",
+    "Share of each LLM call's prompt tokens served from the context cache",
+    buckets=(0.1, 0.25, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0),
+)
+
+# LLM token usage and cost (see agent/usage_accounting.py)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM API by model and type",
+    ["model", "type"],
+)
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD", ["model"])
+LLM_CALL_PROMPT_TOKENS = Histogram(
+    "llm_call_prompt_tokens",
+    "Prompt tokens of each LLM call",
+    ["model"],
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+LLM_PROMPT_COMPONENT_TOKENS = Histogram(
+    "llm_prompt_component_tokens",
+    "Approximate prompt tokens of each LLM call by prompt component",
+    ["component"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+LLM_TOOL_OUTPUT_TOKENS = Histogram(
+    "llm_tool_output_tokens",
+    "Approximate tokens each tool call adds to the conversation",
+    ["tool"],
+    buckets=(10, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+
+# Per-message pipeline stage metrics (see shared/tracing.py)
+MESSAGE_STAGE_DURATION = Histogram(
+    "message_stage_duration_seconds",
+    "Time an inbound message spent in each pipeline stage",
+    ["stage"],
+    buckets=(
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60
+    ),
+)
+
 
 def instrument(func):
     """Decorator to instrument sync and async functions.
 
     Tracks call count and execution duration (seconds) per function name.
+    Label children are bound once at decoration time, not on every call.
     """
+    calls = CALL_COUNTER.labels(function=func.__name__)
+    duration = DURATION_HISTOGRAM.labels(function=func.__name__)
 
     if asyncio.iscoroutinefunction(func):
 
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            CALL_COUNTER.labels(function=func.__name__).inc()
+            calls.inc()
             start = time.perf_counter()
             try:
                 return await func(*args, **kwargs)
             finally:
-                elapsed = time.perf_counter() - start
-                DURATION_HISTOGRAM.labels(function=func.__name__).observe(elapsed)
+                duration.observe(time.perf_counter() - start)
 
         return async_wrapper
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        CALL_COUNTER.labels(function=func.__name__).inc()
+        calls.inc()
         start = time.perf_counter()
         try:
             return func(*args, **kwargs)
         finally:
-            elapsed = time.perf_counter() - start
-            DURATION_HISTOGRAM.labels(function=func.__name__).observe(elapsed)
+            duration.observe(time.perf_counter() - start)
 
     return wrapper
 
 
 def metrics_endpoint():
     """Wsgi style metrics endpoint for FastAPI registrations."""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    if not MULTIPROC_DIR:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # A fresh registry per scrape: the collector reads every process' files
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """Drop the live gauge samples of an exited process (multiprocess mode)"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid(), path=MULTIPROC_DIR)
 
 
-__all__ = ["instrument", "metrics_endpoint"]
+__all__ = [
+    "BURST_LLM_CALLS_SAVED",
+    "BURST_MESSAGES",
+    "BURST_SIZE",
+    "CATALOG_LOAD_DURATION",
+    "CATALOG_RELOADS",
+    "CATALOG_SNAPSHOT_AGE",
+    "CATALOG_VERSION",
+    "CUSTOMER_CACHE_REQUESTS",
+    "EVOLUTION_INFLIGHT_REQUESTS",
+    "EVOLUTION_POOL_CONNECTIONS",
+    "EVOLUTION_REQUESTS",
+    "EVOLUTION_REQUEST_DURATION",
+    "EVOLUTION_RETRIES",
+    "HISTORY_COMPACTIONS",
+    "HISTORY_PROMPT_TOKENS",
+    "LLM_CALL_PROMPT_TOKENS",
+    "LLM_COST",
+    "LLM_PROMPT_CACHE_HIT_RATIO",
+    "LLM_PROMPT_COMPONENT_TOKENS",
+    "LLM_TOKENS",
+    "LLM_TOOL_OUTPUT_TOKENS",
+    "MESSAGE_STAGE_DURATION",
+    "MULTIPROC_DIR",
+    "OUTBOUND_MESSAGES",
+    "OUTBOUND_QUEUE_DEPTH",
+    "OUTBOUND_QUEUE_WAIT",
+    "REPLY_MESSAGES_SENT",
+    "REPLY_TIME_TO_FIRST_MESSAGE",
+    "REPLY_TURN_DURATION",
+    "RESPONSE_CACHE_LLM_SECONDS_AVOIDED",
+    "RESPONSE_CACHE_REQUESTS",
+    "SESSION_EVICTIONS",
+    "WEBHOOK_BATCH_MESSAGES",
+    "WEBHOOK_DUPLICATES",
+    "WORKER_ACTIVE_SESSIONS",
+    "WORKER_JOBS",
+    "instrument",
+    "mark_process_dead",
+    "metrics_endpoint",
+]
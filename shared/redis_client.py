@@ -0,0 +1,13 @@
+"""Shared asyncio Redis client.
+
+Connections are created lazily, so importing this module never touches
+Redis.
+"""
+
+from redis import asyncio as aioredis
+
+from config import settings
+
+redis_client = aioredis.from_url(settings.REDIS_URL)
+
+__all__ = ["redis_client"]
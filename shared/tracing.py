@@ -0,0 +1,157 @@
+"""Stage-level latency tracing for inbound messages.
+
+Each inbound WhatsApp message gets a trace (id derived from the message id)
+that travels with the conversation turn through the coalescer and the turn
+queue. Code marks pipeline stages with ``stage(...)``; every stage is
+observed in the ``message_stage_duration_seconds`` histogram and, when
+``TRACE_EXPORT_PATH`` is set, written as an OpenTelemetry-style span (one
+JSON object per line) so a single slow reply can be inspected stage by stage.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any
+
+from config import settings
+from shared.metrics import MESSAGE_STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TraceContext:
+    trace_id: str
+    message_ids: list[str] = field(default_factory=list)
+    received_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def for_message(cls, message_id: str | None) -> "TraceContext":
+        seed = message_id or uuid.uuid4().hex
+        return cls(
+            trace_id=hashlib.md5(seed.encode()).hexdigest(),
+            message_ids=[message_id] if message_id else [],
+        )
+
+    @classmethod
+    def merge(cls, traces: list["TraceContext"]) -> "TraceContext":
+        """One trace for a coalesced burst, timed from its first message"""
+        first = min(traces, key=lambda t: t.received_at)
+        ids = [message_id for t in traces for message_id in t.message_ids]
+        return cls(first.trace_id, ids, first.received_at)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> "TraceContext | None":
+        return cls(**data) if data else None
+
+
+class SpanFileExporter:
+    """Append finished spans as JSON lines to a local file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: IO[str] | None = None
+
+    def export(self, span: dict[str, Any]) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            try:
+                file = self._file
+                if file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    file = self._file = open(self.path, "a", encoding="utf-8")
+                file.write(line)
+                file.flush()
+            except OSError as e:
+                logger.error(f"Error exporting span: {str(e)}")
+
+
+_trace: ContextVar[TraceContext | None] = ContextVar("trace", default=None)
+_parent_span: ContextVar[str | None] = ContextVar("parent_span", default=None)
+exporter = (
+    SpanFileExporter(settings.TRACE_EXPORT_PATH) if settings.TRACE_EXPORT_PATH else None
+)
+
+
+def current_trace() -> TraceContext | None:
+    return _trace.get()
+
+
+@contextmanager
+def use_trace(trace: TraceContext | None) -> Iterator[None]:
+    """Make ``trace`` the parent of stages recorded in this context"""
+    token = _trace.set(trace)
+    try:
+        yield
+    finally:
+        _trace.reset(token)
+
+
+def _export(
+    name: str,
+    span_id: str,
+    parent_id: str | None,
+    start: float,
+    end: float,
+    attributes: dict[str, Any],
+    error: BaseException | None = None,
+) -> None:
+    trace = _trace.get()
+    if exporter is None or trace is None:
+        return
+    exporter.export(
+        {
+            "trace_id": trace.trace_id,
+            "span_id": span_id,
+            "parent_span_id": parent_id,
+            "name": name,
+            "start_time_unix_nano": int(start * 1e9),
+            "end_time_unix_nano": int(end * 1e9),
+            "attributes": {"message.ids": trace.message_ids, **attributes},
+            "status": (
+                {"code": "ERROR", "message": str(error)} if error else {"code": "OK"}
+            ),
+        }
+    )
+
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a pipeline stage; nested stages become child spans"""
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _parent_span.get()
+    token = _parent_span.set(span_id)
+    start_wall, start = time.time(), time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _parent_span.reset(token)
+        elapsed = time.perf_counter() - start
+        MESSAGE_STAGE_DURATION.labels(stage=name).observe(elapsed)
+        end_wall = start_wall + elapsed
+        _export(name, span_id, parent_id, start_wall, end_wall, attributes, error)
+
+
+def record_stage(
+    name: str, start: float, end: float | None = None, **attributes: Any
+) -> None:
+    """Record a stage measured in wall-clock time, e.g. across processes"""
+    end = time.time() if end is None else end
+    MESSAGE_STAGE_DURATION.labels(stage=name).observe(max(end - start, 0.0))
+    _export(name, uuid.uuid4().hex[:16], _parent_span.get(), start, end, attributes)
@@ -0,0 +1,292 @@
+"""Long-lived asyncio worker for conversation turns.
+
+Replaces the RQ path (one forked work-horse, a fresh ``MCPClient`` and two
+``asyncio.run`` calls per message) with a single process that pulls turns
+from a Redis list and runs up to ``WORKER_CONCURRENCY`` of them at once on one
+event loop, reusing the HTTP, database and LLM clients.
+
+Turns for the same session run strictly in arrival order: each session gets
+its own lane that is drained sequentially, while different sessions run in
+parallel. That ordering only holds with a single consumer, so a worker only
+pulls jobs while it holds the queue's consumer lease; extra worker processes
+wait as standbys and take over when the active one stops or dies. Scale with
+``WORKER_CONCURRENCY``.
+
+A job moves from the queue to a processing list when it is pulled and is
+removed from there once its turn has run. Jobs left in the processing list by
+a worker that crashed or was killed mid-turn are put back at the head of the
+queue when the next worker takes the lease, so they are retried rather than
+lost (a turn may then run twice).
+
+Usage:
+    python -m tasks.async_worker
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import orjson
+from redis import asyncio as aioredis
+
+from config import settings
+from shared.metrics import WORKER_ACTIVE_SESSIONS, WORKER_JOBS, mark_process_dead
+from shared.redis_client import redis_client
+from shared.tracing import TraceContext, record_stage, use_trace
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TurnHandler = Callable[[str, list[str], dict[str, Any] | None], Awaitable[None]]
+
+
+class TurnQueue:
+    """Redis list of pending conversation turns (LPUSH in, BLMOVE out).
+
+    Pulled jobs wait in ``{key}:processing`` until acknowledged; the consumer
+    lease ``{key}:consumer`` names the one worker allowed to pull.
+    """
+
+    def __init__(self, redis: aioredis.Redis, key: str, lease_ttl: int = 30) -> None:
+        self.redis = redis
+        self.key = key
+        self.lease_ttl = lease_ttl
+        self.processing_key = f"{key}:processing"
+        self.lease_key = f"{key}:consumer"
+
+    async def put(
+        self,
+        phone_number: str,
+        texts: list[str],
+        trace: dict[str, Any] | None = None,
+    ) -> None:
+        job = {
+            "phone_number": phone_number,
+            "texts": texts,
+            "enqueued_at": time.time(),
+            "trace": trace,
+        }
+        await self.redis.lpush(self.key, orjson.dumps(job))
+
+    async def get(self, timeout: float = 1.0) -> tuple[bytes, dict[str, Any]] | None:
+        """Next job and its raw encoding (needed to ``ack`` it)"""
+        raw = await self.redis.blmove(
+            self.key, self.processing_key, timeout, "RIGHT", "LEFT"
+        )
+        # None on timeout
+        if not isinstance(raw, bytes):
+            return None
+        return raw, orjson.loads(raw)
+
+    async def ack(self, raw: bytes) -> None:
+        await self.redis.lrem(self.processing_key, 1, raw)
+
+    async def hold_lease(self, consumer_id: str) -> bool:
+        """Take or renew the consumer lease; False while another worker has it"""
+        if await self.redis.set(
+            self.lease_key, consumer_id, nx=True, ex=self.lease_ttl
+        ):
+            return True
+        if await self.redis.get(self.lease_key) == consumer_id.encode():
+            await self.redis.expire(self.lease_key, self.lease_ttl)
+            return True
+        return False
+
+    async def release_lease(self, consumer_id: str) -> None:
+        if await self.redis.get(self.lease_key) == consumer_id.encode():
+            await self.redis.delete(self.lease_key)
+
+    async def requeue_unacked(self) -> int:
+        """Put jobs of a dead consumer back where the next pull takes them"""
+        count = 0
+        # Newest first onto the consumer end, so the oldest is pulled first
+        while await self.redis.lmove(
+            self.processing_key, self.key, "LEFT", "RIGHT"
+        ):
+            count += 1
+        return count
+
+
+class AsyncTurnWorker:
+    """Consume a ``TurnQueue`` with bounded concurrency and per-session order."""
+
+    def __init__(
+        self, queue: TurnQueue, handler: TurnHandler, concurrency: int = 20
+    ) -> None:
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self._running = asyncio.Semaphore(concurrency)
+        # Bounds how many jobs are pulled off Redis but not finished yet, so a
+        # backlog stays in Redis instead of in this process' memory.
+        self._inflight = asyncio.Semaphore(concurrency * 2)
+        self._lanes: dict[str, deque[tuple[bytes, dict[str, Any]]]] = {}
+        self._lane_tasks: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._leased = asyncio.Event()
+        self.consumer_id = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+    async def run(self) -> None:
+        """Pull jobs until ``stop`` is called, then finish in-flight turns"""
+        logger.info(f"Async worker {self.consumer_id} for {self.queue.key}")
+        lease_keeper = asyncio.create_task(self._keep_lease())
+        try:
+            while not self._stopping.is_set():
+                if not self._leased.is_set():
+                    try:
+                        await asyncio.wait_for(self._leased.wait(), 1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._inflight.acquire()
+                try:
+                    pulled = await self.queue.get(timeout=1.0)
+                except Exception as e:
+                    self._inflight.release()
+                    logger.error(f"Error reading turn queue: {str(e)}")
+                    await self._pause(1.0)
+                    continue
+                if pulled is None:
+                    self._inflight.release()
+                    continue
+                self._dispatch(*pulled)
+
+            if self._lane_tasks:
+                await asyncio.gather(*self._lane_tasks, return_exceptions=True)
+        finally:
+            lease_keeper.cancel()
+            await asyncio.gather(lease_keeper, return_exceptions=True)
+            try:
+                await self.queue.release_lease(self.consumer_id)
+            except Exception as e:
+                logger.error(f"Error releasing consumer lease: {str(e)}")
+
+    async def _keep_lease(self) -> None:
+        """Take the consumer lease when free and renew it while running"""
+        while True:
+            try:
+                await self._renew_lease()
+            except Exception as e:
+                logger.error(f"Error renewing consumer lease: {str(e)}")
+                self._leased.clear()
+            await asyncio.sleep(self.queue.lease_ttl / 3)
+
+    async def _renew_lease(self) -> None:
+        held = await self.queue.hold_lease(self.consumer_id)
+        if held and not self._leased.is_set():
+            # Jobs in the processing list belong to a previous consumer,
+            # unless this worker still runs turns from before a lease lapse
+            if not self._lanes:
+                requeued = await self.queue.requeue_unacked()
+                if requeued:
+                    logger.warning(f"Requeued {requeued} unacknowledged turns")
+            logger.info(f"Consuming {self.queue.key} x{self.concurrency}")
+            self._leased.set()
+        elif not held and self._leased.is_set():
+            logger.warning(f"Lost the consumer lease of {self.queue.key}")
+            self._leased.clear()
+        elif not held:
+            logger.info(f"Standing by: another worker consumes {self.queue.key}")
+
+    async def _pause(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _dispatch(self, raw: bytes, job: dict[str, Any]) -> None:
+        key = job["phone_number"]
+        lane = self._lanes.get(key)
+        if lane is not None:
+            lane.append((raw, job))
+            return
+
+        self._lanes[key] = deque([(raw, job)])
+        WORKER_ACTIVE_SESSIONS.set(len(self._lanes))
+        task = asyncio.create_task(self._drain_lane(key))
+        self._lane_tasks.add(task)
+        task.add_done_callback(self._lane_tasks.discard)
+
+    async def _drain_lane(self, key: str) -> None:
+        lane = self._lanes[key]
+        try:
+            while lane:
+                raw, job = lane.popleft()
+                trace = job.get("trace")
+                try:
+                    async with self._running:
+                        with use_trace(TraceContext.from_dict(trace)):
+                            record_stage("queue_wait", job["enqueued_at"])
+                        await self.handler(job["phone_number"], job["texts"], trace)
+                    WORKER_JOBS.labels(result="success").inc()
+                except Exception as e:
+                    WORKER_JOBS.labels(result="error").inc()
+                    logger.error(f"Error processing turn for {key}: {str(e)}")
+                finally:
+                    self._inflight.release()
+                await self._ack(raw)
+        finally:
+            del self._lanes[key]
+            WORKER_ACTIVE_SESSIONS.set(len(self._lanes))
+
+    async def _ack(self, raw: bytes) -> None:
+        try:
+            await self.queue.ack(raw)
+        except Exception as e:
+            logger.error(f"Error acknowledging turn job: {str(e)}")
+
+
+turn_queue = TurnQueue(
+    redis_client, key=settings.TURN_QUEUE_KEY, lease_ttl=settings.WORKER_LEASE_SECONDS
+)
+
+
+async def main() -> None:
+    from agent.deepseek_langchain_service import deepseek_lc_service
+    from infrastructure.database.async_database import async_engine
+    from messaging.evolution_client import evolution_client
+    from messaging.outbound_dispatcher import outbound_dispatcher
+    from sales.product_catalog import product_catalog
+    from tasks.conversation import process_conversation_turn
+
+    product_catalog.start()
+    await evolution_client.open()
+    outbound_dispatcher.start()
+    await deepseek_lc_service.open()
+    worker = AsyncTurnWorker(
+        turn_queue, process_conversation_turn, settings.WORKER_CONCURRENCY
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await outbound_dispatcher.stop()
+        await deepseek_lc_service.close()
+        await evolution_client.close()
+        await async_engine.dispose()
+        product_catalog.stop()
+        await turn_queue.redis.close()
+        mark_process_dead()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
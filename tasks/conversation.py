@@ -0,0 +1,154 @@
+"""Conversation turn processing shared by the web app and the queue workers.
+
+Kept free of FastAPI imports so workers can run turns without building the
+application.
+"""
+
+import logging
+import time
+from typing import Any
+
+from agent.mcp_client import mcp_client
+from agent.response_cache import response_cache
+from config import settings
+from messaging.outbound_dispatcher import outbound_dispatcher
+from messaging.session_store import session_store
+from models import MCPMessage, MCPRequest, SendMessageRequest
+from shared.metrics import (
+    REPLY_MESSAGES_SENT,
+    REPLY_TIME_TO_FIRST_MESSAGE,
+    REPLY_TURN_DURATION,
+)
+from shared.tracing import TraceContext, record_stage, stage, use_trace
+
+logger = logging.getLogger(__name__)
+
+
+async def process_conversation_turn(
+    phone_number: str, texts: list[str], trace: dict[str, Any] | None = None
+) -> None:
+    """Run one agent turn for one or more messages from the same phone"""
+    context = TraceContext.from_dict(trace)
+    with use_trace(context), stage("turn", messages=len(texts)):
+        await _process_conversation_turn(phone_number, texts)
+    if context is not None:
+        with use_trace(context):
+            record_stage("end_to_end", context.received_at)
+
+
+async def _process_conversation_turn(phone_number: str, texts: list[str]) -> None:
+    try:
+        # Get or create conversation session
+        session_id = f"whatsapp_{phone_number}"
+
+        mcp_request = MCPRequest(
+            messages=[MCPMessage(content=text, role="user") for text in texts],
+            session_id=session_id,
+            context={"platform": "whatsapp", "phone_number": phone_number},
+        )
+        await session_store.append(
+            session_id, mcp_request.messages, mcp_request.context
+        )
+
+        # Stateless single questions (address, opening hours, payment
+        # methods) may be answered from the response cache without an agent
+        # turn
+        question = texts[0] if settings.CACHE_ENABLED and len(texts) == 1 else None
+        if question:
+            answer = await send_cached_reply(question, phone_number)
+            if answer is not None:
+                await record_reply(session_id, answer)
+                return
+
+        if settings.STREAM_REPLIES:
+            reply = await stream_reply(mcp_request, phone_number, question)
+            await record_reply(session_id, reply)
+            return
+
+        start = time.perf_counter()
+        # Get response from MCP server
+        mcp_response = await mcp_client.send_message(mcp_request)
+        if question and not _used_tools(mcp_response.context):
+            await response_cache.record(
+                question, mcp_response.response, time.perf_counter() - start
+            )
+
+        # Send response back via Evolution API
+        send_request = SendMessageRequest(
+            number=phone_number, text=mcp_response.response
+        )
+
+        await outbound_dispatcher.send(send_request)
+        elapsed = time.perf_counter() - start
+        REPLY_TIME_TO_FIRST_MESSAGE.labels(mode="single").observe(elapsed)
+        REPLY_TURN_DURATION.labels(mode="single").observe(elapsed)
+        REPLY_MESSAGES_SENT.labels(mode="single").inc()
+        await record_reply(session_id, mcp_response.response)
+        # logger.info(f"Response sent to {phone_number}")
+
+    except Exception as e:
+        logger.error(f"Error processing webhook message: {str(e)}")
+        logger.info(f"phone_number: {phone_number}")
+        send_request = SendMessageRequest(
+            number=str(phone_number), text=f"erro ao acessar o  agente => {str(e)}"
+        )
+        response = await outbound_dispatcher.send(send_request)
+        logger.error(f"message{response} sent to {phone_number}")
+
+
+async def record_reply(session_id: str, text: str) -> None:
+    if text:
+        await session_store.append(
+            session_id, [MCPMessage(content=text, role="assistant")]
+        )
+
+
+def _used_tools(turn: dict[str, Any] | None) -> bool:
+    # Tool results (customer records, orders, stock) make a reply personal;
+    # when unknown, assume they were used
+    return turn is None or turn.get("used_tools", True)
+
+
+async def send_cached_reply(question: str, phone_number: str) -> str | None:
+    """Answer from the response cache; return None on a cache miss"""
+    cached = await response_cache.lookup(question)
+    if cached is None:
+        return None
+    start = time.perf_counter()
+    await outbound_dispatcher.send(
+        SendMessageRequest(number=phone_number, text=cached.answer)
+    )
+    elapsed = time.perf_counter() - start
+    REPLY_TIME_TO_FIRST_MESSAGE.labels(mode="cache").observe(elapsed)
+    REPLY_TURN_DURATION.labels(mode="cache").observe(elapsed)
+    REPLY_MESSAGES_SENT.labels(mode="cache").inc()
+    return cached.answer
+
+
+async def stream_reply(
+    mcp_request: MCPRequest, phone_number: str, question: str | None = None
+) -> str:
+    """Send the agent reply chunk by chunk, in order, as it is generated
+
+    Returns the whole reply (empty if the agent produced no text).
+    """
+    start = time.perf_counter()
+    chunks: list[str] = []
+    turn: dict[str, Any] = {}
+    async for chunk in mcp_client.stream_message(mcp_request, turn):
+        await outbound_dispatcher.send(
+            SendMessageRequest(number=phone_number, text=chunk)
+        )
+        if not chunks:
+            REPLY_TIME_TO_FIRST_MESSAGE.labels(mode="stream").observe(
+                time.perf_counter() - start
+            )
+        chunks.append(chunk)
+    reply = "\n\n".join(chunks)
+    if chunks:
+        elapsed = time.perf_counter() - start
+        REPLY_TURN_DURATION.labels(mode="stream").observe(elapsed)
+        REPLY_MESSAGES_SENT.labels(mode="stream").inc(len(chunks))
+        if question and not _used_tools(turn):
+            await response_cache.record(question, reply, elapsed)
+    return reply
@@ -9,10 +9,11 @@ from __future__ import annotations
 import asyncio
 from typing import Any
 
-from agent.mcp_client import MCPClient
 from messaging.evolution_client import evolution_client
 from messaging.message_service import message_service
-from models import MCPMessage, MCPRequest, SendMessageRequest
+from messaging.webhook_ingress import group_by_chat
+from models import SendMessageRequest
+from tasks.conversation import process_conversation_turn
 
 
 def send_message_task(
@@ -39,32 +40,28 @@ def process_webhook_task(payload: dict[str, Any]) -> bool:
     """Process an incoming webhook payload and forward to MCP, then reply.
 
     This mirrors the logic in `main.process_webhook_message` but is safe
-    to import from within an RQ worker process.
+    to import from within an RQ worker process. Prefer the long-lived
+    `tasks.async_worker`, which avoids a fresh event loop per job.
     """
 
     # Extract message data (sync function)
-    message_data = message_service.extract_message_data(payload.get("data", payload))
-
-    if not message_data or not message_data.get("text"):
-        return False
-
-    phone_number = message_data.get("from")
-    if not phone_number:
+    messages = [
+        message
+        for message in message_service.extract_messages(payload.get("data", payload))
+        if message.get("text")
+    ]
+    chats = group_by_chat(messages)
+    if not chats:
         return False
 
-    session_id = f"whatsapp_{phone_number}"
-
-    mcp_req = MCPRequest(
-        messages=[MCPMessage(content=message_data["text"], role="user")],
-        session_id=session_id,
-        context={"platform": "whatsapp", "phone_number": phone_number},
-    )
-
-    mcp_client = MCPClient()
-    mcp_response = asyncio.run(mcp_client.send_message(mcp_req))
+    async def process_chats() -> None:
+        # One turn per chat, on a single event loop for the whole payload
+        for phone_number, chat in chats.items():
+            await process_conversation_turn(
+                phone_number, [message["text"] for message in chat]
+            )
 
-    send_req = SendMessageRequest(number=phone_number, text=mcp_response.response)
-    asyncio.run(evolution_client.send_message(send_req))
+    asyncio.run(process_chats())
 
     return True
 
@@ -0,0 +1,34 @@
+"""RQ worker that cleans up the Prometheus samples of its processes.
+
+RQ runs every job in a forked work-horse that leaves with ``os._exit()``, so
+no shutdown code of ours runs there. In multiprocess mode (see
+``shared/metrics.py``) the live gauge samples of each exited horse would
+stay in ``PROMETHEUS_MULTIPROC_DIR`` and keep being summed. This worker
+marks the horse dead once its job is done, and itself on shutdown.
+
+Usage:
+    rq worker --worker-class tasks.rq_worker.MetricsWorker
+"""
+
+from rq import Queue, Worker
+from rq.job import Job
+
+from shared.metrics import mark_process_dead
+
+
+class MetricsWorker(Worker):
+    def perform_job(self, job: Job, queue: Queue) -> bool:
+        try:
+            return super().perform_job(job, queue)
+        finally:
+            # The horse exits right after this returns
+            if self.is_horse:
+                mark_process_dead()
+
+    def teardown(self) -> None:
+        super().teardown()
+        if not self.is_horse:
+            mark_process_dead()
+
+
+__all__ = ["MetricsWorker"]
@@ -1,14 +1,19 @@
 """Pytest configuration and fixtures."""
 
 import asyncio
+import os
 from unittest.mock import AsyncMock
 
 import pytest
-from fastapi.testclient import TestClient
 
-from agent.mcp_client import MCPClient
-from main import app
-from messaging.evolution_client import EvolutionClient
+# The agent module asks for the key interactively when it is missing
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from agent.mcp_client import MCPClient  # noqa: E402
+from main import app  # noqa: E402
+from messaging.evolution_client import EvolutionClient  # noqa: E402
 
 
 @pytest.fixture
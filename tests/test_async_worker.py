@@ -0,0 +1,105 @@
+"""Tests for the Redis turn queue and the async turn worker."""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from tasks.async_worker import AsyncTurnWorker, TurnQueue
+
+
+@pytest.fixture
+def queue():
+    return TurnQueue(fakeredis.FakeAsyncRedis(), key="test:turns", lease_ttl=3)
+
+
+async def run_until(worker, condition, timeout=2.0):
+    task = asyncio.create_task(worker.run())
+    try:
+        async with asyncio.timeout(timeout):
+            while not condition():
+                await asyncio.sleep(0.01)
+    finally:
+        worker.stop()
+        await task
+
+
+async def test_job_stays_in_processing_until_acked(queue):
+    await queue.put("5511", ["oi"])
+    raw, job = await queue.get(timeout=0.1)
+    assert job["texts"] == ["oi"]
+    assert await queue.redis.llen(queue.processing_key) == 1
+
+    await queue.ack(raw)
+    assert await queue.redis.llen(queue.processing_key) == 0
+
+
+async def test_worker_acks_finished_and_failed_turns(queue):
+    handled = []
+
+    async def handler(phone, texts, trace):
+        handled.append(texts)
+        if texts == ["boom"]:
+            raise RuntimeError("boom")
+
+    await queue.put("5511", ["oi"])
+    await queue.put("5522", ["boom"])
+    worker = AsyncTurnWorker(queue, handler, concurrency=2)
+    await run_until(worker, lambda: len(handled) == 2)
+
+    assert await queue.redis.llen(queue.key) == 0
+    assert await queue.redis.llen(queue.processing_key) == 0
+
+
+async def test_unacked_jobs_of_a_dead_worker_are_retried_in_order(queue):
+    for text in ("1", "2", "3"):
+        await queue.put("5511", [text])
+    # A worker took the lease, pulled two jobs and died without acking them
+    assert await queue.hold_lease("dead-worker")
+    await queue.get(timeout=0.1)
+    await queue.get(timeout=0.1)
+    await queue.redis.delete(queue.lease_key)  # the lease expired
+
+    handled = []
+
+    async def handler(phone, texts, trace):
+        handled.append(texts[0])
+
+    worker = AsyncTurnWorker(queue, handler)
+    await run_until(worker, lambda: len(handled) == 3)
+    assert handled == ["1", "2", "3"]
+    assert await queue.redis.llen(queue.processing_key) == 0
+
+
+async def test_second_worker_waits_while_the_lease_is_held(queue):
+    assert await queue.hold_lease("active-worker")
+    await queue.put("5511", ["oi"])
+    handled = []
+
+    async def handler(phone, texts, trace):
+        handled.append(texts)
+
+    standby = AsyncTurnWorker(queue, handler)
+    task = asyncio.create_task(standby.run())
+    await asyncio.sleep(0.2)
+    assert handled == []
+    assert await queue.redis.llen(queue.key) == 1
+
+    standby.stop()
+    await task
+    assert await queue.redis.get(queue.lease_key) == b"active-worker"
+
+
+async def test_turns_of_one_session_run_in_order(queue):
+    handled = []
+
+    async def handler(phone, texts, trace):
+        await asyncio.sleep(0.01 if texts == ["1"] else 0)
+        handled.append((phone, texts[0]))
+
+    for text in ("1", "2", "3"):
+        await queue.put("5511", [text])
+    await queue.put("5522", ["x"])
+    worker = AsyncTurnWorker(queue, handler, concurrency=4)
+    await run_until(worker, lambda: len(handled) == 4)
+    assert [text for phone, text in handled if phone == "5511"] == ["1", "2", "3"]
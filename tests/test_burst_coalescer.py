@@ -0,0 +1,88 @@
+"""Tests for merging rapid-fire messages in Redis."""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from messaging.burst_coalescer import BurstCoalescer
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+def coalescer(redis, flushed, window=0.05, max_wait=1.0):
+    async def on_flush(key, items):
+        flushed.append((key, items))
+
+    return BurstCoalescer(
+        redis, prefix="test", window=window, max_wait=max_wait, on_flush=on_flush
+    )
+
+
+async def test_burst_is_flushed_once_after_the_window(redis):
+    flushed = []
+    burst = coalescer(redis, flushed)
+    await burst.add("5511", {"text": "oi"})
+    await burst.add_many("5511", [{"text": "tem arroz?"}, {"text": "5kg"}])
+    assert await burst.flush_due() == 0
+
+    await asyncio.sleep(0.06)
+    assert await burst.flush_due() == 1
+    assert await burst.flush_due() == 0
+    assert flushed == [
+        ("5511", [{"text": "oi"}, {"text": "tem arroz?"}, {"text": "5kg"}])
+    ]
+
+
+async def test_max_wait_caps_a_burst_that_keeps_growing(redis):
+    flushed = []
+    burst = coalescer(redis, flushed, window=0.05, max_wait=0.12)
+    for i in range(6):
+        await burst.add("5511", {"text": str(i)})
+        await burst.flush_due()
+        await asyncio.sleep(0.03)
+    await asyncio.sleep(0.06)
+    await burst.flush_due()
+    assert len(flushed) >= 2
+    assert [item["text"] for _, items in flushed for item in items] == list("012345")
+
+
+async def test_pending_burst_survives_a_restart(redis):
+    flushed = []
+    await coalescer(redis, []).add("5511", {"text": "oi"})
+
+    # A new process (same Redis) flushes what the old one buffered
+    await asyncio.sleep(0.06)
+    assert await coalescer(redis, flushed).flush_due() == 1
+    assert flushed == [("5511", [{"text": "oi"}])]
+
+
+async def test_one_phone_is_merged_across_workers(redis):
+    flushed = []
+    first, second = coalescer(redis, flushed), coalescer(redis, flushed)
+    await first.add("5511", {"text": "oi"})
+    await second.add("5511", {"text": "tudo bem?"})
+
+    await asyncio.sleep(0.06)
+    assert sum(await asyncio.gather(first.flush_due(), second.flush_due())) == 1
+    assert flushed == [("5511", [{"text": "oi"}, {"text": "tudo bem?"}])]
+
+
+async def test_polling_loop_flushes_and_stops(redis):
+    flushed = []
+    burst = coalescer(redis, flushed)
+    burst.poll_interval = 0.01
+    burst.start()
+    await burst.add("5511", {"text": "oi"})
+    await asyncio.sleep(0.15)
+    await burst.stop()
+    assert flushed == [("5511", [{"text": "oi"}])]
+
+
+async def test_zero_window_flushes_immediately(redis):
+    flushed = []
+    await coalescer(redis, flushed, window=0).add("5511", {"text": "oi"})
+    assert flushed == [("5511", [{"text": "oi"}])]
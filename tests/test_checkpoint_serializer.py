@@ -0,0 +1,26 @@
+"""Tests for compressed LangGraph checkpoints."""
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agent.checkpoint_serializer import CompressedSerializer
+
+STATE = {"messages": [HumanMessage(content="tem arroz tipo 1? " * 100)]}
+
+
+def test_large_values_are_compressed_and_load_back():
+    serde = CompressedSerializer(codec="zlib", min_size=64)
+    type_, data = serde.dumps_typed(STATE)
+    assert type_.endswith("+zlib")
+    assert serde.loads_typed((type_, data)) == STATE
+
+    # Blobs written without compression still load
+    plain = CompressedSerializer(codec="none")
+    type_, data = plain.dumps_typed(STATE)
+    assert "+" not in type_
+    assert serde.loads_typed((type_, data)) == STATE
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match="lz4"):
+        CompressedSerializer(codec="lz4")
@@ -0,0 +1,55 @@
+"""Tests for the customer record cache."""
+
+import time
+
+from sales.customer_cache import CustomerCache
+from sales.customer_management import CustomerManager
+
+
+def test_loader_gets_the_normalized_key():
+    cache = CustomerCache(ttl=60, max_entries=10)
+    loaded = []
+
+    def load(phone):
+        loaded.append(phone)
+        return {"cellphone": phone}
+
+    assert cache.get_or_load("+55 (11) 99999-0000", load) == {
+        "cellphone": "5511999990000"
+    }
+    # Another spelling of the same phone is a hit
+    assert cache.get_or_load("5511 99999 0000", load) == {"cellphone": "5511999990000"}
+    assert loaded == ["5511999990000"]
+
+
+def test_missing_customer_is_cached_briefly():
+    cache = CustomerCache(ttl=60, max_entries=10, negative_ttl=0.05)
+    calls = []
+
+    def load(phone):
+        calls.append(phone)
+        return None
+
+    assert cache.get_or_load("5511", load) is None
+    assert cache.get_or_load("5511", load) is None
+    assert len(calls) == 1
+
+    time.sleep(0.06)
+    assert cache.get_or_load("5511", load) is None
+    assert len(calls) == 2
+
+
+def test_missing_customer_is_not_cached_without_negative_ttl():
+    cache = CustomerCache(ttl=60, max_entries=10, negative_ttl=0)
+    calls = []
+    for _ in range(2):
+        cache.get_or_load("5511", lambda phone: calls.append(phone))
+    assert calls == ["5511", "5511"]
+
+
+def test_lookup_queries_the_normalized_phone(monkeypatch):
+    manager = CustomerManager()
+    queried = []
+    monkeypatch.setattr(manager, "get_customer", lambda phone: queried.append(phone))
+    assert manager.lookup_customer("+55 11 90000-0001") is None
+    assert queried == ["5511900000001"]
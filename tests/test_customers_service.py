@@ -0,0 +1,86 @@
+"""Tests for customer upserts and the unique phone migration."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from sales.customer_migration import DuplicateCustomers, migrate_unique_cellphone
+from sales.customer_model import Base, Customer
+from sales.customer_schema import CustomerCreate
+from sales.customers_service import CustomerService
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_upsert_normalizes_the_phone(engine):
+    with Session(engine) as db:
+        service = CustomerService(db)
+        service.upsert_customer(
+            CustomerCreate(name="Ana", cellphone="+55 (11) 9999-0000")
+        )
+        customer = service.upsert_customer(
+            CustomerCreate(name="Ana Souza", cellphone="55 11 9999 0000", notes="vip")
+        )
+        assert customer.cellphone == "551199990000"
+        assert (customer.name, customer.notes) == ("Ana Souza", "vip")
+        assert db.query(Customer).count() == 1
+        assert service.get_customer("+55 11 9999-0000").id == customer.id
+
+
+@pytest.fixture
+def legacy_engine(engine):
+    """Customers table created before the unique phone index"""
+    with engine.begin() as conn:
+        for index in Customer.__table__.indexes:
+            index.drop(conn)
+        rows = [
+            ("Ana", "+55 11 9999-0000", "ana@example.com", date(2024, 1, 1)),
+            ("Bia", "5521888", None, date(2024, 2, 1)),
+            ("Ana Souza", "551199990000", None, date(2024, 3, 1)),
+        ]
+        conn.execute(
+            Customer.__table__.insert(),
+            [
+                {"name": name, "cellphone": phone, "email": email, "create_at": day}
+                for name, phone, email, day in rows
+            ],
+        )
+    return engine
+
+
+def customers(engine):
+    with engine.connect() as conn:
+        return (
+            conn.execute(Customer.__table__.select().order_by(Customer.id))
+            .mappings()
+            .all()
+        )
+
+
+def test_migration_refuses_duplicates_without_merge(legacy_engine):
+    before = customers(legacy_engine)
+    with pytest.raises(DuplicateCustomers):
+        migrate_unique_cellphone(legacy_engine)
+    assert customers(legacy_engine) == before
+
+
+def test_migration_merges_duplicates_into_the_newest_row(legacy_engine):
+    assert migrate_unique_cellphone(legacy_engine, merge=True)
+
+    rows = customers(legacy_engine)
+    assert [(r["id"], r["name"], r["cellphone"]) for r in rows] == [
+        (2, "Bia", "5521888"),
+        (3, "Ana Souza", "551199990000"),
+    ]
+    assert rows[1]["email"] == "ana@example.com"
+    assert rows[1]["create_at"] == date(2024, 1, 1)
+    indexes = inspect(legacy_engine).get_indexes("customers")
+    assert any(index["unique"] for index in indexes)
+    assert not migrate_unique_cellphone(legacy_engine)
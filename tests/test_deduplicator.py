@@ -0,0 +1,64 @@
+"""Tests for dropping webhook retries by message id."""
+
+import fakeredis
+import pytest
+
+from messaging.deduplicator import MessageDeduplicator
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def deduplicator(server, local_size=100):
+    return MessageDeduplicator(
+        fakeredis.FakeAsyncRedis(server=server),
+        prefix="test:seen",
+        ttl=60,
+        local_size=local_size,
+    )
+
+
+async def test_repeat_is_caught_by_the_local_lru(server):
+    dedup = deduplicator(server)
+    assert await dedup.are_duplicates(["m1"]) == [False]
+
+    # Without Redis the local copy still knows m1
+    server.connected = False
+    assert await dedup.are_duplicates(["m1", "m2"]) == [True, False]
+
+
+async def test_repeat_seen_by_another_worker_is_caught_in_redis(server):
+    first, second = deduplicator(server), deduplicator(server)
+    assert await first.are_duplicates(["m1", "m2"]) == [False, False]
+    assert await second.are_duplicates(["m2", "m3"]) == [True, False]
+
+
+async def test_repeated_id_inside_one_batch(server):
+    dedup = deduplicator(server)
+    assert await dedup.are_duplicates(["m1", "m1", "m2"]) == [False, True, False]
+
+
+async def test_messages_are_let_through_while_redis_is_down(server):
+    dedup = deduplicator(server)
+    server.connected = False
+    assert await dedup.are_duplicates(["m1", "m2"]) == [False, False]
+
+    # Nothing was remembered, so the ids are claimed once Redis is back
+    server.connected = True
+    assert await dedup.are_duplicates(["m1"]) == [False]
+    assert await deduplicator(server).are_duplicates(["m1"]) == [True]
+
+
+async def test_local_lru_is_bounded(server):
+    dedup = deduplicator(server, local_size=2)
+    await dedup.are_duplicates(["m1", "m2", "m3"])
+    assert list(dedup._recent) == ["m2", "m3"]
+
+
+async def test_single_id_check_shares_the_batch_path(server):
+    dedup = deduplicator(server)
+    assert not await dedup.is_duplicate("m1")
+    assert await dedup.is_duplicate("m1")
+    assert await deduplicator(server).is_duplicate("m1")
@@ -0,0 +1,78 @@
+"""Tests for Evolution API retries."""
+
+import httpx
+import pytest
+
+from messaging import evolution_client as module
+from messaging.evolution_client import EvolutionClient
+from models import SendMessageRequest
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(module.asyncio, "sleep", sleep)
+    return delays
+
+
+def client_answering(*statuses, retry_after="3600"):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, headers={"Retry-After": retry_after})
+
+    client = EvolutionClient(transport=httpx.MockTransport(handler))
+    client.max_retries = 3
+    return client, calls
+
+
+async def test_retry_after_is_clamped_to_max_backoff(sleeps):
+    client, calls = client_answering(429, 429, 200)
+    client.max_backoff = 2.0
+    response = await client._request("send_message", "GET", "/")
+    assert response.status_code == 200
+    assert sleeps == [2.0, 2.0]
+    assert len(calls) == 3
+
+
+async def test_no_retry_past_the_deadline(sleeps):
+    client, calls = client_answering(503, 200)
+    client.max_backoff = 20.0
+    client.retry_deadline = 10.0
+    with pytest.raises(httpx.HTTPStatusError):
+        await client._request("send_message", "GET", "/")
+    assert sleeps == []
+    assert len(calls) == 1
+
+
+async def test_backoff_without_retry_after_is_clamped(sleeps):
+    client, calls = client_answering(502, 502, 502, 502, retry_after="soon")
+    client.retry_backoff = 1.0
+    client.max_backoff = 1.5
+    with pytest.raises(httpx.HTTPStatusError):
+        await client._request("get_instance_info", "GET", "/", idempotent=True)
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+    assert all(delay <= 1.5 for delay in sleeps)
+
+
+@pytest.mark.parametrize("status", [502, 504])
+async def test_send_is_not_retried_on_gateway_errors(sleeps, status):
+    client, calls = client_answering(status, 200)
+    with pytest.raises(Exception, match=str(status)):
+        await client.send_message(SendMessageRequest(number="5511", text="oi"))
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+async def test_idempotent_calls_retry_gateway_errors(sleeps):
+    client, calls = client_answering(504, 200, retry_after="0")
+    response = await client._request("get_instance_info", "GET", "/", idempotent=True)
+    assert response.status_code == 200
+    assert len(calls) == 2
@@ -0,0 +1,107 @@
+"""Tests for outbound flow control per Evolution instance."""
+
+import asyncio
+import time
+
+import pytest
+
+from messaging.outbound_dispatcher import (
+    OutboundDispatcher,
+    OutboundQueueFull,
+    Priority,
+)
+from models import SendMessageRequest
+
+
+def message(text):
+    return SendMessageRequest(number="5511", text=text, instance="test")
+
+
+class Sender:
+    """Records sends; each one waits for ``release`` while ``held`` is set"""
+
+    def __init__(self, held=False):
+        self.sent = []
+        self.release = asyncio.Event()
+        if not held:
+            self.release.set()
+
+    async def __call__(self, request):
+        self.sent.append(request.text)
+        await self.release.wait()
+        return request.text
+
+
+def dispatcher(send, rate=1000.0, burst=10, max_queue=10, max_inflight=1):
+    outbound = OutboundDispatcher(send, rate, burst, max_queue, max_inflight)
+    outbound.start()
+    return outbound
+
+
+async def test_replies_are_sent_before_bulk():
+    send = Sender(held=True)
+    outbound = dispatcher(send)
+    first = asyncio.create_task(outbound.send(message("b0"), Priority.BULK))
+    await asyncio.sleep(0.01)
+
+    # b0 holds the only in-flight slot while the rest queue up
+    queued = [
+        asyncio.create_task(outbound.send(message("b1"), Priority.BULK)),
+        asyncio.create_task(outbound.send(message("b2"), Priority.BULK)),
+        asyncio.create_task(outbound.send(message("r1"))),
+    ]
+    await asyncio.sleep(0.01)
+    send.release.set()
+
+    assert await asyncio.gather(first, *queued) == ["b0", "b1", "b2", "r1"]
+    assert send.sent == ["b0", "r1", "b1", "b2"]
+    await outbound.stop()
+
+
+async def test_full_bulk_queue_rejects_the_send():
+    send = Sender(held=True)
+    outbound = dispatcher(send, max_queue=1)
+    first = asyncio.create_task(outbound.send(message("b0"), Priority.BULK))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(outbound.send(message("b1"), Priority.BULK))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(OutboundQueueFull):
+        await outbound.send(message("b2"), Priority.BULK)
+
+    send.release.set()
+    assert await asyncio.gather(first, second) == ["b0", "b1"]
+    await outbound.stop()
+
+
+async def test_sends_are_rate_limited():
+    send = Sender()
+    outbound = dispatcher(send, rate=20.0, burst=1, max_inflight=10)
+    started = time.monotonic()
+    await asyncio.gather(*(outbound.send(message(f"r{i}")) for i in range(3)))
+
+    # One token up front, then one every 50ms
+    assert time.monotonic() - started >= 0.09
+    assert sorted(send.sent) == ["r0", "r1", "r2"]
+    await outbound.stop()
+
+
+async def test_stop_gives_up_on_queued_sends_after_the_drain_timeout():
+    send = Sender(held=True)
+    outbound = dispatcher(send)
+    outbound.drain_timeout = 0.1
+    first = asyncio.create_task(outbound.send(message("b0"), Priority.BULK))
+    queued = asyncio.create_task(outbound.send(message("b1"), Priority.BULK))
+    await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(outbound.stop(), timeout=1)
+    with pytest.raises(OutboundQueueFull):
+        await queued
+    send.release.set()
+    assert await first == "b0"
+
+
+@pytest.mark.parametrize("rate", [0, -1.0])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        OutboundDispatcher(Sender(), rate=rate, burst=1, max_queue=1)
@@ -0,0 +1,35 @@
+"""Tests for catalog search ranking."""
+
+import pandas as pd
+import pytest
+
+from sales.product_search import ProductIndex
+
+
+@pytest.fixture
+def index():
+    names = [
+        "LEITE XANDO INTEGRAL TIPO A",
+        "ARROZ CAMIL 5KG",
+        "ARROZ TIO JOAO 1KG",
+        "ARROZ TIO JOAO 5KG",
+        "VINAGRE ARROZ CASTELO 750ML",
+        "FEIJAO CARIOCA 1 KG",
+        "MEL 1 KG",
+    ]
+    return ProductIndex(
+        pd.DataFrame({"Produto": names, "Unidade": "UN", "Valor": [5.0] * len(names)})
+    )
+
+
+def names(index, query, limit=10):
+    return [record["produto"] for record in index.records(index.search(query, limit))]
+
+
+def test_product_family_outranks_a_rarer_qualifier(index):
+    # "tipo" is rarer than "arroz" but only qualifies the product asked for
+    assert all(name.startswith("ARROZ") for name in names(index, "arroz tipo 1", 3))
+
+
+def test_quantities_are_not_taken_for_the_product_family(index):
+    assert names(index, "2kg de feijao")[0] == "FEIJAO CARIOCA 1 KG"
@@ -0,0 +1,100 @@
+"""Tests for cutting streamed replies into WhatsApp messages."""
+
+from langchain_core.messages import AIMessageChunk
+
+from agent.deepseek_langchain_service import DeepSeekLCService
+from messaging.reply_chunker import ReplyChunker, chunk_reply
+
+
+def chunk_all(pieces, min_chars=60, max_chars=1000):
+    chunker = ReplyChunker(min_chars=min_chars, max_chars=max_chars)
+    chunks = []
+    for piece in pieces:
+        chunks += chunker.feed(piece)
+    return chunks + chunker.flush()
+
+
+async def stream(pieces):
+    for piece in pieces:
+        yield piece
+
+
+def test_paragraph_breaks_flush():
+    assert chunk_all(["Primeiro.\n\nSegundo.\n\nTerceiro."]) == [
+        "Primeiro.",
+        "Segundo.",
+        "Terceiro.",
+    ]
+
+
+def test_paragraphs_after_a_leading_break_are_still_split():
+    chunks = chunk_all(["\n\nArroz 5kg", "\n\nFeijão 1kg", "\n\nÓleo 900ml"])
+    assert chunks == ["Arroz 5kg", "Feijão 1kg", "Óleo 900ml"]
+
+
+def test_short_sentences_are_grouped_until_min_chars():
+    chunks = chunk_all(
+        ["Oi! Tudo bem? ", "Temos arroz tipo 1 e tipo 2 hoje. Quer?"], min_chars=30
+    )
+    assert chunks == ["Oi! Tudo bem? Temos arroz tipo 1 e tipo 2 hoje.", "Quer?"]
+
+
+def test_prices_do_not_end_a_sentence():
+    chunks = chunk_all(["O arroz custa R$ 24.86 e o feijão R$ 8.90."], min_chars=5)
+    assert chunks == ["O arroz custa R$ 24.86 e o feijão R$ 8.90."]
+
+
+def test_long_text_without_boundary_is_cut_at_a_space():
+    chunks = chunk_all(["palavra " * 20], min_chars=5, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == ["palavra"] * 20
+
+
+async def test_chunk_reply_flushes_the_tail():
+    chunks = [c async for c in chunk_reply(stream(["Oi.", " Tudo", " bem"]))]
+    assert chunks == ["Oi. Tudo bem"]
+
+
+class FakeAgent:
+    """Replays ``(chunk, metadata)`` pairs like ``astream(stream_mode="messages")``"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def astream(self, *args, **kwargs):
+        for event in self.events:
+            yield event
+
+
+def event(text, step, node="model", **kwargs):
+    chunk = AIMessageChunk(content=text, **kwargs)
+    return chunk, {"langgraph_node": node, "langgraph_step": step}
+
+
+async def test_model_calls_are_separated_by_a_paragraph_break():
+    service = DeepSeekLCService()
+    service.llm = FakeAgent(
+        [
+            event("Vou verificar", 1),
+            event("", 1, tool_call_chunks=[{"name": "search_products"}]),
+            event("[...]", 2, node="tools"),
+            event("Temos arroz", 3),
+        ]
+    )
+    tokens = service.stream_completion([], session_id="s", client_phone="5511")
+    chunks = [chunk async for chunk in chunk_reply(tokens)]
+    assert chunks == ["Vou verificar", "Temos arroz"]
+
+
+async def test_stream_reports_tool_use():
+    service = DeepSeekLCService()
+    service.llm = FakeAgent([event("Rua A, 10", 1)])
+    turn = {}
+    async for _ in service.stream_completion([], "s", "5511", turn=turn):
+        pass
+    assert turn == {"used_tools": False}
+
+    service.llm = FakeAgent([event("[...]", 2, node="tools"), event("Temos", 3)])
+    async for _ in service.stream_completion([], "s", "5511", turn=turn):
+        pass
+    assert turn == {"used_tools": True}
@@ -0,0 +1,83 @@
+"""Tests for which questions the response cache may answer."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from agent.response_cache import ResponseCache
+from models import MCPResponse
+from tasks import conversation
+
+
+@pytest.mark.parametrize(
+    ("question", "intent"),
+    [
+        ("Oi, qual o endereço de vocês?", "address"),
+        ("Onde fica a loja?", "address"),
+        ("Qual o horário de funcionamento?", "opening_hours"),
+        ("Que horas vocês fecham?", "opening_hours"),
+        ("Quais as formas de pagamento?", "payment_methods"),
+        ("Vocês aceitam cartão?", "payment_methods"),
+        ("aceita pix?", "payment_methods"),
+    ],
+)
+def test_allowlisted_intents_are_cacheable(question, intent):
+    assert ResponseCache.intent(question) == intent
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Quero pagar no pix",
+        "vou pagar no cartão de crédito",
+        "pode mandar a chave pix?",
+        "qual o total do meu pedido?",
+        "fecha o pedido pra mim",
+        "quero finalizar a compra no débito",
+        "tem arroz?",
+        "vocês entregam na rua das flores?",
+        "qual o endereço de entrega do meu pedido?",
+        "aceita pix? meu pedido é o 123",
+        "pago em dinheiro, precisa de troco pra 50",
+        "quanto custa o feijão?",
+    ],
+)
+def test_checkout_and_order_phrases_are_not_cacheable(question):
+    assert not ResponseCache.is_cacheable(question)
+
+
+@pytest.fixture
+def turn(monkeypatch):
+    """Run a single-reply turn with every collaborator stubbed"""
+    monkeypatch.setattr(conversation.settings, "CACHE_ENABLED", True)
+    monkeypatch.setattr(conversation.settings, "STREAM_REPLIES", False)
+    monkeypatch.setattr(conversation.session_store, "append", AsyncMock())
+    monkeypatch.setattr(conversation.outbound_dispatcher, "send", AsyncMock())
+    monkeypatch.setattr(
+        conversation.response_cache, "lookup", AsyncMock(return_value=None)
+    )
+    record = AsyncMock()
+    monkeypatch.setattr(conversation.response_cache, "record", record)
+
+    async def run(context):
+        response = MCPResponse(response="Rua A, 10", context=context)
+        monkeypatch.setattr(
+            conversation.mcp_client,
+            "send_message",
+            AsyncMock(return_value=response),
+        )
+        await conversation.process_conversation_turn("5511", ["onde fica a loja?"])
+        return record
+
+    return run
+
+
+async def test_reply_without_tool_calls_is_recorded(turn):
+    record = await turn({"used_tools": False})
+    record.assert_awaited_once()
+
+
+@pytest.mark.parametrize("context", [{"used_tools": True}, None])
+async def test_reply_after_tool_calls_is_not_recorded(turn, context):
+    record = await turn(context)
+    record.assert_not_awaited()
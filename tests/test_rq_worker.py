@@ -0,0 +1,31 @@
+"""Tests for the RQ worker metrics cleanup."""
+
+import fakeredis
+import pytest
+from rq import Worker
+
+from tasks import rq_worker
+from tasks.rq_worker import MetricsWorker
+
+
+@pytest.fixture
+def dead(monkeypatch):
+    pids = []
+    monkeypatch.setattr(rq_worker, "mark_process_dead", lambda: pids.append(1))
+    monkeypatch.setattr(Worker, "perform_job", lambda self, job, queue: True)
+    return pids
+
+
+def worker(monkeypatch, is_horse):
+    monkeypatch.setattr(MetricsWorker, "is_horse", property(lambda self: is_horse))
+    return MetricsWorker(["default"], connection=fakeredis.FakeRedis())
+
+
+def test_work_horse_is_marked_dead_after_its_job(monkeypatch, dead):
+    assert worker(monkeypatch, is_horse=True).perform_job(None, None)
+    assert dead == [1]
+
+
+def test_worker_process_is_not_marked_dead_per_job(monkeypatch, dead):
+    assert worker(monkeypatch, is_horse=False).perform_job(None, None)
+    assert dead == []
@@ -0,0 +1,55 @@
+"""Tests for conversation sessions kept in Redis."""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from messaging.session_store import SessionStore
+from models import MCPMessage
+
+
+@pytest.fixture
+def store():
+    return SessionStore(
+        fakeredis.FakeAsyncRedis(),
+        prefix="test",
+        ttl=60,
+        max_sessions=2,
+        max_messages=3,
+    )
+
+
+def user(text):
+    return MCPMessage(content=text, role="user")
+
+
+async def test_session_keeps_its_latest_messages(store):
+    await store.append("s1", [user("oi")], {"platform": "whatsapp"})
+    await store.append("s1", [user("tem arroz?"), user("5kg"), user("e feijão?")])
+
+    session = await store.get("s1")
+    assert session["message_count"] == 4
+    assert session["created_at"] <= session["updated_at"]
+    assert session["context"] == {"platform": "whatsapp"}
+    assert session["last_message"] == {"role": "user", "content": "e feijão?"}
+    assert [m["content"] for m in session["messages"]] == [
+        "tem arroz?",
+        "5kg",
+        "e feijão?",
+    ]
+    assert session["messages"][0]["timestamp"].endswith("Z")
+
+
+async def test_least_recently_active_sessions_are_evicted(store):
+    for session_id in ("s1", "s2", "s3"):
+        await store.append(session_id, [user("oi")])
+        await asyncio.sleep(0.01)
+
+    assert await store.get("s1") is None
+    cursor, sessions = await store.page()
+    assert cursor == 0
+    assert sorted(s["session_id"] for s in sessions) == ["s2", "s3"]
+
+    assert await store.delete("s2")
+    assert not await store.delete("s2")